@@ -0,0 +1,75 @@
+"""
+Per-carrier bulkheads for DakDash upstream calls
+Caps concurrency and time per carrier so one slow courier can't starve the rest
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class BulkheadTimeout(Exception):
+    """Raised when a call exceeds its carrier's timeout budget"""
+    pass
+
+
+class Bulkhead:
+    """
+    Concurrency limit plus timeout budget for one carrier
+
+    At most max_concurrent calls run at once; the rest queue in FIFO
+    order. The timeout budget covers both the queue wait and the call
+    itself, so when a carrier is slow its queue drains by timing out
+    instead of holding requests (and upstream connections) indefinitely.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, timeout: float):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout = timeout if timeout > 0 else None
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.timed_out = 0
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run fn(*args, **kwargs) inside the bulkhead
+
+        Raises:
+            BulkheadTimeout: If queueing plus the call took longer than the budget
+        """
+        try:
+            return await asyncio.wait_for(self._run(fn, *args, **kwargs), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise BulkheadTimeout(
+                f"{self.name} lookups exceeded their {self.timeout:.0f}s budget"
+            )
+
+    async def _run(self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        try:
+            result = await fn(*args, **kwargs)
+            self.completed += 1
+            return result
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Live in-flight/queued counts plus limits and counters"""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "timeout": self.timeout,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "timed_out": self.timed_out
+        }
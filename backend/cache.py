@@ -0,0 +1,142 @@
+"""
+Tracking response cache for DakDash
+In-process LRU cache with status-aware TTL tiers
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+from responses import dumps
+
+
+CacheKey = Tuple[str, str]
+
+
+def cache_key(tracking_number: str, carrier_code: str) -> CacheKey:
+    """Build the (tracking_number, carrier) cache key"""
+    return (tracking_number.strip().upper(), carrier_code.lower())
+
+
+def ttl_for_status(status: str) -> float:
+    """
+    Pick a TTL (seconds) based on the normalized shipment status
+
+    Terminal states rarely change and can be kept for days, moving
+    shipments for minutes, and unknown numbers only briefly.
+    """
+    status = (status or "").lower()
+
+    if status in ("delivered", "expired"):
+        return settings.CACHE_TTL_TERMINAL
+    if status == "in transit":
+        return settings.CACHE_TTL_IN_TRANSIT
+    if status == "not found":
+        return settings.CACHE_TTL_NOT_FOUND
+    return settings.CACHE_TTL_DEFAULT
+
+
+class TrackingCache:
+    """
+    Bounded LRU cache of normalized tracking responses
+
+    Expired entries are not served by get() but stay until LRU eviction,
+    so get_stale() can still fall back to them during upstream outages.
+    Each value is JSON-encoded once when stored, and hits are answered
+    with those bytes (see encoded()). Only get() counts hits and misses;
+    pre-checks use peek()/contains() so a request is counted once.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # key -> (expires_at monotonic, fetched_at wall clock, value, encoded value)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, float, Any, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        """Return the cached value for key, or None if missing/expired"""
+        value = self.peek(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def peek(self, key: CacheKey) -> Optional[Any]:
+        """Like get(), but without touching the hit/miss counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def contains(self, key: CacheKey) -> bool:
+        """Whether a fresh (unexpired) value is cached for key"""
+        return self.peek(key) is not None
+
+    def get_stale(self, key: CacheKey) -> Optional[Tuple[Any, float]]:
+        """Return (value, fetched_at) even if expired, or None if not cached"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry[2], entry[1]
+
+    def encoded(self, key: CacheKey, value: Any) -> bytes:
+        """
+        JSON bytes for value, reusing the stored encoding when value is
+        the object cached under key (values not in the cache are encoded)
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] is value:
+            return entry[3]
+        return dumps(value)
+
+    def set(
+        self,
+        key: CacheKey,
+        value: Any,
+        status: str,
+        min_ttl: float = 0,
+        ttl: Optional[float] = None,
+        fetched_at: Optional[float] = None
+    ) -> None:
+        """Store value with a TTL derived from its normalized status (at least min_ttl) unless ttl is given"""
+        if ttl is None:
+            ttl = max(ttl_for_status(status), min_ttl)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, fetched_at or time.time(), value, dumps(value))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: CacheKey) -> None:
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Global cache instance
+tracking_cache = TrackingCache(settings.CACHE_MAX_ENTRIES)
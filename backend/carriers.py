@@ -1,30 +1,257 @@
 """
 Carrier Service Factory
-Abstraction layer for supporting multiple carriers
+Table-driven normalization engine for all carriers tracked via TrackingMore
 """
 
-from typing import Protocol, Dict, Any
+from array import array
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Tuple
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import httpx
+
+import trackingmore
+from bulkhead import Bulkhead
+from config import settings
+from timestamps import TimestampParser
+from events import EventLog, NO_EPOCH, strings
+from hubs import hub_index
+from pincodes import pincode_index
+
+
+# Map TrackingMore delivery statuses to friendly names
+STATUS_MAP = {
+    "delivered": "Delivered",
+    "transit": "In Transit",
+    "pickup": "Ready for Pickup",
+    "exception": "Exception",
+    "expired": "Expired",
+    "pending": "Pending",
+    "notfound": "Not Found",
+    "infotreceived": "Info Received",
+    "inforeceived": "Info Received"
+}
+
+
+@dataclass(frozen=True)
+class CarrierSpec:
+    """
+    Field mapping for one carrier's TrackingMore payload
+
+    Each *_fields tuple lists the raw keys to try in order; the first
+    non-empty value wins.
+    """
+    code: str
+    name: str
+    icon: str = "📦"
+    event_detail_fields: Tuple[str, ...] = ("tracking_detail", "Details")
+    event_status_fields: Tuple[str, ...] = ("checkpoint_status", "StatusDescription")
+    event_date_fields: Tuple[str, ...] = ("checkpoint_date", "Date")
+    event_office_fields: Tuple[str, ...] = ("location",)
+    delivery_status_fields: Tuple[str, ...] = ("delivery_status", "substatus")
+    last_updated_fields: Tuple[str, ...] = ("update_at", "update_date", "updated_at")
+
+
+CARRIER_SPECS: Dict[str, CarrierSpec] = {
+    spec.code: spec for spec in (
+        CarrierSpec(code="india-post", name="India Post", icon="🇮🇳"),
+        CarrierSpec(code="delhivery", name="Delhivery", icon="📦"),
+        CarrierSpec(code="bluedart", name="Blue Dart", icon="✈️"),
+        CarrierSpec(code="dtdc", name="DTDC", icon="🚚"),
+        CarrierSpec(code="ecom-express", name="Ecom Express", icon="🛒"),
+        CarrierSpec(code="ekart", name="Ekart Logistics", icon="🎯"),
+    )
+}
+
+
+def _first_of(fields: Tuple[str, ...], default: Any = "") -> Callable[[dict], Any]:
+    """Compile a 'first non-empty field' getter for a fixed list of keys"""
+    if len(fields) == 1:
+        (a,) = fields
+        return lambda d: d.get(a) or default
+    if len(fields) == 2:
+        a, b = fields
+        return lambda d: d.get(a) or d.get(b) or default
+    if len(fields) == 3:
+        a, b, c = fields
+        return lambda d: d.get(a) or d.get(b) or d.get(c) or default
+
+    def get(d: dict) -> Any:
+        for field in fields:
+            value = d.get(field)
+            if value:
+                return value
+        return default
+
+    return get
+
+
+class CarrierNormalizer:
+    """
+    Normalizer compiled from a CarrierSpec
+
+    All field lookups are resolved into specialised getters once, when
+    the spec is compiled, so normalizing an event is a handful of dict
+    lookups with no per-call setup.
+    """
+
+    __slots__ = (
+        "spec", "_detail", "_status", "_date", "_office",
+        "_delivery_status", "_last_updated", "_parse_time"
+    )
+
+    def __init__(self, spec: CarrierSpec):
+        self.spec = spec
+        self._detail = _first_of(spec.event_detail_fields)
+        self._status = _first_of(spec.event_status_fields)
+        self._date = _first_of(spec.event_date_fields)
+        self._office = _first_of(spec.event_office_fields)
+        self._delivery_status = _first_of(spec.delivery_status_fields, "unknown")
+        self._last_updated = _first_of(spec.last_updated_fields)
+        self._parse_time = TimestampParser()
+
+    def normalize_events(self, trackinfo: List[dict]) -> EventLog:
+        """
+        Normalize raw checkpoints into a compact log, most recent first
+
+        Each event's timestamp is parsed once into its epoch; sorting
+        and delay detection reuse it. Unrecognised dates sort last. The
+        office name is resolved to a hub id through the hub index.
+
+        Offices, details and statuses repeat across a history, so hub
+        ids and pooled location/status strings are looked up once per
+        distinct value within the call.
+        """
+        get_detail = self._detail
+        get_status = self._status
+        get_date = self._date
+        get_office = self._office
+        parse_time = self._parse_time
+        resolve_hub = hub_index.resolve
+        intern = strings.intern
+
+        # (office, detail) -> (pooled location, hub id); status -> pooled status
+        places: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        status_strings: Dict[str, str] = {}
+
+        rows = []
+        append = rows.append
+        for event in trackinfo:
+            detail = get_detail(event)
+            office_location = get_office(event)
+
+            place = places.get((office_location, detail))
+            if place is None:
+                # Priority: office name + status detail, then either alone
+                if office_location and detail:
+                    location = f"{office_location} - {detail}"
+                else:
+                    location = office_location or detail or "Unknown location"
+                place = places[(office_location, detail)] = (intern(location), resolve_hub(office_location))
+
+            status = get_status(event)
+            pooled_status = status_strings.get(status)
+            if pooled_status is None:
+                pooled_status = status_strings[status] = intern(status)
+
+            timestamp = get_date(event)
+            epoch = parse_time(timestamp)
+            append((int(epoch) if epoch is not None else NO_EPOCH, place[0], pooled_status, place[1], timestamp))
+
+        if not rows:
+            return EventLog.from_rows(rows)
+
+        # Most recent first (stable; unknown epochs last), then split into columns
+        rows.sort(key=itemgetter(0), reverse=True)
+        epochs, locations, statuses, hub_ids, timestamps = zip(*rows)
+        return EventLog(array("q", epochs), locations, statuses, array("L", hub_ids), timestamps)
+
+    def __call__(self, tracking_number: str, data: dict) -> dict:
+        """
+        Normalize a TrackingMore tracking object
+
+        Returns:
+            Dict matching TrackingResponse (without Phase 2 fields), with
+            events as an EventLog
+        """
+        origin_info = data.get("origin_info") or {}
+        trackinfo = origin_info.get("trackinfo")
+        events = self.normalize_events(trackinfo or [])
+
+        status = self._delivery_status(data)
+        friendly_status = STATUS_MAP.get(status.lower(), status.title() if status else "Unknown")
+
+        # Origin: postal code + country, else the oldest event
+        origin = ""
+        origin_country = origin_info.get("country_name", "")
+        origin_postal = origin_info.get("postal_code", "")
+        if origin_postal:
+            origin = f"{origin_postal}, {origin_country}" if origin_country else origin_postal
+        elif origin_country:
+            origin = origin_country
+        if not origin and events:
+            origin = events.location(len(events) - 1)
+
+        # Destination: structured recipient address, else the delivery event
+        destination = ""
+        destination_info = data.get("destination_info") or {}
+        if destination_info:
+            recipient_city = destination_info.get("recipient_city", "")
+            recipient_state = destination_info.get("recipient_state", "")
+            recipient_postal = destination_info.get("recipient_postal", "")
+
+            dest_parts = []
+            if recipient_city:
+                dest_parts.append(recipient_city)
+            if recipient_state and recipient_state != recipient_city:
+                dest_parts.append(recipient_state)
+            if recipient_postal:
+                dest_parts.append(recipient_postal)
+
+            if dest_parts:
+                destination = ", ".join(dest_parts)
+            else:
+                destination = destination_info.get("recipient_address", "")
+
+        if not destination and events and friendly_status == "Delivered":
+            destination = events.location(0)
+
+        # Structured places from the offline pincode index
+        origin_place = pincode_index.lookup(origin_postal)
+        destination_place = pincode_index.lookup(destination_info.get("recipient_postal"))
+
+        return {
+            "tracking_number": tracking_number,
+            "carrier": self.spec.name,
+            "status": friendly_status,
+            "origin": origin,
+            "destination": destination,
+            "origin_place": origin_place,
+            "destination_place": destination_place,
+            "last_updated": self._last_updated(data),
+            "events": events
+        }
 
 
 class CarrierService(ABC):
     """Abstract base class for carrier services"""
-    
+
     @abstractmethod
-    async def create_tracking(self, tracking_number: str) -> Dict[str, Any]:
+    async def create_tracking(self, tracking_number: str) -> httpx.Response:
         """Register tracking number with carrier"""
         pass
-    
+
     @abstractmethod
-    async def get_tracking(self, tracking_number: str) -> Dict[str, Any]:
+    async def get_tracking(self, tracking_number: str) -> httpx.Response:
         """Fetch tracking data from carrier"""
         pass
-    
+
     @abstractmethod
-    def normalize_data(self, raw_data: dict) -> dict:
+    def normalize_data(self, tracking_number: str, raw_data: dict) -> dict:
         """Normalize carrier-specific data to standard format"""
         pass
-    
+
     @property
     @abstractmethod
     def carrier_name(self) -> str:
@@ -32,595 +259,127 @@ class CarrierService(ABC):
         pass
 
 
-class IndiaPostService(CarrierService):
-    """India Post carrier service implementation"""
-    
-    def __init__(self, api_client, api_key: str):
-        self.client = api_client
-        self.api_key = api_key
-        self._carrier_code = "india-post"
-        self._carrier_name = "India Post"
-    
-    async def create_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Register tracking with TrackingMore for India Post"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/create"
-        payload = {
-            "tracking_number": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.post(url, json=payload, headers=headers)
-        return response
-    
-    async def get_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Fetch tracking data for India Post"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/get"
-        params = {
-            "tracking_numbers": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.get(url, params=params, headers=headers)
-        return response
-    
-    def normalize_data(self, raw_data: dict) -> dict:
-        """Normalize India Post data"""
-        # Extract events
-        events = []
-        origin_info = raw_data.get("origin_info", {})
-        
-        if origin_info and origin_info.get("trackinfo"):
-            for event in origin_info["trackinfo"]:
-                detail = event.get("tracking_detail", "") or event.get("Details", "Unknown location")
-                checkpoint = event.get("checkpoint_status", "") or event.get("StatusDescription", "")
-                date = event.get("checkpoint_date", "") or event.get("Date", "")
-                
-                if detail or checkpoint:
-                    events.append({
-                        "location": detail,
-                        "status": checkpoint,
-                        "timestamp": date
-                    })
-        
-        # Determine status
-        status = raw_data.get("delivery_status", "") or raw_data.get("substatus", "unknown")
-        
-        status_map = {
-            "delivered": "Delivered",
-            "transit": "In Transit",
-            "pickup": "Ready for Pickup",
-            "exception": "Exception",
-            "expired": "Expired",
-            "pending": "Pending",
-            "notfound": "Not Found",
-            "infotreceived": "Info Received",
-            "inforeceived": "Info Received"
-        }
-        
-        friendly_status = status_map.get(status.lower(), status.title() if status else "Unknown")
-        
-        # Extract locations
-        origin = events[-1]["location"] if events else ""
-        destination = raw_data.get("destination_info", {}).get("recipient_address", "")
-        
-        # Last updated
-        last_updated = raw_data.get("update_at", "") or raw_data.get("updated_at", "")
-        
-        return {
-            "carrier": self._carrier_name,
-            "status": friendly_status,
-            "origin": origin,
-            "destination": destination,
-            "last_updated": last_updated,
-            "events": events
-        }
-    
-    @property
-    def carrier_name(self) -> str:
-        return self._carrier_name
-
-
-class DelhiveryService(CarrierService):
-    """Delhivery carrier service implementation"""
-    
-    def __init__(self, api_client, api_key: str):
-        self.client = api_client
-        self.api_key = api_key
-        self._carrier_code = "delhivery"
-        self._carrier_name = "Delhivery"
-    
-    async def create_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Register tracking with TrackingMore for Delhivery"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/create"
-        payload = {
-            "tracking_number": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.post(url, json=payload, headers=headers)
-        return response
-    
-    async def get_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Fetch tracking data for Delhivery"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/get"
-        params = {
-            "tracking_numbers": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.get(url, params=params, headers=headers)
-        return response
-    
-    def normalize_data(self, raw_data: dict) -> dict:
-        """Normalize Delhivery data"""
-        events = []
-        origin_info = raw_data.get("origin_info", {})
-        
-        if origin_info and origin_info.get("trackinfo"):
-            for event in origin_info["trackinfo"]:
-                detail = event.get("tracking_detail", "") or event.get("Details", "Unknown location")
-                checkpoint = event.get("checkpoint_status", "") or event.get("StatusDescription", "")
-                date = event.get("checkpoint_date", "") or event.get("Date", "")
-                
-                if detail or checkpoint:
-                    events.append({
-                        "location": detail,
-                        "status": checkpoint,
-                        "timestamp": date
-                    })
-        
-        status = raw_data.get("delivery_status", "") or raw_data.get("substatus", "unknown")
-        status_map = {
-            "delivered": "Delivered",
-            "transit": "In Transit",
-            "pickup": "Ready for Pickup",
-            "exception": "Exception",
-            "expired": "Expired",
-            "pending": "Pending",
-            "notfound": "Not Found",
-            "infotreceived": "Info Received",
-            "inforeceived": "Info Received"
-        }
-        
-        friendly_status = status_map.get(status.lower(), status.title() if status else "Unknown")
-        origin = events[-1]["location"] if events else ""
-        destination = raw_data.get("destination_info", {}).get("recipient_address", "")
-        last_updated = raw_data.get("update_at", "") or raw_data.get("updated_at", "")
-        
-        return {
-            "carrier": self._carrier_name,
-            "status": friendly_status,
-            "origin": origin,
-            "destination": destination,
-            "last_updated": last_updated,
-            "events": events
-        }
-    
-    @property
-    def carrier_name(self) -> str:
-        return self._carrier_name
-
-
-class BlueDartService(CarrierService):
-    """Blue Dart carrier service implementation"""
-    
-    def __init__(self, api_client, api_key: str):
-        self.client = api_client
-        self.api_key = api_key
-        self._carrier_code = "bluedart"
-        self._carrier_name = "Blue Dart"
-    
-    async def create_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Register tracking with TrackingMore for Blue Dart"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/create"
-        payload = {
-            "tracking_number": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.post(url, json=payload, headers=headers)
-        return response
-    
-    async def get_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Fetch tracking data for Blue Dart"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/get"
-        params = {
-            "tracking_numbers": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.get(url, params=params, headers=headers)
-        return response
-    
-    def normalize_data(self, raw_data: dict) -> dict:
-        """Normalize Blue Dart data"""
-        events = []
-        origin_info = raw_data.get("origin_info", {})
-        
-        if origin_info and origin_info.get("trackinfo"):
-            for event in origin_info["trackinfo"]:
-                detail = event.get("tracking_detail", "") or event.get("Details", "Unknown location")
-                checkpoint = event.get("checkpoint_status", "") or event.get("StatusDescription", "")
-                date = event.get("checkpoint_date", "") or event.get("Date", "")
-                
-                if detail or checkpoint:
-                    events.append({
-                        "location": detail,
-                        "status": checkpoint,
-                        "timestamp": date
-                    })
-        
-        status = raw_data.get("delivery_status", "") or raw_data.get("substatus", "unknown")
-        status_map = {
-            "delivered": "Delivered",
-            "transit": "In Transit",
-            "pickup": "Ready for Pickup",
-            "exception": "Exception",
-            "expired": "Expired",
-            "pending": "Pending",
-            "notfound": "Not Found",
-            "infotreceived": "Info Received",
-            "inforeceived": "Info Received"
-        }
-        
-        friendly_status = status_map.get(status.lower(), status.title() if status else "Unknown")
-        origin = events[-1]["location"] if events else ""
-        destination = raw_data.get("destination_info", {}).get("recipient_address", "")
-        last_updated = raw_data.get("update_at", "") or raw_data.get("updated_at", "")
-        
-        return {
-            "carrier": self._carrier_name,
-            "status": friendly_status,
-            "origin": origin,
-            "destination": destination,
-            "last_updated": last_updated,
-            "events": events
-        }
-    
-    @property
-    def carrier_name(self) -> str:
-        return self._carrier_name
-
-
-class DTDCService(CarrierService):
-    """DTDC carrier service implementation"""
-    
-    def __init__(self, api_client, api_key: str):
-        self.client = api_client
-        self.api_key = api_key
-        self._carrier_code = "dtdc"
-        self._carrier_name = "DTDC"
-    
-    async def create_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Register tracking with TrackingMore for DTDC"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/create"
-        payload = {
-            "tracking_number": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.post(url, json=payload, headers=headers)
-        return response
-    
-    async def get_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Fetch tracking data for DTDC"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/get"
-        params = {
-            "tracking_numbers": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.get(url, params=params, headers=headers)
-        return response
-    
-    def normalize_data(self, raw_data: dict) -> dict:
-        """Normalize DTDC data"""
-        events = []
-        origin_info = raw_data.get("origin_info", {})
-        
-        if origin_info and origin_info.get("trackinfo"):
-            for event in origin_info["trackinfo"]:
-                detail = event.get("tracking_detail", "") or event.get("Details", "Unknown location")
-                checkpoint = event.get("checkpoint_status", "") or event.get("StatusDescription", "")
-                date = event.get("checkpoint_date", "") or event.get("Date", "")
-                
-                if detail or checkpoint:
-                    events.append({
-                        "location": detail,
-                        "status": checkpoint,
-                        "timestamp": date
-                    })
-        
-        status = raw_data.get("delivery_status", "") or raw_data.get("substatus", "unknown")
-        status_map = {
-            "delivered": "Delivered",
-            "transit": "In Transit",
-            "pickup": "Ready for Pickup",
-            "exception": "Exception",
-            "expired": "Expired",
-            "pending": "Pending",
-            "notfound": "Not Found",
-            "infotreceived": "Info Received",
-            "inforeceived": "Info Received"
-        }
-        
-        friendly_status = status_map.get(status.lower(), status.title() if status else "Unknown")
-        origin = events[-1]["location"] if events else ""
-        destination = raw_data.get("destination_info", {}).get("recipient_address", "")
-        last_updated = raw_data.get("update_at", "") or raw_data.get("updated_at", "")
-        
-        return {
-            "carrier": self._carrier_name,
-            "status": friendly_status,
-            "origin": origin,
-            "destination": destination,
-            "last_updated": last_updated,
-            "events": events
-        }
-    
-    @property
-    def carrier_name(self) -> str:
-        return self._carrier_name
-
-
-class EcomExpressService(CarrierService):
-    """Ecom Express carrier service implementation"""
-    
-    def __init__(self, api_client, api_key: str):
-        self.client = api_client
-        self.api_key = api_key
-        self._carrier_code = "ecom-express"
-        self._carrier_name = "Ecom Express"
-    
-    async def create_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Register tracking with TrackingMore for Ecom Express"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/create"
-        payload = {
-            "tracking_number": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.post(url, json=payload, headers=headers)
-        return response
-    
-    async def get_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Fetch tracking data for Ecom Express"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/get"
-        params = {
-            "tracking_numbers": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.get(url, params=params, headers=headers)
-        return response
-    
-    def normalize_data(self, raw_data: dict) -> dict:
-        """Normalize Ecom Express data"""
-        events = []
-        origin_info = raw_data.get("origin_info", {})
-        
-        if origin_info and origin_info.get("trackinfo"):
-            for event in origin_info["trackinfo"]:
-                detail = event.get("tracking_detail", "") or event.get("Details", "Unknown location")
-                checkpoint = event.get("checkpoint_status", "") or event.get("StatusDescription", "")
-                date = event.get("checkpoint_date", "") or event.get("Date", "")
-                
-                if detail or checkpoint:
-                    events.append({
-                        "location": detail,
-                        "status": checkpoint,
-                        "timestamp": date
-                    })
-        
-        status = raw_data.get("delivery_status", "") or raw_data.get("substatus", "unknown")
-        status_map = {
-            "delivered": "Delivered",
-            "transit": "In Transit",
-            "pickup": "Ready for Pickup",
-            "exception": "Exception",
-            "expired": "Expired",
-            "pending": "Pending",
-            "notfound": "Not Found",
-            "infotreceived": "Info Received",
-            "inforeceived": "Info Received"
-        }
-        
-        friendly_status = status_map.get(status.lower(), status.title() if status else "Unknown")
-        origin = events[-1]["location"] if events else ""
-        destination = raw_data.get("destination_info", {}).get("recipient_address", "")
-        last_updated = raw_data.get("update_at", "") or raw_data.get("updated_at", "")
-        
-        return {
-            "carrier": self._carrier_name,
-            "status": friendly_status,
-            "origin": origin,
-            "destination": destination,
-            "last_updated": last_updated,
-            "events": events
-        }
-    
-    @property
-    def carrier_name(self) -> str:
-        return self._carrier_name
-
-
-class EkartService(CarrierService):
-    """Ekart Logistics carrier service implementation"""
-    
-    def __init__(self, api_client, api_key: str):
-        self.client = api_client
-        self.api_key = api_key
-        self._carrier_code = "ekart"
-        self._carrier_name = "Ekart Logistics"
-    
-    async def create_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Register tracking with TrackingMore for Ekart"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/create"
-        payload = {
-            "tracking_number": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.post(url, json=payload, headers=headers)
-        return response
-    
-    async def get_tracking(self, tracking_number: str) -> Dict[str, Any]:
-        """Fetch tracking data for Ekart"""
-        headers = {
-            "Tracking-Api-Key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        
-        url = "https://api.trackingmore.com/v4/trackings/get"
-        params = {
-            "tracking_numbers": tracking_number,
-            "courier_code": self._carrier_code
-        }
-        
-        response = await self.client.get(url, params=params, headers=headers)
-        return response
-    
-    def normalize_data(self, raw_data: dict) -> dict:
-        """Normalize Ekart data"""
-        events = []
-        origin_info = raw_data.get("origin_info", {})
-        
-        if origin_info and origin_info.get("trackinfo"):
-            for event in origin_info["trackinfo"]:
-                detail = event.get("tracking_detail", "") or event.get("Details", "Unknown location")
-                checkpoint = event.get("checkpoint_status", "") or event.get("StatusDescription", "")
-                date = event.get("checkpoint_date", "") or event.get("Date", "")
-                
-                if detail or checkpoint:
-                    events.append({
-                        "location": detail,
-                        "status": checkpoint,
-                        "timestamp": date
-                    })
-        
-        status = raw_data.get("delivery_status", "") or raw_data.get("substatus", "unknown")
-        status_map = {
-            "delivered": "Delivered",
-            "transit": "In Transit",
-            "pickup": "Ready for Pickup",
-            "exception": "Exception",
-            "expired": "Expired",
-            "pending": "Pending",
-            "notfound": "Not Found",
-            "infotreceived": "Info Received",
-            "inforeceived": "Info Received"
-        }
-        
-        friendly_status = status_map.get(status.lower(), status.title() if status else "Unknown")
-        origin = events[-1]["location"] if events else ""
-        destination = raw_data.get("destination_info", {}).get("recipient_address", "")
-        last_updated = raw_data.get("update_at", "") or raw_data.get("updated_at", "")
-        
-        return {
-            "carrier": self._carrier_name,
-            "status": friendly_status,
-            "origin": origin,
-            "destination": destination,
-            "last_updated": last_updated,
-            "events": events
-        }
-    
+class TrackingMoreCarrierService(CarrierService):
+    """
+    Carrier service backed by TrackingMore and a compiled CarrierSpec
+
+    Instances are long-lived and shared; every upstream request for the
+    carrier goes through its bulkhead (see trackingmore.send).
+    """
+
+    def __init__(self, spec: CarrierSpec, bulkhead: Bulkhead):
+        self.spec = spec
+        self.normalizer = CarrierNormalizer(spec)
+        self.bulkhead = bulkhead
+
+    async def create_tracking(self, tracking_number: str) -> httpx.Response:
+        """Register tracking with TrackingMore (shared client, rate limit, breaker)"""
+        return await trackingmore.create_tracking(tracking_number, self.spec.code)
+
+    async def get_tracking(self, tracking_number: str) -> httpx.Response:
+        """Fetch tracking data from TrackingMore"""
+        return await trackingmore.get_trackings(tracking_number, self.spec.code)
+
+    def normalize_data(self, tracking_number: str, raw_data: dict) -> dict:
+        """Normalize a TrackingMore tracking object for this carrier"""
+        return self.normalizer(tracking_number, raw_data)
+
     @property
     def carrier_name(self) -> str:
-        return self._carrier_name
+        return self.spec.name
 
 
 class CarrierServiceFactory:
-    """Factory for creating carrier service instances"""
-    
-    _services: Dict[str, type] = {
-        "india-post": IndiaPostService,
-        "delhivery": DelhiveryService,
-        "bluedart": BlueDartService,
-        "dtdc": DTDCService,
-        "ecom-express": EcomExpressService,
-        "ekart": EkartService,
-    }
-    
+    """Factory for carrier service instances"""
+
+    _specs: Dict[str, CarrierSpec] = CARRIER_SPECS
+
     @classmethod
-    def get_service(cls, carrier_code: str, api_client, api_key: str) -> CarrierService:
+    def get_service(cls, carrier_code: str) -> CarrierService:
         """
-        Get carrier service instance
-        
+        Get the shared carrier service instance
+
         Args:
             carrier_code: Carrier identifier (e.g., 'india-post')
-            api_client: HTTP client instance
-            api_key: API key for the service
-            
+
         Returns:
             CarrierService instance
-            
+
         Raises:
             ValueError: If carrier not supported
         """
-        service_class = cls._services.get(carrier_code.lower())
-        
-        if not service_class:
+        service = _SERVICES.get(carrier_code.lower())
+
+        if not service:
             raise ValueError(f"Carrier '{carrier_code}' is not supported")
-        
-        return service_class(api_client, api_key)
-    
+
+        return service
+
+    @classmethod
+    def get_normalizer(cls, carrier_code: str) -> CarrierNormalizer:
+        """
+        Get the compiled normalizer for a carrier
+
+        Carrier codes TrackingMore accepts but DakDash has no spec for
+        fall back to the default field mapping (compiled per call, so
+        arbitrary user-supplied codes are never retained).
+        """
+        code = carrier_code.lower()
+        normalizer = _NORMALIZERS.get(code)
+
+        if normalizer is None:
+            normalizer = CarrierNormalizer(CarrierSpec(code=code, name=code.replace("-", " ").title()))
+
+        return normalizer
+
+    @classmethod
+    def get_bulkhead(cls, carrier_code: str) -> Bulkhead:
+        """
+        Get the bulkhead guarding a carrier's upstream calls
+
+        Carriers without a spec share one "other" bulkhead, so unknown
+        codes are isolated from the supported carriers but not from
+        each other.
+        """
+        service = _SERVICES.get(carrier_code.lower())
+        return service.bulkhead if service else _OTHER_BULKHEAD
+
+    @classmethod
+    def bulkhead_stats(cls) -> Dict[str, dict]:
+        """Live bulkhead stats per carrier code"""
+        stats = {code: service.bulkhead.stats() for code, service in _SERVICES.items()}
+        stats["other"] = _OTHER_BULKHEAD.stats()
+        return stats
+
     @classmethod
     def supported_carriers(cls) -> list:
         """Get list of supported carriers"""
-        return list(cls._services.keys())
+        return list(cls._specs.keys())
+
+    @classmethod
+    def carrier_list(cls) -> List[Dict[str, str]]:
+        """Supported carriers as code/name/icon objects"""
+        return [
+            {"code": spec.code, "name": spec.name, "icon": spec.icon}
+            for spec in cls._specs.values()
+        ]
+
+
+def _build_bulkhead(code: str) -> Bulkhead:
+    return Bulkhead(
+        code,
+        settings.CARRIER_MAX_CONCURRENCY_OVERRIDES.get(code, settings.CARRIER_MAX_CONCURRENCY),
+        settings.CARRIER_TIMEOUT_OVERRIDES.get(code, settings.CARRIER_TIMEOUT)
+    )
+
+
+# Shared service instances (and normalizers), built once at import
+_SERVICES: Dict[str, TrackingMoreCarrierService] = {
+    code: TrackingMoreCarrierService(spec, _build_bulkhead(code)) for code, spec in CARRIER_SPECS.items()
+}
+_NORMALIZERS: Dict[str, CarrierNormalizer] = {
+    code: service.normalizer for code, service in _SERVICES.items()
+}
+_OTHER_BULKHEAD = _build_bulkhead("other")
+
+trackingmore.attach_bulkheads(CarrierServiceFactory.get_bulkhead)
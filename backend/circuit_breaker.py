@@ -0,0 +1,121 @@
+"""
+Circuit breaker for DakDash upstream calls
+Stops sending traffic to TrackingMore while it is failing or very slow
+"""
+
+import time
+from typing import Dict, Optional
+
+from config import settings
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Errors, 5xx/429 responses and calls slower than slow_call_seconds all
+    count as failures. After failure_threshold of them in a row the
+    circuit opens and calls fail fast. Once reset_timeout has passed a
+    single probe call is let through (half-open): success closes the
+    circuit, failure opens it again for another reset_timeout. Outcomes
+    of calls admitted before the circuit last opened are ignored, so a
+    straggler can neither close the circuit nor count against it.
+    """
+
+    def __init__(self, failure_threshold: int, slow_call_seconds: float, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_opened: Optional[float] = None  # kept after the circuit closes again
+        self._probe_in_flight = False
+        self.short_circuited = 0
+
+    def before_call(self) -> bool:
+        """
+        Check whether a call may go upstream
+
+        Returns:
+            True if the call is the half-open probe; only then must its
+            caller release() the probe slot once the call is over
+
+        Raises:
+            CircuitOpenError: While open, or while the half-open probe is running
+        """
+        if self.state == CLOSED:
+            return False
+
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.short_circuited += 1
+                raise CircuitOpenError("Upstream circuit is open")
+            self.state = HALF_OPEN
+
+        if self._probe_in_flight:
+            self.short_circuited += 1
+            raise CircuitOpenError("Upstream circuit is half-open; probe in flight")
+        self._probe_in_flight = True
+        return True
+
+    def _stale(self, started: float) -> bool:
+        return self.last_opened is not None and started < self.last_opened
+
+    def record_success(self, elapsed: float, started: float) -> None:
+        """
+        Record a completed call; slow calls count as failures
+
+        Args:
+            elapsed: Seconds the call took
+            started: time.monotonic() when the call was admitted by before_call()
+        """
+        if self._stale(started):
+            return
+        if self.slow_call_seconds > 0 and elapsed > self.slow_call_seconds:
+            self.record_failure(started)
+            return
+
+        self.failures = 0
+        self.state = CLOSED
+        self.opened_at = None
+
+    def record_failure(self, started: float) -> None:
+        """Record a failed call admitted at started, opening the circuit if needed"""
+        if self._stale(started):
+            return
+        self.failures += 1
+
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = self.last_opened = time.monotonic()
+
+    def release(self) -> None:
+        """Give back the half-open probe slot (called by the probe only)"""
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.opened_at else 0,
+            "short_circuited": self.short_circuited
+        }
+
+
+# Global breaker around TrackingMore
+upstream_breaker = CircuitBreaker(
+    settings.BREAKER_FAILURE_THRESHOLD,
+    settings.BREAKER_SLOW_CALL_SECONDS,
+    settings.BREAKER_RESET_TIMEOUT
+)
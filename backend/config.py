@@ -4,7 +4,7 @@ Environment variables and application settings
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -23,6 +23,107 @@ class Settings(BaseSettings):
         "https://dakdash.vercel.app",  # Production domain (update after deployment)
     ]
     
+    # TrackingMore Webhooks
+    TRACKINGMORE_WEBHOOK_SECRET: str = ""
+    WEBHOOK_MAX_SKEW: float = 300.0  # reject signatures older than this (seconds)
+    WEBHOOK_SNAPSHOT_TTL: float = 6 * 3600  # pushed snapshots stay fresh at least this long
+    WEBHOOK_DEDUP_ENTRIES: int = 100000
+    
+    # Upstream HTTP Client (shared connection pool)
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    HTTP2_ENABLED: bool = False
+    
+    # Upstream Rate Limit (TrackingMore plan quota; rate <= 0 disables)
+    UPSTREAM_RATE_LIMIT: float = 5.0  # calls per second, shared by create and get
+    UPSTREAM_BURST: int = 10
+    UPSTREAM_QUEUE_TIMEOUT_INTERACTIVE: float = 5.0  # max seconds queued for a token
+    UPSTREAM_QUEUE_TIMEOUT_BATCH: float = 30.0
+    UPSTREAM_QUEUE_TIMEOUT_BACKGROUND: float = 120.0
+    
+    # Upstream Circuit Breaker
+    BREAKER_FAILURE_THRESHOLD: int = 5  # consecutive failures before opening
+    BREAKER_SLOW_CALL_SECONDS: float = 10.0  # slower calls count as failures
+    BREAKER_RESET_TIMEOUT: float = 30.0  # seconds open before a probe is allowed
+    
+    # Per-Carrier Bulkheads (overrides are JSON maps keyed by carrier code)
+    CARRIER_MAX_CONCURRENCY: int = 8  # upstream requests running at once per carrier
+    CARRIER_TIMEOUT: float = 45.0  # budget per upstream request, slot wait included (<= 0 disables)
+    CARRIER_MAX_CONCURRENCY_OVERRIDES: Dict[str, int] = {}
+    CARRIER_TIMEOUT_OVERRIDES: Dict[str, float] = {}
+    
+    # Upstream Registration (skip create for known numbers, poll new ones)
+    REGISTRATION_CACHE_SIZE: int = 100000
+    REGISTRATION_POLL_TIMEOUT: float = 6.0  # give up waiting for first data after this
+    REGISTRATION_POLL_INITIAL_DELAY: float = 0.25
+    REGISTRATION_POLL_MAX_DELAY: float = 2.0
+    
+    # Background Jobs (async first-time lookups)
+    JOB_TTL: float = 600.0  # keep finished jobs this long
+    JOB_MAX_ENTRIES: int = 10000
+    JOB_MAX_WAIT: float = 30.0  # long-poll cap for GET /api/jobs/{id}?wait=
+    
+    # Tracking Response Cache (TTL tiers in seconds)
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_TTL_TERMINAL: float = 3 * 24 * 3600  # Delivered / Expired
+    CACHE_TTL_IN_TRANSIT: float = 300.0
+    CACHE_TTL_NOT_FOUND: float = 30.0
+    CACHE_TTL_DEFAULT: float = 120.0  # Pending, Info Received, Exception, ...
+    
+    # Batch Tracking
+    BATCH_MAX_NUMBERS: int = 1000
+    BATCH_STREAM_MAX_NUMBERS: int = 20000  # streaming holds only the in-flight window
+    BATCH_CHUNK_SIZE: int = 40  # capped at the TrackingMore per-call limit
+    BATCH_CONCURRENCY: int = 4  # chunks fetched in parallel
+    
+    # Persistent Shipment Store (SQLite, empty path disables it)
+    STORE_PATH: str = "dakdash.db"
+    
+    # Offline Pincode Index (built by scripts/build_pincode_index.py)
+    PINCODE_INDEX_PATH: str = "data/pincodes.bin"
+    
+    # Hub Index (office names learned as hubs, persisted in the store)
+    HUB_INDEX_MAX_HUBS: int = 200000
+    EVENT_STRING_POOL_MAX: int = 100000  # pooled location/status strings before the pool starts over
+    
+    # Hub Congestion (shipments currently dwelling at each hub)
+    HUB_CONGESTION_MIN_BACKLOG: int = 25  # shipments dwelling before a hub can count as congested
+    HUB_CONGESTION_MIN_MEDIAN_DWELL: float = 24.0  # hours
+    HUB_CONGESTION_MAX_DWELL: float = 30 * 24.0  # hours before a dwelling shipment is dropped
+    
+    # Transit Statistics (quantile sketches per hub, lane and carrier, persisted in the store)
+    TRANSIT_STATS_MAX_SKETCHES: int = 50000  # ~400 bytes each
+    TRANSIT_STATS_MIN_SAMPLES: int = 50  # completed hops before a sketch replaces the defaults
+    TRANSIT_STATS_SAVE_INTERVAL: float = 300.0  # seconds between saves of changed sketches
+    DELAY_POSSIBLE_PERCENTILE: float = 0.90  # of transit times out of the current hub
+    DELAY_DELAYED_PERCENTILE: float = 0.99
+    DELAY_STUCK_PERCENTILE: float = 0.95  # of dwell times at the current hub
+    DELAY_MIN_THRESHOLD_HOURS: float = 12.0  # learned thresholds never go below this
+    
+    # ETA Prediction (index built by scripts/build_eta_index.py)
+    ETA_MIN_SAMPLES: int = 20  # delivered shipments through a hub before it predicts
+    ETA_LOW_PERCENTILE: float = 0.10  # window start
+    ETA_HIGH_PERCENTILE: float = 0.90  # window end
+    
+    # Watchlist (background refresh of watched shipments)
+    WATCH_MAX_ENTRIES: int = 10000
+    WATCH_SCHEDULER_ENABLED: bool = True  # enable in one worker only when running several (needs STORE_PATH)
+    WATCH_MAX_PER_CYCLE: int = 200  # due shipments refreshed per scheduler pass
+    WATCH_INTERVAL_NEAR_DELIVERY: float = 3600.0  # seconds; also the shortest interval
+    WATCH_INTERVAL_TRANSIT_MAX: float = 12 * 3600.0
+    WATCH_INTERVAL_PENDING: float = 24 * 3600.0
+    WATCH_NEAR_DELIVERY_HOURS: float = 24.0  # ETA closer than this counts as near delivery
+    WATCH_RETRY_INTERVAL: float = 900.0  # after a failed refresh
+    WATCH_IDLE_SLEEP: float = 60.0  # max scheduler sleep between checks
+    
+    # Live subscriptions (/api/subscribe WebSocket and SSE)
+    SUBSCRIBE_MAX_CONNECTIONS: int = 20000  # per worker
+    SUBSCRIBE_MAX_NUMBERS: int = 100  # tracking numbers per connection
+    SUBSCRIBE_KEEPALIVE: float = 25.0  # seconds between SSE keepalive comments
+    
     # Application Settings
     APP_NAME: str = "DakDash API"
     DEBUG: bool = False
@@ -0,0 +1,150 @@
+"""
+Hub congestion index for DakDash
+Tracks which shipments are currently dwelling at each hub, across all shipments
+"""
+
+import bisect
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from hubs import hub_index
+
+
+ShipmentKey = Tuple[str, str]
+
+
+class HubCongestion:
+    """
+    Inverted index of hub id -> shipments currently dwelling there
+
+    observe() is called with each shipment's latest timeline and moves
+    the shipment between hubs with dict operations plus one bisect into
+    that hub's arrival-ordered list, so the median dwell of any hub is
+    read straight from the middle of its list. Nothing ever scans all
+    shipments. Shipments leave the index when delivered, when they move
+    on, or once they have dwelt longer than max_dwell (treated as
+    abandoned); a hub's abandoned arrivals are pruned whenever it gains
+    a shipment, so its list only ever holds the window.
+    """
+
+    def __init__(self, min_backlog: int, min_median_dwell: float, max_dwell: float):
+        self.min_backlog = min_backlog
+        self.min_median_dwell = min_median_dwell  # hours
+        self.max_dwell = max_dwell  # hours
+        self._current: Dict[ShipmentKey, Tuple[int, int]] = {}  # shipment -> (hub id, arrived)
+        self._arrivals: Dict[int, List[Tuple[int, ShipmentKey]]] = {}  # hub id -> sorted (arrived, shipment)
+
+    def observe(self, key: ShipmentKey, timeline: dict, delivered: bool = False) -> None:
+        """
+        Record where a shipment is now
+
+        Args:
+            key: (tracking_number, carrier_code) cache key
+            timeline: analyze_timeline() result for its events
+            delivered: Delivered shipments are removed from the index
+        """
+        hops = timeline["hops"]
+        position = None
+        if not delivered and hops:
+            current_hop = hops[-1]
+            if current_hop["hub_id"] is not None and current_hop["arrived_epoch"] is not None:
+                position = (current_hop["hub_id"], current_hop["arrived_epoch"])
+
+        now = time.time()
+        if position is not None and position[1] < self._cutoff(now):
+            position = None  # already abandoned there
+
+        previous = self._current.get(key)
+        if previous == position:
+            return
+        if previous is not None:
+            self._remove(key, previous)
+        if position is not None:
+            self._current[key] = position
+            bisect.insort(self._arrivals.setdefault(position[0], []), (position[1], key))
+            self._expire(position[0], now)
+
+    def load(self, rows: List[Tuple[str, str, int, int]]) -> None:
+        """Seed from stored (tracking_number, carrier_code, hub id, arrived) rows on startup"""
+        for tracking_number, carrier_code, hub_id, arrived in rows:
+            key = (tracking_number, carrier_code)
+            self._current[key] = (hub_id, arrived)
+            self._arrivals.setdefault(hub_id, []).append((arrived, key))
+        now = time.time()
+        for hub_id, arrivals in list(self._arrivals.items()):
+            arrivals.sort()
+            self._expire(hub_id, now)
+
+    def _remove(self, key: ShipmentKey, position: Tuple[int, int]) -> None:
+        del self._current[key]
+        arrivals = self._arrivals[position[0]]
+        entry = (position[1], key)
+        index = bisect.bisect_left(arrivals, entry)
+        if index < len(arrivals) and arrivals[index] == entry:
+            del arrivals[index]
+        if not arrivals:
+            del self._arrivals[position[0]]
+
+    def _cutoff(self, now: float) -> float:
+        """Arrivals before this epoch count as abandoned"""
+        return now - self.max_dwell * 3600
+
+    def _expire(self, hub_id: int, now: float) -> List[Tuple[int, ShipmentKey]]:
+        """Drop a hub's abandoned shipments (the oldest arrivals come first)"""
+        arrivals = self._arrivals[hub_id]
+        expired = bisect.bisect_left(arrivals, (self._cutoff(now),))
+        if expired:
+            for _, key in arrivals[:expired]:
+                del self._current[key]
+            del arrivals[:expired]
+        if not arrivals:
+            del self._arrivals[hub_id]
+        return arrivals
+
+    def hub_status(self, hub_id: int, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Backlog at one hub
+
+        Returns:
+            Dict with hub_id, hub, backlog, median_dwell_hours,
+            oldest_dwell_hours and congested, or None if nothing is
+            dwelling there
+        """
+        if hub_id not in self._arrivals:
+            return None
+
+        now = time.time() if now is None else now
+        arrivals = self._expire(hub_id, now)
+        if not arrivals:
+            return None
+
+        median_arrival = arrivals[(len(arrivals) - 1) // 2][0]
+        median_dwell = round((now - median_arrival) / 3600, 1)
+        return {
+            "hub_id": hub_id,
+            "hub": hub_index.name(hub_id),
+            "backlog": len(arrivals),
+            "median_dwell_hours": median_dwell,
+            "oldest_dwell_hours": round((now - arrivals[0][0]) / 3600, 1),
+            "congested": len(arrivals) >= self.min_backlog and median_dwell >= self.min_median_dwell
+        }
+
+    def ranking(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Hubs ordered by backlog, then median dwell (costs O(hubs))"""
+        now = time.time()
+        hubs = [self.hub_status(hub_id, now) for hub_id in list(self._arrivals)]
+        hubs = [hub for hub in hubs if hub is not None]
+        hubs.sort(key=lambda hub: (hub["backlog"], hub["median_dwell_hours"]), reverse=True)
+        return hubs[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        return {"shipments": len(self._current), "hubs": len(self._arrivals)}
+
+
+# Global congestion index
+hub_congestion = HubCongestion(
+    settings.HUB_CONGESTION_MIN_BACKLOG,
+    settings.HUB_CONGESTION_MIN_MEDIAN_DWELL,
+    settings.HUB_CONGESTION_MAX_DWELL
+)
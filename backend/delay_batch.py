@@ -0,0 +1,127 @@
+"""
+Batch delay detection for DakDash
+Vectorized detect_delay rules for fleet-wide sweeps over columnar shipment data
+"""
+
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from delay_detection import DELAY_THRESHOLDS
+from events import EventLog
+from hubs import NO_HUB
+
+
+# Delivery status codes accepted by detect_delay_batch (anything else is OTHER)
+STATUS_OTHER = 0
+STATUS_PENDING = 1
+STATUS_DELIVERED = 2
+STATUS_EXCEPTION = 3
+STATUS_ALERT = 4
+STATUS_UNDELIVERED = 5
+
+DELIVERY_STATUS_CODES: Dict[str, int] = {
+    "pending": STATUS_PENDING,
+    "delivered": STATUS_DELIVERED,
+    "exception": STATUS_EXCEPTION,
+    "alert": STATUS_ALERT,
+    "undelivered": STATUS_UNDELIVERED,
+}
+
+# Result codes index into these tuples
+DELAY_STATUSES = ("Normal", "Unknown", "Possible Delay", "Delayed", "Exception")
+SEVERITIES = ("none", "low", "medium", "high")
+
+_NORMAL, _UNKNOWN, _POSSIBLE_DELAY, _DELAYED, _EXCEPTION = range(len(DELAY_STATUSES))
+_NONE, _LOW, _MEDIUM, _HIGH = range(len(SEVERITIES))
+
+
+def delivery_status_code(delivery_status: Optional[str]) -> int:
+    """Status code for a TrackingMore delivery_status string"""
+    return DELIVERY_STATUS_CODES.get((delivery_status or "").lower(), STATUS_OTHER)
+
+
+def last_two_hubs(events: EventLog) -> tuple:
+    """(last hub, previous hub) columns for a shipment's event log"""
+    hub_ids = events.hub_ids
+    return (
+        hub_ids[0] if len(hub_ids) > 0 else NO_HUB,
+        hub_ids[1] if len(hub_ids) > 1 else NO_HUB
+    )
+
+
+def detect_delay_batch(
+    last_update_epochs: Sequence[float],
+    status_codes: Sequence[int],
+    last_hubs: Sequence[int],
+    previous_hubs: Sequence[int],
+    now: Optional[float] = None,
+    thresholds: Optional[Dict[str, object]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Apply the detect_delay rules to many shipments at once
+
+    Same thresholds and precedence as delay_detection.detect_delay, so
+    each row matches what the scalar function reports for that shipment
+    (tests/test_delay_batch.py enforces this).
+
+    Args:
+        last_update_epochs: Last update per shipment, epoch seconds (NaN if unknown)
+        status_codes: delivery_status_code() per shipment
+        last_hubs: Hub id of the newest event (NO_HUB if unknown)
+        previous_hubs: Hub id of the event before it (NO_HUB if there is none)
+        now: Current time as epoch seconds (defaults to time.time())
+        thresholds: Rule thresholds in hours like DELAY_THRESHOLDS (the
+                    default); each may be a scalar or a per-shipment array
+
+    Returns:
+        Dict of equal-length arrays: "status" and "severity" codes (index
+        DELAY_STATUSES / SEVERITIES) and "hours_since_update"
+    """
+    epochs = np.asarray(last_update_epochs, dtype=np.float64)
+    codes = np.asarray(status_codes)
+    last_hub = np.asarray(last_hubs)
+    previous_hub = np.asarray(previous_hubs)
+
+    if thresholds is None:
+        thresholds = DELAY_THRESHOLDS
+
+    hours = ((time.time() if now is None else now) - epochs) / 3600
+
+    known = ~np.isnan(epochs)
+    active = known & (codes != STATUS_DELIVERED)
+
+    # Time thresholds: first matching rule wins
+    pending_late = active & (codes == STATUS_PENDING) & (hours > thresholds["pending"])
+    rest = active & ~pending_late
+    over_delayed = rest & (hours > thresholds["delayed"])
+    over_possible = rest & ~over_delayed & (hours > thresholds["possible_delay"])
+
+    # Stuck at the same hub, then exception statuses, override the above
+    stuck = active & (last_hub != NO_HUB) & (last_hub == previous_hub) & (hours > thresholds["stuck"])
+    exception = active & np.isin(codes, (STATUS_EXCEPTION, STATUS_ALERT, STATUS_UNDELIVERED))
+
+    status = np.full(epochs.shape, _NORMAL, dtype=np.int8)
+    severity = np.full(epochs.shape, _NONE, dtype=np.int8)
+
+    status[~known & (codes != STATUS_DELIVERED)] = _UNKNOWN
+    status[pending_late] = _POSSIBLE_DELAY
+    severity[pending_late] = _LOW
+    status[over_delayed] = _DELAYED
+    severity[over_delayed] = _HIGH
+    status[over_possible] = _POSSIBLE_DELAY
+    severity[over_possible] = _MEDIUM
+    status[stuck] = _DELAYED
+    severity[stuck] = _HIGH
+    status[exception] = _EXCEPTION
+    severity[exception] = _HIGH
+
+    # Same arithmetic as delay_detection.round_hours
+    rounded = np.floor(np.where(active, hours, 0.0) * 10 + 0.5) / 10
+
+    return {
+        "status": status,
+        "severity": severity,
+        "hours_since_update": rounded
+    }
@@ -3,17 +3,48 @@ Delay detection utilities for DakDash
 Rule-based system to identify shipment delays
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import math
+import time
+from datetime import datetime
+from typing import Dict, Optional
 
+from timestamps import parse_timestamp, IST
+from events import EventLog
+from congestion import hub_congestion
 
-def detect_delay(tracking_data: dict, events: List[dict]) -> Dict[str, any]:
+
+# Rule thresholds in hours, used until transit statistics have enough samples
+DELAY_THRESHOLDS: Dict[str, float] = {
+    "pending": 24.0,  # no movement since registration
+    "possible_delay": 48.0,
+    "delayed": 72.0,
+    "stuck": 36.0  # repeated scans at the same hub
+}
+
+
+def round_hours(hours: float) -> float:
+    """Round hours to one decimal (half up; delay_batch uses the same arithmetic)"""
+    return math.floor(hours * 10 + 0.5) / 10
+
+
+def detect_delay(
+    tracking_data: dict,
+    timeline: dict,
+    now: Optional[float] = None,
+    thresholds: Optional[dict] = None
+) -> Dict[str, any]:
     """
     Detect if a shipment is delayed based on rule-based logic
     
+    delay_batch.detect_delay_batch applies the same rules to many
+    shipments at once; keep the two in step.
+    
     Args:
         tracking_data: Raw tracking data from API
-        events: List of tracking events
+        timeline: analyze_timeline() result for the shipment's events
+        now: Current time as epoch seconds (defaults to time.time())
+        thresholds: Rule thresholds in hours (defaults to DELAY_THRESHOLDS),
+                    e.g. from transit_stats.thresholds()
         
     Returns:
         Dictionary with delay status and details
@@ -27,6 +58,9 @@ def detect_delay(tracking_data: dict, events: List[dict]) -> Dict[str, any]:
         "hours_since_update": 0
     }
     
+    if thresholds is None:
+        thresholds = DELAY_THRESHOLDS
+    
     # Get current delivery status
     delivery_status = tracking_data.get("delivery_status", "").lower()
     
@@ -35,51 +69,57 @@ def detect_delay(tracking_data: dict, events: List[dict]) -> Dict[str, any]:
         delay_info["message"] = "Shipment has been delivered"
         return delay_info
     
-    # Get last update timestamp
+    # Get last update time, falling back to the newest scan's parsed epoch
     last_update = tracking_data.get("update_at") or tracking_data.get("latest_checkpoint_time")
+    last_update_epoch = parse_timestamp(last_update)
+    if last_update_epoch is None:
+        last_update_epoch = timeline["last_scan_epoch"]
     
-    if not last_update:
+    if last_update_epoch is None:
         delay_info["status"] = "Unknown"
         delay_info["message"] = "No tracking updates available yet"
         return delay_info
     
     try:
-        # Parse last update time
-        last_update_dt = datetime.fromisoformat(last_update.replace("Z", "+00:00"))
-        current_time = datetime.now(last_update_dt.tzinfo)
-        time_diff = current_time - last_update_dt
-        hours_since_update = time_diff.total_seconds() / 3600
+        hours_since_update = ((time.time() if now is None else now) - last_update_epoch) / 3600
         
-        delay_info["hours_since_update"] = round(hours_since_update, 1)
+        delay_info["hours_since_update"] = round_hours(hours_since_update)
         
         # Check for delays based on time thresholds
-        if delivery_status == "pending" and hours_since_update > 24:
-            # Pending for more than 24 hours
+        if delivery_status == "pending" and hours_since_update > thresholds["pending"]:
+            # Pending for more than 24 hours (by default)
             delay_info["status"] = "Possible Delay"
             delay_info["severity"] = "low"
             delay_info["message"] = f"No movement detected for {int(hours_since_update)} hours. Shipment may still be awaiting pickup."
             
-        elif hours_since_update > 72:
-            # No update for more than 72 hours (3 days)
+        elif hours_since_update > thresholds["delayed"]:
+            # No update for more than 72 hours (3 days) by default, or slower than almost all past transits
             delay_info["status"] = "Delayed"
             delay_info["severity"] = "high"
             delay_info["message"] = f"Shipment has not moved for {int(hours_since_update)} hours. This is unusual and may indicate a delay."
             
-        elif hours_since_update > 48:
-            # No update for more than 48 hours (2 days)
+        elif hours_since_update > thresholds["possible_delay"]:
+            # No update for more than 48 hours (2 days) by default, or slower than most past transits
             delay_info["status"] = "Possible Delay"
             delay_info["severity"] = "medium"
             delay_info["message"] = f"No updates for {int(hours_since_update)} hours. Shipment may be delayed at a sorting facility."
         
-        # Check for stuck at same location
-        if events and len(events) >= 2:
-            last_location = events[0].get("location", "")
-            second_last_location = events[1].get("location", "")
+        # Check for stuck at same hub (hops group scans by canonical hub id, so spelling variants match)
+        if timeline["hops"]:
+            current_hop = timeline["hops"][-1]
             
-            if last_location and last_location == second_last_location and hours_since_update > 36:
+            if current_hop["hub_id"] is not None and current_hop["scans"] >= 2 and hours_since_update > thresholds["stuck"]:
                 delay_info["status"] = "Delayed"
                 delay_info["severity"] = "high"
-                delay_info["message"] = f"Shipment stuck at {last_location} for {int(hours_since_update)} hours."
+                delay_info["message"] = f"Shipment stuck at {current_hop['hub']} for {int(hours_since_update)} hours."
+        
+        # Explain delays at a hub that is backed up across many shipments
+        if delay_info["status"] != "Normal" and timeline["hops"]:
+            hub_id = timeline["hops"][-1]["hub_id"]
+            congestion = hub_congestion.hub_status(hub_id, now) if hub_id is not None else None
+            if congestion and congestion["congested"]:
+                delay_info["hub_congestion"] = congestion
+                delay_info["message"] += f" {congestion['hub']} is congested: {congestion['backlog']} shipments waiting, median {int(congestion['median_dwell_hours'])} hours."
         
         # Check for exception status
         if delivery_status in ["exception", "alert", "undelivered"]:
@@ -93,14 +133,26 @@ def detect_delay(tracking_data: dict, events: List[dict]) -> Dict[str, any]:
     return delay_info
 
 
-def generate_smart_summary(tracking_data: dict, events: List[dict], delay_info: dict) -> str:
+def _format_day(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, IST).strftime("%a %d %b")
+
+
+def generate_smart_summary(
+    tracking_data: dict,
+    events: EventLog,
+    delay_info: dict,
+    timeline: dict,
+    eta: Optional[dict] = None
+) -> str:
     """
     Generate a user-friendly natural language summary of shipment status
     
     Args:
         tracking_data: Raw tracking data
-        events: List of tracking events
+        events: Normalized event log, most recent first
         delay_info: Delay detection results
+        timeline: analyze_timeline() result for the same events
+        eta: eta_index.predict() result, if any
         
     Returns:
         Human-readable summary string
@@ -117,15 +169,21 @@ def generate_smart_summary(tracking_data: dict, events: List[dict], delay_info:
         return "⚠️ Your shipment has encountered an issue. Please contact India Post customer service for assistance."
     
     # Get latest event
-    if events and len(events) > 0:
-        latest_event = events[0]
-        location = latest_event.get("location", "")
-        status = latest_event.get("status", "")
+    if len(events) > 0:
+        location = events.location(0)
+        status = events.status(0)
         
         # Build summary based on status
         if delivery_status == "transit" or "transit" in status.lower():
-            if delay_info["status"] == "Delayed":
+            current_hop = timeline["hops"][-1]
+            if delay_info["status"] == "Delayed" and current_hop["hub"] and current_hop["dwell_hours"]:
+                return f"⏸️ Your parcel has been held at {current_hop['hub']} for {int(delay_info['hours_since_update'] + current_hop['dwell_hours'])} hours across {current_hop['scans']} scans. Expect possible delays."
+            elif delay_info["status"] == "Delayed":
                 return f"⏸️ Your parcel is currently at {location}, but hasn't moved for {int(delay_info['hours_since_update'])} hours. Expect possible delays."
+            elif eta and not eta["overdue"]:
+                earliest, latest = _format_day(eta["earliest_epoch"]), _format_day(eta["latest_epoch"])
+                window = earliest if earliest == latest else f"between {earliest} and {latest}"
+                return f"📦 Your parcel is in transit. Last location: {location}. Expected delivery {window}."
             else:
                 return f"📦 Your parcel is in transit. Last location: {location}. Delivery expected soon."
         
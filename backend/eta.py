@@ -0,0 +1,147 @@
+"""
+ETA prediction for DakDash
+Delivery windows from historical hub-to-delivery times, indexed by hub, destination region and carrier
+"""
+
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import settings
+from transit_stats import QuantileSketch
+
+
+# Region used for the per-hub fallback entry (any destination)
+ANY_REGION = "*"
+
+# (hub id, destination region, carrier code)
+EtaKey = Tuple[int, str, str]
+EtaRow = Tuple[int, str, str, bytes]
+
+# (epoch, hub id) scans of one shipment, oldest first
+History = List[Tuple[float, Optional[int]]]
+
+
+def region_of(place: Optional[dict]) -> Optional[str]:
+    """Destination region: the first two PIN digits (same prefix as transit lanes)"""
+    return place["pincode"][:2] if place else None
+
+
+def hours_to_delivery(history: History) -> Iterator[Tuple[int, float]]:
+    """
+    (hub id, hours from arriving at the hub to delivery) for each hop of a delivered shipment
+
+    The last scan is taken as the delivery; scans without a hub are skipped.
+    """
+    if not history:
+        return
+    delivered = history[-1][0]
+    current_hub = None
+    for epoch, hub_id in history:
+        if hub_id is not None and hub_id != current_hub:
+            yield hub_id, (delivered - epoch) / 3600
+        current_hub = hub_id
+
+
+def add_history(sketches: Dict[EtaKey, QuantileSketch], carrier_code: str, region: Optional[str], history: History) -> None:
+    """Add a delivered shipment's hops to the build sketches (its region and the any-region entry)"""
+    regions = (region, ANY_REGION) if region else (ANY_REGION,)
+    for hub_id, hours in hours_to_delivery(history):
+        for key_region in regions:
+            key = (hub_id, key_region, carrier_code)
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = QuantileSketch()
+            sketch.add(hours)
+
+
+class EtaIndex:
+    """
+    Precomputed delivery windows per (hub, destination region, carrier)
+
+    Sketches are built offline by scripts/build_eta_index.py from the
+    delivered shipments in the store. load() turns each into its low,
+    median and high percentile once, so predict() is two dict lookups
+    and some arithmetic. Restart to pick up a rebuilt index.
+    """
+
+    def __init__(self, min_samples: int, low: float, high: float):
+        self.min_samples = min_samples
+        self.low = low
+        self.high = high
+        # key -> (low, median, high hours, samples)
+        self._windows: Dict[EtaKey, Tuple[float, float, float, int]] = {}
+
+    def load(self, rows: Iterable[EtaRow]) -> None:
+        """Restore windows from persisted (hub id, region, carrier, counts) sketches"""
+        for hub_id, region, carrier_code, blob in rows:
+            try:
+                sketch = QuantileSketch.from_bytes(blob)
+            except ValueError:
+                print(f"Ignoring ETA sketch {hub_id}/{region}/{carrier_code}: unrecognised format")
+                continue
+            self.set_sketch((hub_id, region, carrier_code), sketch)
+
+    def set_sketch(self, key: EtaKey, sketch: QuantileSketch) -> None:
+        if sketch.total >= self.min_samples:
+            self._windows[key] = (
+                sketch.quantile(self.low),
+                sketch.quantile(0.5),
+                sketch.quantile(self.high),
+                sketch.total
+            )
+
+    def predict(
+        self,
+        timeline: dict,
+        carrier_code: str,
+        region: Optional[str],
+        now: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Expected delivery window for an undelivered shipment
+
+        Args:
+            timeline: analyze_timeline() result (the current hop is used)
+            carrier_code: Normalized carrier code
+            region: region_of() the destination, if known
+            now: Current time as epoch seconds (defaults to time.time())
+
+        Returns:
+            Dict with earliest/expected/latest_epoch (never before now),
+            overdue (history says it should have arrived by now), basis
+            and samples, or None without a usable hub or history
+        """
+        hops = timeline["hops"]
+        if not hops:
+            return None
+        hub_id = hops[-1]["hub_id"]
+        arrived = hops[-1]["arrived_epoch"]
+        if hub_id is None or arrived is None:
+            return None
+
+        basis = "hub_region"
+        window = self._windows.get((hub_id, region, carrier_code)) if region else None
+        if window is None:
+            basis = "hub"
+            window = self._windows.get((hub_id, ANY_REGION, carrier_code))
+            if window is None:
+                return None
+
+        now = time.time() if now is None else now
+        low, median, high, samples = window
+        latest = arrived + high * 3600
+        return {
+            "earliest_epoch": int(max(now, arrived + low * 3600)),
+            "expected_epoch": int(max(now, arrived + median * 3600)),
+            "latest_epoch": int(max(now, latest)),
+            "overdue": latest < now,
+            "basis": basis,
+            "samples": samples
+        }
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+
+# Global ETA index, loaded from the shipment store on startup
+eta_index = EtaIndex(settings.ETA_MIN_SAMPLES, settings.ETA_LOW_PERCENTILE, settings.ETA_HIGH_PERCENTILE)
@@ -0,0 +1,142 @@
+"""
+Compact event storage for DakDash
+Array-backed event timelines with pooled location and status strings
+"""
+
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from hubs import NO_HUB
+
+
+# Stored in place of the epoch for timestamps that could not be parsed
+NO_EPOCH = -(2 ** 63)
+
+# (timestamp, location, status, epoch, hub id) as produced by normalizers and the store
+EventRow = Tuple[str, str, str, Optional[float], Optional[int]]
+
+
+class StringPool:
+    """
+    Bounded process-wide pool of shared strings
+
+    Hub names and status phrases repeat across thousands of shipments,
+    so events take the pooled copy of each string instead of holding
+    their own. Events keep references to the strings themselves, not
+    ids, so the pool can be emptied at any time: once it reaches
+    max_entries it starts over, and strings only referenced by evicted
+    snapshots are freed with them.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._strings: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, value: str) -> str:
+        """The pooled copy of value, adding it the first time it is seen"""
+        pooled = self._strings.get(value)
+        if pooled is not None:
+            return pooled
+
+        # The store decodes events on worker threads
+        with self._lock:
+            if len(self._strings) >= self.max_entries:
+                self._strings.clear()
+            return self._strings.setdefault(value, value)
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+strings = StringPool(settings.EVENT_STRING_POOL_MAX)
+
+
+def _sort_key(row: EventRow) -> float:
+    epoch = row[3]
+    return epoch if epoch is not None else NO_EPOCH
+
+
+class EventLog:
+    """
+    A shipment's events, most recent first, stored column-wise
+
+    Epochs are whole seconds in a signed 64-bit array (NO_EPOCH when the
+    carrier's timestamp was unrecognised), locations/statuses are
+    tuples of strings from the shared StringPool and hub_ids come from
+    the hub index
+    (NO_HUB when unknown). Only the raw timestamp strings are kept per
+    event. Convert with to_dicts() at the API boundary.
+    """
+
+    __slots__ = ("epochs", "locations", "statuses", "hub_ids", "timestamps")
+
+    def __init__(
+        self,
+        epochs: array,
+        locations: Tuple[str, ...],
+        statuses: Tuple[str, ...],
+        hub_ids: array,
+        timestamps: Tuple[str, ...]
+    ):
+        self.epochs = epochs
+        self.locations = locations
+        self.statuses = statuses
+        self.hub_ids = hub_ids
+        self.timestamps = timestamps
+
+    @classmethod
+    def from_rows(cls, rows: List[EventRow], sort: bool = True) -> "EventLog":
+        """
+        Build a log from (timestamp, location, status, epoch, hub id) rows
+
+        Args:
+            rows: Event rows; epoch and hub id may be None if unknown
+            sort: Order by epoch, most recent first (stable; unknown epochs last)
+        """
+        if sort:
+            rows = sorted(rows, key=_sort_key, reverse=True)
+
+        intern = strings.intern
+        return cls(
+            array("q", [int(row[3]) if row[3] is not None else NO_EPOCH for row in rows]),
+            tuple(intern(row[1]) for row in rows),
+            tuple(intern(row[2]) for row in rows),
+            array("L", [row[4] or NO_HUB for row in rows]),
+            tuple(row[0] for row in rows)
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def epoch(self, index: int) -> Optional[int]:
+        epoch = self.epochs[index]
+        return epoch if epoch != NO_EPOCH else None
+
+    def location(self, index: int) -> str:
+        return self.locations[index]
+
+    def status(self, index: int) -> str:
+        return self.statuses[index]
+
+    def rows(self) -> Iterator[EventRow]:
+        """Yield (timestamp, location, status, epoch, hub id) rows, most recent first"""
+        for timestamp, epoch, location, status, hub_id in zip(
+            self.timestamps, self.epochs, self.locations, self.statuses, self.hub_ids
+        ):
+            yield (
+                timestamp,
+                location,
+                status,
+                epoch if epoch != NO_EPOCH else None,
+                hub_id if hub_id != NO_HUB else None
+            )
+
+    def to_dicts(self) -> List[dict]:
+        """Public TrackingEvent dicts, most recent first"""
+        return [
+            {"location": location, "status": status, "timestamp": timestamp, "epoch": epoch}
+            for timestamp, location, status, epoch, _ in self.rows()
+        ]
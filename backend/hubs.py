@@ -0,0 +1,141 @@
+"""
+Hub index for DakDash
+Resolves raw carrier office names to stable integer hub ids
+"""
+
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+
+
+# Hub id for events without an office name
+NO_HUB = 0
+
+# Abbreviations and spelling variants expanded during canonicalization
+TOKEN_EXPANSIONS: Dict[str, Tuple[str, ...]] = {
+    "CENTRE": ("CENTER",),
+    "CNTR": ("CENTER",),
+    "CTR": ("CENTER",),
+    "SC": ("SORTING", "CENTER"),
+    "SH": ("SORTING", "HUB"),
+    "NSH": ("NODAL", "SORTING", "HUB"),
+    "ICH": ("INTRA", "CIRCLE", "HUB"),
+    "TMO": ("TRANSIT", "MAIL", "OFFICE"),
+    "GPO": ("GENERAL", "POST", "OFFICE"),
+    "HPO": ("HEAD", "POST", "OFFICE"),
+    "HO": ("HEAD", "OFFICE"),
+    "SO": ("SUB", "OFFICE"),
+    "BO": ("BRANCH", "OFFICE"),
+    "PO": ("POST", "OFFICE"),
+    "DEPT": ("DEPARTMENT",),
+}
+
+_TOKEN = re.compile(r"[A-Z0-9]+")
+
+# (hub id, canonical key, display name) as persisted by the shipment store
+HubRow = Tuple[int, str, str]
+
+# (canonical key, raw office name) -> (hub id, display name), assigned by the shipment store
+HubAllocator = Callable[[str, str], Tuple[int, str]]
+
+
+def canonicalize(name: str) -> str:
+    """
+    Canonical key for an office name
+
+    Upper-cases, drops punctuation (dots are removed first so "S.C."
+    reads as "SC"), expands known abbreviations and joins the tokens
+    with single spaces. Runs in one pass over the name.
+    """
+    tokens = []
+    for token in _TOKEN.findall(name.upper().replace(".", "")):
+        expansion = TOKEN_EXPANSIONS.get(token)
+        if expansion:
+            tokens.extend(expansion)
+        else:
+            tokens.append(token)
+    return " ".join(tokens)
+
+
+class HubIndex:
+    """
+    Learned mapping of canonical office names to hub ids
+
+    "Delhi Sorting Center", "DELHI SORTING CENTRE" and "Delhi S.C."
+    share one canonical key and therefore one id. With the shipment
+    store attached, ids of unseen hubs are assigned by the database, so
+    every worker sharing it agrees on them and they survive restarts;
+    without it they are numbered locally.
+    """
+
+    def __init__(self, max_hubs: int):
+        self.max_hubs = max_hubs
+        self._ids: Dict[str, int] = {}
+        self._raw_ids: Dict[str, int] = {}  # exact spellings already resolved
+        self._names: Dict[int, str] = {}
+        self._allocate: Optional[HubAllocator] = None
+        self._lock = threading.Lock()
+
+    def load(self, rows: List[HubRow]) -> None:
+        """Restore persisted hubs (called on startup, before any lookups)"""
+        with self._lock:
+            for hub_id, key, name in rows:
+                self._names[hub_id] = name
+                self._ids[key] = hub_id
+
+    def attach(self, allocate: HubAllocator) -> None:
+        """Have the shipment store assign ids to new hubs (called on startup)"""
+        self._allocate = allocate
+
+    def resolve(self, office_name: str) -> int:
+        """
+        Hub id for a raw office name, learning it if new
+
+        Returns:
+            Hub id, or NO_HUB for an empty name or once max_hubs is reached
+        """
+        if not office_name:
+            return NO_HUB
+
+        hub_id = self._raw_ids.get(office_name)
+        if hub_id is not None:
+            return hub_id
+
+        key = canonicalize(office_name)
+        hub_id = self._ids.get(key)
+        if hub_id is not None:
+            if len(self._raw_ids) < self.max_hubs:
+                self._raw_ids[office_name] = hub_id
+            return hub_id
+        if not key or len(self._ids) >= self.max_hubs:
+            return NO_HUB
+
+        with self._lock:
+            hub_id = self._ids.get(key)
+            if hub_id is None:
+                name = office_name
+                if self._allocate is not None:
+                    try:
+                        hub_id, name = self._allocate(key, office_name)
+                    except Exception as e:
+                        print(f"Error assigning hub id: {str(e)}")
+                        return NO_HUB
+                else:
+                    hub_id = len(self._ids) + 1
+                self._names[hub_id] = name
+                self._ids[key] = hub_id
+            self._raw_ids[office_name] = hub_id
+        return hub_id
+
+    def name(self, hub_id: int) -> str:
+        """Display name (first spelling seen) for a hub id"""
+        return self._names.get(hub_id, "")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+# Global hub index
+hub_index = HubIndex(settings.HUB_INDEX_MAX_HUBS)
@@ -0,0 +1,163 @@
+"""
+Background tracking jobs for DakDash
+Lets slow first-time lookups finish outside the request that started them
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config import settings
+
+
+class Job:
+    """A single background lookup and its outcome"""
+
+    __slots__ = (
+        "id", "tracking_number", "carrier", "status", "result", "error",
+        "created_at", "finished_at", "task", "done_event"
+    )
+
+    def __init__(self, tracking_number: str, carrier: str):
+        self.id = uuid.uuid4().hex
+        self.tracking_number = tracking_number
+        self.carrier = carrier
+        self.status = "pending"
+        self.result: Optional[dict] = None
+        self.error: Optional[dict] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.done_event = asyncio.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "tracking_number": self.tracking_number,
+            "carrier": self.carrier,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobStore:
+    """
+    In-process registry of background lookup jobs
+
+    A pending job is reused for repeat requests of the same
+    (number, carrier). Finished jobs are kept for JOB_TTL seconds.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], Job] = {}
+
+    def submit(self, tracking_number: str, carrier: str, fn: Callable[[], Awaitable[dict]]) -> Job:
+        """
+        Start fn() in the background, or return the pending job for the same key
+
+        Args:
+            tracking_number: Tracking number being looked up
+            carrier: Normalized carrier code
+            fn: Zero-argument coroutine factory returning a response dict
+        """
+        key = (tracking_number.strip().upper(), carrier)
+        job = self._pending.get(key)
+        if job is not None:
+            return job
+
+        self._prune()
+
+        job = Job(tracking_number, carrier)
+        self._jobs[job.id] = job
+        self._pending[key] = job
+        job.task = asyncio.ensure_future(self._run(job, key, fn))
+        return job
+
+    def pending_job(self, tracking_number: str, carrier: str) -> Optional[Job]:
+        """Return the job still running for (number, carrier), if any"""
+        return self._pending.get((tracking_number.strip().upper(), carrier))
+
+    async def _run(self, job: Job, key: Tuple[str, str], fn: Callable[[], Awaitable[dict]]) -> None:
+        try:
+            job.result = await fn()
+            job.status = "done"
+        except HTTPException as e:
+            job.status = "error"
+            job.error = {"status_code": e.status_code, "message": str(e.detail)}
+        except asyncio.CancelledError:
+            job.status = "error"
+            job.error = {"status_code": 503, "message": "Job cancelled"}
+            raise
+        except Exception as e:
+            job.status = "error"
+            job.error = {"status_code": 500, "message": f"Internal server error: {str(e)}"}
+        finally:
+            job.finished_at = time.time()
+            if self._pending.get(key) is job:
+                del self._pending[key]
+            job.done_event.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id (None if unknown or expired)"""
+        job = self._jobs.get(job_id)
+        if job is not None and job.finished_at is not None and job.finished_at + self.ttl < time.time():
+            del self._jobs[job_id]
+            return None
+        return job
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        """Long-poll: wait up to timeout seconds for the job to finish"""
+        if timeout > 0 and not job.done_event.is_set():
+            try:
+                await asyncio.wait_for(job.done_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def _prune(self) -> None:
+        # Jobs are ordered by creation, and a job cannot expire before
+        # created_at + ttl, so the scan stops at the first young job
+        now = time.time()
+        expired = set()
+        for job_id, job in self._jobs.items():
+            if job.created_at + self.ttl >= now:
+                break
+            if job.finished_at is not None and job.finished_at + self.ttl < now:
+                expired.add(job_id)
+
+        overflow = len(self._jobs) - len(expired) - self.max_entries + 1
+        if overflow > 0:
+            for job_id, job in self._jobs.items():
+                if overflow <= 0:
+                    break
+                if job.finished_at is not None and job_id not in expired:
+                    expired.add(job_id)
+                    overflow -= 1
+
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def shutdown(self) -> None:
+        """Cancel jobs still running (called on application shutdown)"""
+        tasks = [job.task for job in self._pending.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "jobs": len(self._jobs),
+            "pending": len(self._pending)
+        }
+
+
+# Global job store
+job_store = JobStore(settings.JOB_TTL, settings.JOB_MAX_ENTRIES)
@@ -3,23 +3,78 @@ DakDash Backend - India Post Tracking API
 FastAPI application for tracking India Post consignments via TrackingMore API
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Header, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import time
 import httpx
 import os
 import json
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
-from models import TrackingResponse, TrackingEvent
+from models import (
+    TrackingResponse, TrackingEvent, BatchTrackingRequest, BatchTrackingResponse, JobResponse,
+    WatchRequest, WatchResponse
+)
 from config import settings
-from delay_detection import detect_delay, generate_smart_summary
+from delay_detection import detect_delay, generate_smart_summary, DELAY_THRESHOLDS
+from timeline import analyze_timeline
+import trackingmore
+from cache import tracking_cache, cache_key, ttl_for_status
+from singleflight import upstream_flights
+from jobs import job_store
+from webhooks import verify_signature, event_fingerprint, webhook_deduper
+from store import shipment_store
+from rate_limit import upstream_limiter, RateLimitExceeded, INTERACTIVE, BATCH, BACKGROUND
+from circuit_breaker import upstream_breaker, CircuitOpenError
+from carriers import CarrierServiceFactory
+from bulkhead import BulkheadTimeout
+from hubs import hub_index
+from congestion import hub_congestion
+from transit_stats import transit_stats, lane_key
+from eta import eta_index, region_of
+from watchlist import watchlist
+from subscriptions import subscriptions, Subscriber
+from pincodes import pincode_index
+from responses import ORJSONResponse, EncodedJSONResponse, dumps, fragment
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared upstream connection pool on startup, close it on shutdown"""
+    shipment_store.open()
+    hub_index.load(shipment_store.load_hubs())
+    if shipment_store.enabled:
+        hub_index.attach(shipment_store.hub_id)
+    hub_congestion.load(shipment_store.load_current_hops(time.time() - hub_congestion.max_dwell * 3600))
+    transit_stats.load(shipment_store.load_sketches())
+    eta_index.load(shipment_store.load_eta_sketches())
+    for tracking_number, carrier_code, fresh_until in shipment_store.load_watchlist():
+        watchlist.add((tracking_number, carrier_code), due=fresh_until)
+    pincode_index.open()
+    await trackingmore.start_client()
+    if settings.WATCH_SCHEDULER_ENABLED:
+        watchlist.start(refresh_watched, load_watched if shipment_store.enabled else None)
+    try:
+        yield
+    finally:
+        await watchlist.shutdown()
+        await job_store.shutdown()
+        await trackingmore.close_client()
+        shipment_store.save_sketches(transit_stats.take_unsaved())
+        shipment_store.close()
+        pincode_index.close()
+
 
 app = FastAPI(
     title="DakDash API",
     description="Track India Post consignments powered by TrackingMore",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS Configuration
@@ -42,6 +97,42 @@ async def root():
     }
 
 
+@app.get("/api/stats")
+async def get_stats():
+    """Runtime statistics (cache hit/miss counters)"""
+    return {
+        "cache": tracking_cache.stats(),
+        "single_flight": upstream_flights.stats(),
+        "registrations": len(trackingmore.registrations),
+        "hubs": len(hub_index),
+        "hub_congestion": hub_congestion.stats(),
+        "transit_stats": transit_stats.stats(),
+        "eta_index": len(eta_index),
+        "watchlist": watchlist.stats(),
+        "subscriptions": subscriptions.stats(),
+        "pincodes": pincode_index.stats(),
+        "jobs": job_store.stats(),
+        "store": await asyncio.to_thread(shipment_store.stats),
+        "rate_limit": upstream_limiter.stats(),
+        "circuit_breaker": upstream_breaker.stats(),
+        "carriers": CarrierServiceFactory.bulkhead_stats()
+    }
+
+
+@app.get("/api/hubs/congestion")
+async def get_hub_congestion(limit: int = 20):
+    """
+    Hubs ranked by current backlog, then median dwell
+    
+    Args:
+        limit: Number of hubs to return (max 200)
+        
+    Returns:
+        Hubs with backlog, median/oldest dwell hours and a congested flag
+    """
+    return {"hubs": hub_congestion.ranking(max(1, min(limit, 200)))}
+
+
 @app.get("/api/carriers")
 async def get_supported_carriers():
     """
@@ -50,14 +141,7 @@ async def get_supported_carriers():
     Returns:
         List of carrier objects with code and name
     """
-    carriers = [
-        {"code": "india-post", "name": "India Post", "icon": "🇮🇳"},
-        {"code": "delhivery", "name": "Delhivery", "icon": "📦"},
-        {"code": "bluedart", "name": "Blue Dart", "icon": "✈️"},
-        {"code": "dtdc", "name": "DTDC", "icon": "🚚"},
-        {"code": "ecom-express", "name": "Ecom Express", "icon": "🛒"},
-        {"code": "ekart", "name": "Ekart Logistics", "icon": "🎯"},
-    ]
+    carriers = CarrierServiceFactory.carrier_list()
     return {"carriers": carriers}
 
 
@@ -117,13 +201,15 @@ async def track_demo():
 
 
 @app.get("/api/track/{tracking_number}", response_model=TrackingResponse)
-async def track_consignment(tracking_number: str, carrier: str = "india-post"):
+async def track_consignment(tracking_number: str, carrier: str = "india-post", mode: str = "sync"):
     """
     Track consignment using TrackingMore API
     
     Args:
         tracking_number: Tracking/consignment number
         carrier: Carrier code (india-post, delhivery, bluedart, dtdc, ecom-express)
+        mode: "sync" (default) or "async" - in async mode a first-time
+              registration returns 202 with a job id instead of waiting
         
     Returns:
         Normalized tracking information with events timeline
@@ -136,100 +222,825 @@ async def track_consignment(tracking_number: str, carrier: str = "india-post"):
             detail="Invalid tracking number format"
         )
     
+    # Normalize carrier code
+    carrier_code = carrier.lower()
+    
+    if mode.lower() == "async":
+        job_response = await start_tracking_job(tracking_number, carrier_code)
+        if job_response is not None:
+            return job_response
+    
+    # Responses were validated when built; send the cached encoding as-is
+    response_dict = await load_tracking(tracking_number, carrier_code)
+    body = tracking_cache.encoded(cache_key(tracking_number, carrier_code), response_dict)
+    return EncodedJSONResponse(body)
+
+
+async def start_tracking_job(tracking_number: str, carrier_code: str) -> Optional[ORJSONResponse]:
+    """
+    Register a first-time number and hand the wait to a background job
+    
+    Returns:
+        202 response with the job id, or None when the lookup is cheap
+        enough to answer inline (cached, or already known upstream)
+    """
+    # load_tracking() does the counted lookup once this returns None
+    if tracking_cache.contains(cache_key(tracking_number, carrier_code)):
+        return None
+    
+    # Repeat requests while the first one is still running share its job
+    job = job_store.pending_job(tracking_number, carrier_code)
+    
+    if job is None:
+        if (tracking_number, carrier_code) in trackingmore.registrations:
+            return None
+        
+        # Concurrent first requests share one create call (and then one job);
+        # otherwise the losers get 4101 and wait inline
+        with upstream_errors():
+            already_registered = await upstream_flights.do(
+                ("create",) + cache_key(tracking_number, carrier_code),
+                lambda: trackingmore.register_tracking(tracking_number, carrier_code)
+            )
+        if already_registered:
+            return None
+        
+        # submit() hands back the job another waiter already started
+        job = job_store.submit(
+            tracking_number,
+            carrier_code,
+            lambda: load_tracking(tracking_number, carrier_code, newly_registered=True)
+        )
+    
+    job_url = f"/api/jobs/{job.id}"
+    
+    return ORJSONResponse(
+        status_code=202,
+        content={**job.to_dict(), "poll_url": job_url},
+        headers={"Location": job_url, "Retry-After": "1"}
+    )
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0):
+    """
+    Get the status of a background tracking job
+    
+    Args:
+        job_id: Job id returned by a mode=async lookup
+        wait: Seconds to long-poll for completion (capped at JOB_MAX_WAIT)
+        
+    Returns:
+        Job status with the normalized result once it is ready
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found or expired"
+        )
+    
+    job = await job_store.wait(job, min(max(wait, 0), settings.JOB_MAX_WAIT))
+    return ORJSONResponse(job.to_dict())
+
+
+async def load_tracking(tracking_number: str, carrier_code: str, newly_registered: bool = False) -> dict:
+    """
+    Get a normalized tracking response, locally when possible
+    
+    Lookups are served from the cache, then from a fresh snapshot in the
+    persistent store, and only then from TrackingMore. Concurrent misses
+    for the same (number, carrier) share a single fetch; its result or
+    error is handed to every waiter.
+    """
+    key = cache_key(tracking_number, carrier_code)
+    
+    # Serve repeat lookups from the cache
+    cached = tracking_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    async def fetch_and_cache() -> dict:
+        stored = await load_stored_snapshots([tracking_number], carrier_code)
+        if tracking_number in stored:
+            return stored[tracking_number]
+        
+        try:
+            response_dict = await fetch_tracking(tracking_number, carrier_code, newly_registered)
+        except HTTPException as e:
+            # Upstream unavailable: fall back to the last known snapshot
+            if e.status_code in STALE_FALLBACK_STATUSES:
+                stale = await load_stale_snapshots([tracking_number], carrier_code)
+                if tracking_number in stale:
+                    return stale[tracking_number]
+            raise
+        
+        await record_snapshot(tracking_number, carrier_code, response_dict)
+        return response_dict
+    
+    return await upstream_flights.do(key, fetch_and_cache)
+
+
+@app.post("/api/track/batch", response_model=BatchTrackingResponse)
+async def track_batch(request: BatchTrackingRequest):
+    """
+    Track many consignments of one carrier in a single request
+    
+    Numbers are chunked to the TrackingMore batch limit and the chunks
+    are fetched concurrently. Failures are reported per number.
+    
+    Args:
+        request: Tracking numbers and carrier code
+        
+    Returns:
+        Per-number results including partial failures
+    """
+    carrier_code = request.carrier.lower()
+    tracking_numbers = unique_tracking_numbers(request.tracking_numbers)
+    
+    if len(tracking_numbers) > settings.BATCH_MAX_NUMBERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many tracking numbers (max {settings.BATCH_MAX_NUMBERS})"
+        )
+    
+    results = await load_tracking_batch(tracking_numbers, carrier_code)
+    items = [batch_item(number, carrier_code, results[number]) for number in tracking_numbers]
+    succeeded = sum(1 for item in items if item["success"])
+    
+    return ORJSONResponse({
+        "carrier": carrier_code,
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "results": items
+    })
+
+
+@app.post("/api/track/batch/stream")
+async def track_batch_stream(request: BatchTrackingRequest, format: str = "ndjson"):
+    """
+    Stream batch results as each upstream chunk completes
+    
+    Args:
+        request: Tracking numbers and carrier code
+        format: "ndjson" (one BatchTrackingItem per line) or "sse"
+        
+    Returns:
+        StreamingResponse emitting items in completion order
+    """
+    stream_format = format.lower()
+    if stream_format not in ("ndjson", "sse"):
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported stream format. Use 'ndjson' or 'sse'."
+        )
+    
+    carrier_code = request.carrier.lower()
+    tracking_numbers = unique_tracking_numbers(request.tracking_numbers)
+    
+    # Results are not buffered, so the cap is far above the buffered endpoint's
+    if len(tracking_numbers) > settings.BATCH_STREAM_MAX_NUMBERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many tracking numbers (max {settings.BATCH_STREAM_MAX_NUMBERS})"
+        )
+    
+    async def ndjson_stream():
+        async for number, result in iter_tracking_batch(tracking_numbers, carrier_code):
+            yield dumps(batch_item(number, carrier_code, result)) + b"\n"
+    
+    async def sse_stream():
+        total = succeeded = 0
+        async for number, result in iter_tracking_batch(tracking_numbers, carrier_code):
+            item = batch_item(number, carrier_code, result)
+            total += 1
+            succeeded += item["success"]
+            yield b"event: item\ndata: " + dumps(item) + b"\n\n"
+        summary = {"total": total, "succeeded": succeeded, "failed": total - succeeded}
+        yield b"event: done\ndata: " + dumps(summary) + b"\n\n"
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if stream_format == "sse":
+        return StreamingResponse(sse_stream(), media_type="text/event-stream", headers=headers)
+    return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson", headers=headers)
+
+
+def unique_tracking_numbers(tracking_numbers: List[str]) -> List[str]:
+    """Strip and de-duplicate tracking numbers, keeping first-seen order"""
+    seen = set()
+    unique = []
+    for number in tracking_numbers:
+        number = number.strip()
+        key = number.upper()
+        if number and key not in seen:
+            seen.add(key)
+            unique.append(number)
+    return unique
+
+
+def batch_item(tracking_number: str, carrier_code: str, result: Any) -> dict:
+    """
+    Build a BatchTrackingItem dict from a response dict or HTTPException
+    
+    Successful results are embedded as pre-encoded JSON (the cached
+    encoding when there is one), so they are never serialized twice.
+    """
+    if isinstance(result, HTTPException):
+        return {
+            "tracking_number": tracking_number,
+            "success": False,
+            "result": None,
+            "error": {"status_code": result.status_code, "message": str(result.detail)}
+        }
+    
+    return {
+        "tracking_number": tracking_number,
+        "success": True,
+        "result": fragment(tracking_cache.encoded(cache_key(tracking_number, carrier_code), result)),
+        "error": None
+    }
+
+
+async def load_tracking_batch(tracking_numbers: List[str], carrier_code: str) -> Dict[str, Any]:
+    """
+    Resolve many numbers: cache hits first, then concurrent upstream chunks
+    
+    Returns:
+        Mapping of tracking number to response dict or HTTPException
+    """
+    results: Dict[str, Any] = {}
+    async for number, result in iter_tracking_batch(tracking_numbers, carrier_code):
+        results[number] = result
+    return results
+
+
+async def iter_tracking_batch(
+    tracking_numbers: Iterable[str],
+    carrier_code: str,
+    priority: int = BATCH
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Yield (tracking number, response dict or HTTPException) in completion order
+    
+    Invalid numbers and cache hits are yielded immediately. Misses are
+    grouped into upstream-sized chunks, with at most BATCH_CONCURRENCY
+    chunks in flight, so memory stays bounded by the window rather
+    than by the input size. Pending chunks are cancelled if the
+    consumer stops early (e.g. a streaming client disconnects).
+    """
+    chunk_size = max(1, min(settings.BATCH_CHUNK_SIZE, trackingmore.MAX_BATCH_SIZE))
+    max_in_flight = max(1, settings.BATCH_CONCURRENCY)
+    pending = set()
+    chunk: List[str] = []
+    
+    async def drain(until: int) -> AsyncIterator[Tuple[str, Any]]:
+        # Wait for chunks to finish until at most `until` remain in flight
+        while len(pending) > until:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                for number, result in task.result().items():
+                    yield number, result
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            headers = {
-                "Tracking-Api-Key": settings.TRACKINGMORE_API_KEY,
-                "Content-Type": "application/json"
-            }
+        for number in tracking_numbers:
+            if len(number) < 8:
+                yield number, HTTPException(status_code=400, detail="Invalid tracking number format")
+                continue
             
-            # Normalize carrier code
-            carrier_code = carrier.lower()
+            cached = tracking_cache.peek(cache_key(number, carrier_code))
+            if cached is not None:
+                yield number, cached
+                continue
             
-            # Step 1: Create/Register the tracking number (if not exists)
-            create_url = "https://api.trackingmore.com/v4/trackings/create"
-            create_payload = {
-                "tracking_number": tracking_number,
-                "courier_code": carrier_code
-            }
-            
-            # Try to create the tracking (ignore if already exists)
-            create_response = await client.post(create_url, json=create_payload, headers=headers)
-            
-            # Step 2: Get the tracking information
-            # Wait a moment for the tracking to be processed
-            import asyncio
-            await asyncio.sleep(2)
-            
-            # Use GET endpoint with query parameters
-            get_url = "https://api.trackingmore.com/v4/trackings/get"
-            get_params = {
-                "tracking_numbers": tracking_number,
-                "courier_code": carrier_code
+            chunk.append(number)
+            if len(chunk) >= chunk_size:
+                async for item in drain(max_in_flight - 1):
+                    yield item
+                pending.add(asyncio.ensure_future(load_tracking_chunk(chunk, carrier_code, priority)))
+                chunk = []
+        
+        if chunk:
+            async for item in drain(max_in_flight - 1):
+                yield item
+            pending.add(asyncio.ensure_future(load_tracking_chunk(chunk, carrier_code, priority)))
+        
+        async for item in drain(0):
+            yield item
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def load_tracking_chunk(tracking_numbers: List[str], carrier_code: str, priority: int = BATCH) -> Dict[str, Any]:
+    """
+    Resolve one chunk of cache misses: fresh stored snapshots first, then upstream
+    
+    Returns:
+        Mapping of tracking number to response dict or HTTPException
+    """
+    results: Dict[str, Any] = await load_stored_snapshots(tracking_numbers, carrier_code)
+    misses = [number for number in tracking_numbers if number not in results]
+    
+    if misses:
+        unavailable = []
+        for number, result in (await fetch_tracking_chunk(misses, carrier_code, priority)).items():
+            if not isinstance(result, HTTPException):
+                await record_snapshot(number, carrier_code, result)
+            elif result.status_code in STALE_FALLBACK_STATUSES:
+                unavailable.append(number)
+            results[number] = result
+        
+        if unavailable:
+            results.update(await load_stale_snapshots(unavailable, carrier_code))
+    
+    return results
+
+
+async def load_stored_snapshots(tracking_numbers: List[str], carrier_code: str) -> Dict[str, dict]:
+    """
+    Load fresh snapshots from the persistent store and warm the cache with them
+    
+    Returns:
+        Mapping of tracking number to response dict (fresh hits only)
+    """
+    if not shipment_store.enabled:
+        return {}
+    
+    keys = {cache_key(number, carrier_code): number for number in tracking_numbers}
+    
+    try:
+        snapshots = await asyncio.to_thread(shipment_store.load_snapshots, list(keys))
+    except Exception as e:
+        print(f"Error reading shipment store: {str(e)}")
+        return {}
+    
+    now = time.time()
+    results = {}
+    for key, snapshot in snapshots.items():
+        response_dict = snapshot["response"]
+        tracking_cache.set(
+            key,
+            response_dict,
+            response_dict["status"],
+            ttl=snapshot["fresh_until"] - now,
+            fetched_at=snapshot["fetched_at"]
+        )
+        results[keys[key]] = response_dict
+    
+    return results
+
+
+async def load_stale_snapshots(tracking_numbers: List[str], carrier_code: str) -> Dict[str, dict]:
+    """
+    Last known snapshots regardless of freshness, marked stale with their age
+    
+    Used while TrackingMore is unavailable (circuit open, timeouts, rate
+    limited). Checks the cache first, then the persistent store.
+    
+    Returns:
+        Mapping of tracking number to stale response dict
+    """
+    now = time.time()
+    results = {}
+    missing = []
+    
+    for number in tracking_numbers:
+        entry = tracking_cache.get_stale(cache_key(number, carrier_code))
+        if entry is None:
+            missing.append(number)
+            continue
+        response_dict, fetched_at = entry
+        results[number] = {**response_dict, "stale": True, "stale_age_seconds": int(now - fetched_at)}
+    
+    if missing and shipment_store.enabled:
+        keys = {cache_key(number, carrier_code): number for number in missing}
+        try:
+            snapshots = await asyncio.to_thread(shipment_store.load_snapshots, list(keys), True)
+        except Exception as e:
+            print(f"Error reading shipment store: {str(e)}")
+            snapshots = {}
+        
+        for key, snapshot in snapshots.items():
+            results[keys[key]] = {
+                **snapshot["response"],
+                "stale": True,
+                "stale_age_seconds": int(now - snapshot["fetched_at"])
             }
+    
+    return results
+
+
+async def record_snapshot(tracking_number: str, carrier_code: str, response_dict: dict, min_ttl: float = 0) -> None:
+    """Store a freshly normalized snapshot wherever lookups are served from"""
+    key = cache_key(tracking_number, carrier_code)
+    
+    # Watched shipments stay fresh until their next background refresh
+    if key in watchlist:
+        min_ttl = max(min_ttl, watchlist.reschedule(key, response_dict))
+        if key not in watchlist and shipment_store.enabled:
+            # Reached a final status
+            try:
+                await asyncio.to_thread(shipment_store.delete_watch, [key])
+            except Exception as e:
+                print(f"Error writing shipment store: {str(e)}")
+    
+    # Latest scan already seen for this shipment, so transit stats only take new hops
+    previous = tracking_cache.get_stale(key)
+    since = (previous[0].get("timeline") or {}).get("last_scan_epoch") if previous else None
+    
+    tracking_cache.set(key, response_dict, response_dict["status"], min_ttl=min_ttl)
+    subscriptions.publish(key, previous[0] if previous else None, response_dict)
+    
+    if shipment_store.enabled:
+        fresh_for = max(ttl_for_status(response_dict["status"]), min_ttl)
+        try:
+            # The store remembers events across restarts and cache evictions
+            since = await asyncio.to_thread(shipment_store.save_snapshot, key, response_dict, fresh_for)
+        except Exception as e:
+            print(f"Error writing shipment store: {str(e)}")
+    
+    if response_dict.get("timeline"):
+        transit_stats.ingest(
+            response_dict["timeline"],
+            carrier_code,
+            lane_key(response_dict.get("origin_place"), response_dict.get("destination_place")),
+            since
+        )
+    
+    if shipment_store.enabled and transit_stats.save_due():
+        sketches = transit_stats.take_unsaved()
+        try:
+            await asyncio.to_thread(shipment_store.save_sketches, sketches)
+        except Exception as e:
+            transit_stats.requeue(sketches)
+            print(f"Error writing transit stats: {str(e)}")
+
+
+@app.post("/api/watch", response_model=WatchResponse)
+async def watch_shipments(request: WatchRequest):
+    """
+    Keep shipments refreshed in the background
+    
+    Watched shipments are refreshed on their own schedule (hourly near
+    delivery, less often in transit or while pending, never after
+    delivery), so lookups for them are answered from fresh local state.
+    
+    Args:
+        request: Tracking numbers and carrier code
+        
+    Returns:
+        Watched numbers with their next scheduled refresh
+    """
+    carrier_code = request.carrier.lower()
+    tracking_numbers = unique_tracking_numbers(request.tracking_numbers)
+    
+    if len(tracking_numbers) > settings.BATCH_MAX_NUMBERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many tracking numbers (max {settings.BATCH_MAX_NUMBERS})"
+        )
+    
+    invalid = [number for number in tracking_numbers if len(number) < 8]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid tracking number format: {', '.join(invalid)}"
+        )
+    
+    keys = [cache_key(number, carrier_code) for number in tracking_numbers]
+    new_keys = [key for key in keys if key not in watchlist]
+    if len(watchlist) + len(new_keys) > watchlist.max_entries:
+        raise HTTPException(
+            status_code=503,
+            detail="Watchlist is full"
+        )
+    
+    # Persisted first, so the scheduler's re-read never drops them
+    if new_keys and shipment_store.enabled:
+        try:
+            await asyncio.to_thread(shipment_store.save_watch, new_keys)
+        except Exception as e:
+            print(f"Error writing shipment store: {str(e)}")
+    
+    for key in new_keys:
+        watchlist.add(key)
+    
+    watching = []
+    for number, key in zip(tracking_numbers, keys):
+        # None if the list filled up meanwhile
+        due = watchlist.next_due(key)
+        watching.append({"tracking_number": number, "next_refresh_epoch": int(due) if due is not None else None})
+    
+    return ORJSONResponse({
+        "carrier": carrier_code,
+        "watching": watching,
+        "total_watched": len(watchlist)
+    })
+
+
+@app.delete("/api/watch/{tracking_number}")
+async def unwatch_shipment(tracking_number: str, carrier: str = "india-post"):
+    """
+    Stop refreshing a watched shipment
+    
+    Args:
+        tracking_number: Tracking/consignment number
+        carrier: Carrier code
+    """
+    key = cache_key(tracking_number, carrier)
+    removed = False
+    
+    # The watch may have been added through another worker
+    if shipment_store.enabled:
+        try:
+            removed = await asyncio.to_thread(shipment_store.delete_watch, [key]) > 0
+        except Exception as e:
+            print(f"Error writing shipment store: {str(e)}")
+    
+    removed = watchlist.remove(key) or removed
+    if not removed:
+        raise HTTPException(
+            status_code=404,
+            detail="Shipment is not on the watchlist"
+        )
+    
+    return {"tracking_number": key[0], "carrier": key[1], "watching": False}
+
+
+async def load_watched() -> List[Tuple[str, str, Optional[float]]]:
+    """Persisted watchlist rows, shared by every worker (re-read by the scheduler)"""
+    return await asyncio.to_thread(shipment_store.load_watchlist)
+
+
+async def refresh_watched(carrier_code: str, tracking_numbers: List[str]) -> None:
+    """
+    Refresh one chunk of watched shipments (called by the watchlist scheduler)
+    
+    Uses one multi-number upstream call at BACKGROUND priority; successful
+    snapshots are recorded, which also schedules each shipment's next refresh.
+    """
+    results = await fetch_tracking_chunk(tracking_numbers, carrier_code, BACKGROUND)
+    for number, result in results.items():
+        if not isinstance(result, HTTPException):
+            await record_snapshot(number, carrier_code, result)
+        elif result.status_code == 404:
+            # Not picked up by the carrier yet
+            watchlist.defer(cache_key(number, carrier_code), settings.WATCH_INTERVAL_PENDING)
+
+
+def subscription_keys(tracking_numbers: List[str], carrier_code: str) -> List[Tuple[str, str]]:
+    """Validated cache keys for a subscription request"""
+    tracking_numbers = unique_tracking_numbers(tracking_numbers)
+    
+    if len(tracking_numbers) > settings.SUBSCRIBE_MAX_NUMBERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many tracking numbers (max {settings.SUBSCRIBE_MAX_NUMBERS})"
+        )
+    
+    invalid = [number for number in tracking_numbers if len(number) < 8]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid tracking number format: {', '.join(invalid)}"
+        )
+    
+    return [cache_key(number, carrier_code) for number in tracking_numbers]
+
+
+def send_last_known(subscriber: Subscriber, keys: List[Tuple[str, str]]) -> None:
+    """Queue the last known state of newly subscribed shipments that are cached"""
+    for key in keys:
+        cached = tracking_cache.get_stale(key)
+        if cached is not None:
+            subscriptions.send_current(subscriber, key, cached[0])
+
+
+@app.websocket("/api/subscribe")
+async def subscribe_websocket(websocket: WebSocket):
+    """
+    Live shipment updates over one WebSocket
+    
+    Client messages:
+        {"action": "subscribe" | "unsubscribe", "tracking_numbers": [...], "carrier": "india-post"}
+    
+    Server messages:
+        {"type": "subscribed" | "unsubscribed", "carrier", "tracking_numbers", "total"}
+        {"type": "update", "tracking_number", "carrier", "changes": {...}}
+        {"type": "error", "message"}
+    
+    Updates carry only the summary fields that changed since the previous
+    snapshot; the first one after subscribing carries all of them, if the
+    shipment has been looked up before.
+    """
+    if not subscriptions.connect():
+        # 1013: try again later
+        await websocket.close(code=1013)
+        return
+    
+    subscriber = Subscriber()
+    
+    async def receive_commands():
+        while True:
+            try:
+                message = await websocket.receive_json()
+                action = message.get("action")
+                carrier_code = str(message.get("carrier", "india-post")).lower()
+                keys = subscription_keys([str(number) for number in message.get("tracking_numbers", [])], carrier_code)
+            except HTTPException as e:
+                subscriber.reply({"type": "error", "message": e.detail})
+                continue
+            except (ValueError, TypeError, AttributeError):
+                subscriber.reply({"type": "error", "message": "Expected a JSON object with action and tracking_numbers"})
+                continue
             
-            response = await client.get(get_url, params=get_params, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Check if tracking data exists
-                if data.get("meta", {}).get("code") == 200 and data.get("data"):
-                    tracking_list = data.get("data", [])
-                    
-                    if tracking_list and len(tracking_list) > 0:
-                        tracking_data = tracking_list[0]
-                        
-                        # Normalize response
-                        normalized_response = normalize_tracking_data(
-                            tracking_number,
-                            tracking_data
-                        )
-                        
-                        # Add delay detection
-                        delay_info = detect_delay(tracking_data, normalized_response.events)
-                        smart_summary = generate_smart_summary(
-                            tracking_data, 
-                            [e.dict() for e in normalized_response.events],
-                            delay_info
-                        )
-                        
-                        # Add to response as additional fields
-                        response_dict = normalized_response.dict()
-                        response_dict["delay_info"] = delay_info
-                        response_dict["smart_summary"] = smart_summary
-                        
-                        return response_dict
-                    else:
-                        raise HTTPException(
-                            status_code=404,
-                            detail="No tracking data available yet. The carrier may still be processing this shipment."
-                        )
-                else:
-                    error_msg = data.get("meta", {}).get("message", "Unknown error")
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Tracking information not found: {error_msg}"
-                    )
-            
-            elif response.status_code == 401:
-                raise HTTPException(
-                    status_code=500,
-                    detail="API authentication failed"
-                )
-            
-            elif response.status_code == 404:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Tracking number not found"
-                )
-            
+            if action == "subscribe":
+                added = subscriptions.subscribe(subscriber, keys)
+                subscriber.reply({
+                    "type": "subscribed",
+                    "carrier": carrier_code,
+                    "tracking_numbers": [key[0] for key in added],
+                    "total": len(subscriber.keys)
+                })
+                send_last_known(subscriber, added)
+            elif action == "unsubscribe":
+                subscriptions.unsubscribe(subscriber, keys)
+                subscriber.reply({
+                    "type": "unsubscribed",
+                    "carrier": carrier_code,
+                    "tracking_numbers": [key[0] for key in keys],
+                    "total": len(subscriber.keys)
+                })
             else:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"External API error: {response.text}"
-                )
-                
+                subscriber.reply({"type": "error", "message": "Unknown action. Use 'subscribe' or 'unsubscribe'."})
+    
+    async def send_messages():
+        # The only writer on this socket, so replies and updates never interleave
+        while True:
+            for payload in await subscriber.wait():
+                await websocket.send_text(payload.decode())
+    
+    tasks: List[asyncio.Task] = []
+    try:
+        await websocket.accept()
+        tasks = [asyncio.ensure_future(receive_commands()), asyncio.ensure_future(send_messages())]
+        # Either side ending (client gone, send failed) ends the connection
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                print(f"Error in live update connection: {error}")
+                await close_quietly(websocket, code=1011)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscriptions.disconnect(subscriber)
+
+
+async def close_quietly(websocket: WebSocket, code: int) -> None:
+    """Close a WebSocket that may already be broken"""
+    try:
+        await websocket.close(code=code)
+    except Exception:
+        pass
+
+
+@app.get("/api/subscribe")
+async def subscribe_sse(tracking_numbers: str, carrier: str = "india-post"):
+    """
+    Live shipment updates as Server-Sent Events (fallback for clients without WebSocket)
+    
+    Args:
+        tracking_numbers: Comma-separated tracking numbers
+        carrier: Carrier code
+        
+    Returns:
+        text/event-stream of `update` events, same payload as the WebSocket
+    """
+    carrier_code = carrier.lower()
+    keys = subscription_keys(tracking_numbers.split(","), carrier_code)
+    if subscriptions.full():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many live connections, try again later"
+        )
+    
+    async def sse_stream():
+        if not subscriptions.connect():
+            return
+        subscriber = Subscriber()
+        try:
+            send_last_known(subscriber, subscriptions.subscribe(subscriber, keys))
+            while True:
+                payloads = await subscriber.wait(settings.SUBSCRIBE_KEEPALIVE)
+                if not payloads:
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"".join(b"event: update\ndata: " + payload + b"\n\n" for payload in payloads)
+        finally:
+            subscriptions.disconnect(subscriber)
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(sse_stream(), media_type="text/event-stream", headers=headers)
+
+
+@app.post("/api/webhooks/trackingmore")
+async def trackingmore_webhook(
+    request: Request,
+    timestamp: Optional[str] = Header(default=None),
+    signature: Optional[str] = Header(default=None)
+):
+    """
+    Receive pushed tracking updates from TrackingMore
+    
+    Verifies the signature, normalizes each tracking with the same
+    pipeline as lookups and refreshes the cached snapshot, so later
+    user lookups need no upstream call. Re-deliveries of an already
+    applied snapshot are acknowledged without being processed again.
+    
+    Returns:
+        Counts of received, applied and duplicate trackings
+    """
+    if not verify_signature(timestamp, signature):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid webhook signature"
+        )
+    
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid webhook payload"
+        )
+    
+    data = payload.get("data") if isinstance(payload, dict) else None
+    trackings = data if isinstance(data, list) else [data] if isinstance(data, dict) else []
+    
+    applied = duplicates = 0
+    for tracking_data in trackings:
+        tracking_number = str(tracking_data.get("tracking_number") or "").strip()
+        carrier_code = str(tracking_data.get("courier_code") or "").lower()
+        if not tracking_number or not carrier_code:
+            continue
+        
+        key = cache_key(tracking_number, carrier_code)
+        if webhook_deduper.is_duplicate(key, event_fingerprint(tracking_data)):
+            duplicates += 1
+            continue
+        
+        try:
+            with upstream_errors():
+                response_dict = build_tracking_response(tracking_number, tracking_data, carrier_code)
+        except HTTPException:
+            # Let a later re-delivery retry this snapshot
+            webhook_deduper.forget(key)
+            continue
+        
+        trackingmore.registrations.add(tracking_number, carrier_code)
+        await record_snapshot(tracking_number, carrier_code, response_dict, min_ttl=settings.WEBHOOK_SNAPSHOT_TTL)
+        applied += 1
+    
+    return {
+        "received": len(trackings),
+        "applied": applied,
+        "duplicates": duplicates
+    }
+
+
+# Upstream failures that are answered with the last known snapshot when one exists
+STALE_FALLBACK_STATUSES = {429, 502, 503, 504}
+
+
+@contextmanager
+def upstream_errors():
+    """Translate upstream client failures into HTTPExceptions"""
+    try:
+        yield
+        
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=503,
+            detail="Tracking service is temporarily unavailable. Please try again shortly."
+        )
+    
+    except BulkheadTimeout:
+        raise HTTPException(
+            status_code=504,
+            detail="This carrier's tracking is responding slowly. Please try again shortly."
+        )
+    
+    except RateLimitExceeded:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many tracking requests right now. Please try again shortly."
+        )
+    
     except httpx.TimeoutException:
         raise HTTPException(
             status_code=504,
@@ -253,145 +1064,260 @@ async def track_consignment(tracking_number: str, carrier: str = "india-post"):
         )
 
 
-def normalize_tracking_data(tracking_number: str, data: dict) -> TrackingResponse:
+def parse_trackings_response(response: httpx.Response) -> list:
     """
-    Normalize TrackingMore API response into clean frontend-friendly schema
+    Extract the tracking list from a TrackingMore /trackings/get response
+    
+    Returns:
+        List of raw tracking dicts (may be empty)
+        
+    Raises:
+        HTTPException: If the upstream call failed
+    """
+    if response.status_code == 200:
+        data = response.json()
+        
+        # Check if tracking data exists
+        if data.get("meta", {}).get("code") == 200:
+            return data.get("data") or []
+        
+        error_msg = data.get("meta", {}).get("message", "Unknown error")
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tracking information not found: {error_msg}"
+        )
+    
+    elif response.status_code == 401:
+        raise HTTPException(
+            status_code=500,
+            detail="API authentication failed"
+        )
+    
+    elif response.status_code == 404:
+        raise HTTPException(
+            status_code=404,
+            detail="Tracking number not found"
+        )
+    
+    elif response.status_code == 429:
+        raise HTTPException(
+            status_code=429,
+            detail="Tracking service is busy. Please try again shortly."
+        )
+    
+    else:
+        raise HTTPException(
+            # Upstream server errors are reported as a bad gateway
+            status_code=502 if response.status_code >= 500 else response.status_code,
+            detail=f"External API error: {response.text}"
+        )
+
+
+def build_tracking_response(tracking_number: str, tracking_data: dict, carrier_code: str) -> dict:
+    """
+    Normalize raw tracking data and attach delay detection and summary
+    
+    Returns:
+        Response dict matching TrackingResponse
+    """
+    # Normalize response
+    response_dict = normalize_tracking_data(
+        tracking_number,
+        tracking_data,
+        carrier_code
+    )
+    
+    # Analyze the timeline once; delay detection and the summary both read it
+    timeline = analyze_timeline(response_dict["events"])
+    hub_congestion.observe(
+        cache_key(tracking_number, carrier_code),
+        timeline,
+        delivered=tracking_data.get("delivery_status", "").lower() == "delivered"
+    )
+    thresholds = transit_stats.thresholds(
+        timeline,
+        carrier_code,
+        lane_key(response_dict["origin_place"], response_dict["destination_place"]),
+        DELAY_THRESHOLDS
+    )
+    delay_info = detect_delay(tracking_data, timeline, thresholds=thresholds)
+    delay_info["thresholds"] = thresholds
+    
+    eta = None
+    if tracking_data.get("delivery_status", "").lower() != "delivered":
+        eta = eta_index.predict(timeline, carrier_code, region_of(response_dict["destination_place"]))
+    smart_summary = generate_smart_summary(tracking_data, response_dict["events"], delay_info, timeline, eta)
+    
+    # Add to response as additional fields
+    response_dict["timeline"] = timeline
+    response_dict["eta"] = eta
+    response_dict["delay_info"] = delay_info
+    response_dict["smart_summary"] = smart_summary
+    response_dict["stale"] = False
+    response_dict["stale_age_seconds"] = None
+    
+    # Validate the finished response once; it is cached and served as plain JSON
+    TrackingResponse.model_validate(response_dict)
+    
+    return response_dict
+
+
+async def fetch_tracking(tracking_number: str, carrier_code: str, newly_registered: bool = False) -> dict:
+    """
+    Fetch and normalize a single consignment from TrackingMore
     
     Args:
-        tracking_number: Tracking number
-        data: Raw API response data
+        tracking_number: Tracking/consignment number
+        carrier_code: Normalized carrier code
+        newly_registered: The number was just created upstream, so poll for its data
         
     Returns:
-        Normalized TrackingResponse object
+        Response dict matching TrackingResponse
+        
+    Raises:
+        HTTPException: On upstream or lookup errors
     """
+    new_numbers = [tracking_number] if newly_registered else []
     
-    # Extract tracking events from origin_info.trackinfo
-    events = []
-    origin_info = data.get("origin_info", {})
+    with upstream_errors():
+        # Step 1: Create/Register the tracking number unless TrackingMore already has it
+        if not newly_registered and (tracking_number, carrier_code) not in trackingmore.registrations:
+            if not await trackingmore.register_tracking(tracking_number, carrier_code):
+                new_numbers.append(tracking_number)
+        
+        # Step 2: Get the tracking information (polling briefly if newly registered)
+        by_number = await get_trackings_when_ready([tracking_number], carrier_code, new_numbers)
+        tracking_data = by_number.get(tracking_number.strip().upper())
+        
+        if tracking_data is None:
+            # Forget the registration so the next lookup creates it again
+            trackingmore.registrations.discard(tracking_number, carrier_code)
+            raise HTTPException(
+                status_code=404,
+                detail="No tracking data available yet. The carrier may still be processing this shipment."
+            )
+        
+        return build_tracking_response(tracking_number, tracking_data, carrier_code)
+
+
+def tracking_ready(tracking_data: dict) -> bool:
+    """True once TrackingMore has checkpoints or a definite status for a number"""
+    origin_info = tracking_data.get("origin_info") or {}
+    if origin_info.get("trackinfo"):
+        return True
+    return (tracking_data.get("delivery_status") or "").lower() not in ("", "pending")
+
+
+async def get_trackings_when_ready(
+    tracking_numbers: List[str],
+    carrier_code: str,
+    new_numbers: List[str],
+    priority: int = INTERACTIVE
+) -> Dict[str, dict]:
+    """
+    Get tracking data, polling with exponential backoff for new registrations
+    
+    Numbers that were already registered are answered by the first get.
+    Newly created ones are re-polled (alone) until they have data or
+    REGISTRATION_POLL_TIMEOUT passes; whatever was last seen is returned.
+    
+    Returns:
+        Mapping of upper-cased tracking number to raw tracking data
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.REGISTRATION_POLL_TIMEOUT
+    delay = settings.REGISTRATION_POLL_INITIAL_DELAY
+    waiting = {number.strip().upper() for number in new_numbers}
+    by_number: Dict[str, dict] = {}
+    
+    if waiting:
+        # Give TrackingMore a moment to pick up the new registrations
+        await asyncio.sleep(delay)
+    
+    while True:
+        response = await trackingmore.get_trackings(tracking_numbers, carrier_code, priority)
+        
+        for tracking_data in parse_trackings_response(response):
+            number = str(tracking_data.get("tracking_number", "")).strip().upper()
+            by_number[number] = tracking_data
+            trackingmore.registrations.add(number, carrier_code)
+            if tracking_ready(tracking_data):
+                waiting.discard(number)
+        
+        delay = min(delay * 2, settings.REGISTRATION_POLL_MAX_DELAY)
+        if not waiting or loop.time() + delay > deadline:
+            return by_number
+        
+        await asyncio.sleep(delay)
+        tracking_numbers = sorted(waiting)
+
+
+async def fetch_tracking_chunk(tracking_numbers: List[str], carrier_code: str, priority: int = BATCH) -> Dict[str, Any]:
+    """
+    Fetch and normalize one upstream-sized chunk of consignments
+    
+    Uses the TrackingMore batch create and multi-number get endpoints,
+    so a chunk costs at most one create plus the get polls regardless of
+    its size. Numbers already registered skip the create entirely.
+    
+    Returns:
+        Mapping of tracking number to response dict or HTTPException
+    """
+    new_numbers = [
+        number for number in tracking_numbers
+        if (number, carrier_code) not in trackingmore.registrations
+    ]
     
-    if origin_info and origin_info.get("trackinfo"):
-        for event in origin_info["trackinfo"]:
-            # Extract event details
-            detail = event.get("tracking_detail", "") or event.get("Details", "")
-            checkpoint = event.get("checkpoint_status", "") or event.get("StatusDescription", "")
-            date = event.get("checkpoint_date", "") or event.get("Date", "")
-            
-            # Get the actual location (office name) - THIS IS THE KEY FIELD!
-            office_location = event.get("location", "")
-            
-            # Build comprehensive location string
-            # Priority: Use "location" field (office name) + "tracking_detail" (status description)
-            if office_location and detail:
-                # Combine office location with status detail
-                location = f"{office_location} - {detail}"
-            elif office_location:
-                # Just office location if no detail
-                location = office_location
-            elif detail:
-                # Fallback to just detail if no office location
-                location = detail
-            else:
-                location = "Unknown location"
-            
-            if location or checkpoint:  # Only add if we have some data
-                events.append(TrackingEvent(
-                    location=location,
-                    status=checkpoint,
-                    timestamp=date
-                ))
-    
-    # Sort events by timestamp (most recent first)
     try:
-        events.sort(
-            key=lambda x: datetime.fromisoformat(x.timestamp.replace("Z", "+00:00")) if x.timestamp else datetime.min,
-            reverse=True
-        )
-    except:
-        # If sorting fails, keep original order
-        pass
+        with upstream_errors():
+            if new_numbers:
+                await trackingmore.batch_create(new_numbers, carrier_code, priority)
+            by_number = await get_trackings_when_ready(tracking_numbers, carrier_code, new_numbers, priority)
+    except HTTPException as e:
+        # Whole-chunk failure: every number in it gets the same error
+        return {number: e for number in tracking_numbers}
     
-    # Determine overall status
-    status = data.get("delivery_status", "") or data.get("substatus", "unknown")
-    
-    # Map status to friendly names
-    status_map = {
-        "delivered": "Delivered",
-        "transit": "In Transit",
-        "pickup": "Ready for Pickup",
-        "exception": "Exception",
-        "expired": "Expired",
-        "pending": "Pending",
-        "notfound": "Not Found",
-        "infotreceived": "Info Received",
-        "inforeceived": "Info Received"
-    }
+    results: Dict[str, Any] = {}
+    for number in tracking_numbers:
+        tracking_data = by_number.get(number.upper())
+        
+        if tracking_data is None:
+            trackingmore.registrations.discard(number, carrier_code)
+            results[number] = HTTPException(
+                status_code=404,
+                detail="No tracking data available yet. The carrier may still be processing this shipment."
+            )
+            continue
+        
+        try:
+            with upstream_errors():
+                results[number] = build_tracking_response(number, tracking_data, carrier_code)
+        except HTTPException as e:
+            results[number] = e
     
-    friendly_status = status_map.get(status.lower(), status.title() if status else "Unknown")
-    
-    # Extract origin and destination with better location parsing
-    origin = ""
-    destination = ""
-    
-    # Get origin from multiple sources
-    origin_info_data = data.get("origin_info", {})
-    if origin_info_data:
-        # Try country_name + postal_code
-        origin_country = origin_info_data.get("country_name", "")
-        origin_postal = origin_info_data.get("postal_code", "")
-        if origin_postal:
-            origin = f"{origin_postal}, {origin_country}" if origin_country else origin_postal
-        elif origin_country:
-            origin = origin_country
-    
-    # If no origin yet, try first event (oldest event is at the end after sort)
-    if not origin and events:
-        origin = events[-1].location
-    
-    # Get destination from multiple sources
-    destination_info_data = data.get("destination_info", {})
-    if destination_info_data:
-        # Try structured address fields first
-        recipient_city = destination_info_data.get("recipient_city", "")
-        recipient_state = destination_info_data.get("recipient_state", "")
-        recipient_postal = destination_info_data.get("recipient_postal", "")
-        recipient_address = destination_info_data.get("recipient_address", "")
-        
-        # Build destination from available parts
-        dest_parts = []
-        if recipient_city:
-            dest_parts.append(recipient_city)
-        if recipient_state and recipient_state != recipient_city:
-            dest_parts.append(recipient_state)
-        if recipient_postal:
-            dest_parts.append(recipient_postal)
-        
-        if dest_parts:
-            destination = ", ".join(dest_parts)
-        elif recipient_address:
-            destination = recipient_address
-    
-    # If no destination yet and package is delivered, use last event location
-    if not destination and events and friendly_status.lower() == "delivered":
-        destination = events[0].location  # First in sorted list (most recent)
-    
-    # Last updated timestamp
-    last_updated = data.get("update_date", "") or data.get("updated_at", "")
-    
-    return TrackingResponse(
-        tracking_number=tracking_number,
-        carrier="India Post",
-        status=friendly_status,
-        origin=origin,
-        destination=destination,
-        last_updated=last_updated,
-        events=events
-    )
+    return results
+
+
+def normalize_tracking_data(tracking_number: str, data: dict, carrier_code: str = "india-post") -> dict:
+    """
+    Normalize TrackingMore API response into clean frontend-friendly schema
+    
+    Args:
+        tracking_number: Tracking number
+        data: Raw API response data
+        carrier_code: Carrier code selecting the field-mapping spec
+        
+    Returns:
+        Dict matching TrackingResponse (before delay detection and summary)
+    """
+    normalizer = CarrierServiceFactory.get_normalizer(carrier_code)
+    return normalizer(tracking_number, data)
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom exception handler for better error responses"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": True,
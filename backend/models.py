@@ -3,27 +3,73 @@ Pydantic models for DakDash API
 Type-safe request/response schemas
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 from datetime import datetime
 
+from events import EventLog
+
 
 class TrackingEvent(BaseModel):
     """Individual tracking event in the shipment timeline"""
     location: str = Field(..., description="Event location or hub")
     status: str = Field(..., description="Status description")
-    timestamp: str = Field(..., description="ISO 8601 timestamp")
+    timestamp: str = Field(..., description="Timestamp as reported by the carrier")
+    epoch: Optional[int] = Field(
+        default=None,
+        description="Timestamp parsed to Unix epoch seconds (null if unrecognised)"
+    )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "location": "New Delhi GPO",
                 "status": "Item dispatched",
-                "timestamp": "2026-01-28T10:30:00Z"
+                "timestamp": "2026-01-28T10:30:00Z",
+                "epoch": 1769596200
             }
         }
 
 
+class PlaceInfo(BaseModel):
+    """Structured place resolved from a pincode via the offline index"""
+    pincode: str = Field(..., description="Six-digit PIN")
+    district: Optional[str] = Field(default=None, description="District (needs the full pincode index)")
+    state: Optional[str] = Field(default=None, description="State or union territory")
+    circle: str = Field(..., description="India Post postal circle")
+
+
+class TimelineHop(BaseModel):
+    """Consecutive scans at one hub"""
+    hub_id: Optional[int] = Field(default=None, description="Stable hub id (null if the office is unknown)")
+    hub: Optional[str] = Field(default=None, description="Hub name")
+    scans: int = Field(..., description="Number of scans in this hop")
+    arrived_epoch: Optional[int] = Field(default=None, description="First scan at the hub (Unix epoch seconds)")
+    departed_epoch: Optional[int] = Field(default=None, description="Last scan at the hub (Unix epoch seconds)")
+    dwell_hours: Optional[float] = Field(default=None, description="Hours between the first and last scan at the hub")
+    transit_hours: Optional[float] = Field(default=None, description="Hours since the last scan at the previous hub")
+
+
+class TimelineInfo(BaseModel):
+    """Per-hop dwell and transit analysis of the event timeline"""
+    hops: List[TimelineHop] = Field(default_factory=list, description="Hops, oldest first")
+    first_scan_epoch: Optional[int] = Field(default=None, description="Earliest dated scan")
+    last_scan_epoch: Optional[int] = Field(default=None, description="Latest dated scan")
+    total_hours: Optional[float] = Field(default=None, description="Hours from the first to the latest scan")
+    longest_stall_hours: Optional[float] = Field(default=None, description="Longest gap between two scans")
+    longest_stall_hub: Optional[str] = Field(default=None, description="Hub of the scan that started the longest gap")
+
+
+class EtaInfo(BaseModel):
+    """Expected delivery window from historical hub-to-delivery times"""
+    earliest_epoch: int = Field(..., description="Window start (Unix epoch seconds)")
+    expected_epoch: int = Field(..., description="Median expected delivery")
+    latest_epoch: int = Field(..., description="Window end")
+    overdue: bool = Field(default=False, description="Past the window seen for this hub historically")
+    basis: str = Field(..., description="hub_region, or hub when the destination region has too little history")
+    samples: int = Field(..., description="Delivered shipments behind the estimate")
+
+
 class TrackingResponse(BaseModel):
     """Normalized tracking response for frontend consumption"""
     tracking_number: str = Field(..., description="Consignment/tracking number")
@@ -31,11 +77,27 @@ class TrackingResponse(BaseModel):
     status: str = Field(..., description="Current delivery status")
     origin: str = Field(default="", description="Origin location")
     destination: str = Field(default="", description="Destination address")
+    origin_place: Optional[PlaceInfo] = Field(
+        default=None,
+        description="Origin district/state/circle resolved from its pincode"
+    )
+    destination_place: Optional[PlaceInfo] = Field(
+        default=None,
+        description="Destination district/state/circle resolved from its pincode"
+    )
     last_updated: str = Field(..., description="Last update timestamp")
     events: List[TrackingEvent] = Field(
         default_factory=list,
         description="Chronological list of tracking events"
     )
+    timeline: Optional[TimelineInfo] = Field(
+        default=None,
+        description="Per-hop dwell and transit times, longest stall and total elapsed time"
+    )
+    eta: Optional[EtaInfo] = Field(
+        default=None,
+        description="Expected delivery window (null when delivered or without history for the current hub)"
+    )
     delay_info: Optional[dict] = Field(
         default=None,
         description="Phase 2: Delay detection information with status, severity, and hours_since_update"
@@ -44,6 +106,22 @@ class TrackingResponse(BaseModel):
         default=None,
         description="Phase 2: AI-generated natural language summary of shipment status"
     )
+    stale: bool = Field(
+        default=False,
+        description="True when served from the last known snapshot because the tracking service is unavailable"
+    )
+    stale_age_seconds: Optional[int] = Field(
+        default=None,
+        description="Age of a stale snapshot in seconds"
+    )
+    
+    @field_validator("events", mode="before")
+    @classmethod
+    def expand_event_log(cls, value):
+        """Accept the internal compact EventLog as well as a list of events"""
+        if isinstance(value, EventLog):
+            return value.to_dicts()
+        return value
     
     class Config:
         json_schema_extra = {
@@ -77,6 +155,80 @@ class TrackingResponse(BaseModel):
         }
 
 
+class BatchTrackingRequest(BaseModel):
+    """Request body for batch tracking lookups"""
+    tracking_numbers: List[str] = Field(..., min_length=1, description="Tracking/consignment numbers")
+    carrier: str = Field(default="india-post", description="Carrier code shared by all numbers")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "tracking_numbers": ["RM123456789IN", "RM987654321IN"],
+                "carrier": "india-post"
+            }
+        }
+
+
+class WatchRequest(BaseModel):
+    """Request body for adding shipments to the watchlist"""
+    tracking_numbers: List[str] = Field(..., min_length=1, description="Tracking/consignment numbers")
+    carrier: str = Field(default="india-post", description="Carrier code shared by all numbers")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "tracking_numbers": ["RM123456789IN"],
+                "carrier": "india-post"
+            }
+        }
+
+
+class WatchedShipment(BaseModel):
+    """A watched shipment and its next background refresh"""
+    tracking_number: str
+    next_refresh_epoch: Optional[int] = Field(default=None, description="Next scheduled refresh (Unix epoch seconds)")
+
+
+class WatchResponse(BaseModel):
+    """Shipments now on the watchlist"""
+    carrier: str
+    watching: List[WatchedShipment] = Field(default_factory=list)
+    total_watched: int = Field(..., description="Shipments on the watchlist across all users")
+
+
+class BatchItemError(BaseModel):
+    """Per-number error record in a batch response"""
+    status_code: int = Field(..., description="HTTP-style status code for this item")
+    message: str = Field(..., description="Error message")
+
+
+class BatchTrackingItem(BaseModel):
+    """Result for a single number in a batch lookup"""
+    tracking_number: str
+    success: bool
+    result: Optional[TrackingResponse] = None
+    error: Optional[BatchItemError] = None
+
+
+class BatchTrackingResponse(BaseModel):
+    """Batch tracking response with per-number results and partial failures"""
+    carrier: str
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchTrackingItem] = Field(default_factory=list)
+
+
+class JobResponse(BaseModel):
+    """Status of a background tracking job"""
+    job_id: str
+    status: str = Field(..., description="pending, done or error")
+    tracking_number: str
+    carrier: str
+    result: Optional[TrackingResponse] = None
+    error: Optional[BatchItemError] = None
+
+
 class ErrorResponse(BaseModel):
     """Standard error response"""
     error: bool = True
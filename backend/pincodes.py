@@ -0,0 +1,186 @@
+"""
+Offline India pincode index for DakDash
+Memory-mapped PIN -> district/state/circle lookups with a built-in prefix fallback
+"""
+
+import json
+import mmap
+import struct
+from typing import Dict, List, Optional
+
+from config import settings
+
+
+MAGIC = b"DKPIN\x00\x01\x00"
+# magic, first PIN, slot count, metadata length
+HEADER = struct.Struct("<8sIII")
+
+FIRST_PIN = 110000
+LAST_PIN = 999999
+
+# Postal circle by the first two PIN digits (India Post allocation)
+CIRCLES: Dict[str, str] = {
+    "11": "Delhi",
+    "12": "Haryana", "13": "Haryana",
+    "14": "Punjab", "15": "Punjab", "16": "Punjab",
+    "17": "Himachal Pradesh",
+    "18": "Jammu & Kashmir", "19": "Jammu & Kashmir",
+    **{str(prefix): "Uttar Pradesh" for prefix in range(20, 29)},
+    **{str(prefix): "Rajasthan" for prefix in range(30, 35)},
+    **{str(prefix): "Gujarat" for prefix in range(36, 40)},
+    **{str(prefix): "Maharashtra" for prefix in range(40, 45)},
+    **{str(prefix): "Madhya Pradesh" for prefix in range(45, 49)},
+    "49": "Chhattisgarh",
+    "50": "Telangana",
+    "51": "Andhra Pradesh", "52": "Andhra Pradesh", "53": "Andhra Pradesh",
+    **{str(prefix): "Karnataka" for prefix in range(56, 60)},
+    **{str(prefix): "Tamil Nadu" for prefix in range(60, 65)},
+    "67": "Kerala", "68": "Kerala", "69": "Kerala",
+    **{str(prefix): "West Bengal" for prefix in range(70, 75)},
+    "75": "Odisha", "76": "Odisha", "77": "Odisha",
+    "78": "Assam",
+    "79": "North East",
+    "80": "Bihar", "84": "Bihar", "85": "Bihar",
+    "81": "Jharkhand", "82": "Jharkhand", "83": "Jharkhand",
+    **{str(prefix): "Army Postal Service" for prefix in range(90, 100)},
+}
+
+# Circles that cover more than one state leave the state unknown
+MULTI_STATE_CIRCLES = {"North East", "Army Postal Service"}
+
+# Sorting districts served by another state's circle
+STATE_BY_PREFIX = {
+    "194": "Ladakh",
+    "246": "Uttarakhand", "248": "Uttarakhand", "249": "Uttarakhand", "263": "Uttarakhand",
+    "403": "Goa",
+    "605": "Puducherry",
+    "737": "Sikkim",
+    "744": "Andaman & Nicobar Islands",
+}
+
+
+def normalize_pincode(value: object) -> Optional[str]:
+    """Six-digit PIN from a raw postal code field, or None"""
+    if isinstance(value, str) and len(value) == 6 and value.isdigit():
+        digits = value
+    else:
+        digits = "".join(ch for ch in str(value or "") if ch.isdigit())
+    if len(digits) != 6 or digits[0] == "0":
+        return None
+    return digits
+
+
+class PincodeIndex:
+    """
+    O(1) pincode lookups backed by a memory-mapped index file
+
+    The file (built by scripts/build_pincode_index.py) holds one uint16
+    district number per PIN from FIRST_PIN upwards, followed by a small
+    JSON table of districts. Mapping it read-only means every worker
+    shares the same page-cache pages instead of holding its own copy.
+    Without the file, lookups still resolve the postal circle and, for
+    single-state circles, the state from the PIN prefix.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap: Optional[mmap.mmap] = None
+        self._slots: Optional[memoryview] = None
+        self._first_pin = FIRST_PIN
+        self._districts: List[Dict[str, str]] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._slots is not None
+
+    def open(self) -> None:
+        """Map the index file if present (called on startup)"""
+        if not self.path or self._mmap is not None:
+            return
+
+        try:
+            with open(self.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # Missing or empty file: prefix lookups only
+            return
+
+        # A truncated or foreign file must not take down startup
+        try:
+            magic, first_pin, count, metadata_length = HEADER.unpack_from(mapped, 0)
+            if magic != MAGIC:
+                raise ValueError("unrecognised format")
+
+            slots_offset = HEADER.size + metadata_length
+            if slots_offset + count * 2 > len(mapped):
+                raise ValueError("file is truncated")
+
+            districts = json.loads(mapped[HEADER.size:slots_offset])["districts"]
+            if not isinstance(districts, list):
+                raise ValueError("district table is malformed")
+        except (struct.error, ValueError, KeyError, TypeError) as e:
+            mapped.close()
+            print(f"Ignoring pincode index {self.path}: {str(e)}; using circle-only lookups")
+            return
+
+        self._mmap = mapped
+        self._first_pin = first_pin
+        self._districts = districts
+        self._slots = memoryview(mapped)[slots_offset:slots_offset + count * 2].cast("H")
+
+    def close(self) -> None:
+        if self._slots is not None:
+            self._slots.release()
+            self._slots = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def lookup(self, value: object) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Resolve a postal code
+
+        Args:
+            value: Raw postal code (spaces and punctuation are ignored)
+
+        Returns:
+            Dict with pincode, district, state and circle (district and
+            state may be None), or None if value is not a valid PIN
+        """
+        pincode = normalize_pincode(value)
+        if pincode is None:
+            return None
+
+        circle = CIRCLES.get(pincode[:2])
+        if circle is None:
+            return None
+
+        place = {
+            "pincode": pincode,
+            "district": None,
+            "state": STATE_BY_PREFIX.get(pincode[:3]) or (None if circle in MULTI_STATE_CIRCLES else circle),
+            "circle": circle
+        }
+
+        if self._slots is not None:
+            slot = int(pincode) - self._first_pin
+            if 0 <= slot < len(self._slots):
+                district_number = self._slots[slot]
+                if 0 < district_number <= len(self._districts):
+                    district = self._districts[district_number - 1]
+                    place["district"] = district["district"]
+                    place["state"] = district["state"]
+                    place["circle"] = district.get("circle") or circle
+
+        return place
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "loaded": self.loaded,
+            "districts": len(self._districts),
+            "mapped_bytes": len(self._mmap) if self._mmap is not None else 0
+        }
+
+
+# Global index, mapped on startup
+pincode_index = PincodeIndex(settings.PINCODE_INDEX_PATH)
@@ -0,0 +1,153 @@
+"""
+Upstream rate limiting for DakDash
+Token bucket with a priority wait queue, shared by all TrackingMore calls
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+
+
+# Priorities (lower is served first)
+INTERACTIVE = 0
+BATCH = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch", BACKGROUND: "background"}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a queued call's deadline passes before a token is free"""
+    pass
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens/second up to `burst`
+
+    When the bucket is empty callers wait in a priority queue, so
+    interactive lookups get the next token before batch and background
+    work. A caller that is still queued when its timeout passes is
+    rejected with RateLimitExceeded. All state changes happen on the
+    event loop without awaiting, so concurrent tasks cannot interleave.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = INTERACTIVE, timeout: Optional[float] = None) -> None:
+        """
+        Take one token, waiting in priority order if none are available
+
+        Args:
+            priority: INTERACTIVE, BATCH or BACKGROUND
+            timeout: Max seconds to wait in the queue (None waits forever)
+
+        Raises:
+            RateLimitExceeded: If no token became available in time
+        """
+        if not self.enabled:
+            return
+
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            self.granted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule_wake()
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                f"Upstream rate limit: no capacity within {timeout:.1f}s"
+            )
+        except asyncio.CancelledError:
+            # A token handed over just before cancellation goes back in the bucket
+            if future.done() and not future.cancelled():
+                self._tokens += 1
+                self._schedule_wake()
+            raise
+
+    def _schedule_wake(self) -> None:
+        if self._timer is not None or not self._waiters:
+            return
+
+        self._refill()
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self) -> None:
+        self._timer = None
+        self._refill()
+
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Timed out or cancelled while queued
+                continue
+            self._tokens -= 1
+            self.granted += 1
+            future.set_result(None)
+
+        # Drop abandoned waiters at the head so they don't hold the timer
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+        self._schedule_wake()
+
+    def stats(self) -> Dict[str, object]:
+        """Current tokens, queue depth by priority and counters"""
+        self._refill()
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                queued[PRIORITY_NAMES.get(priority, str(priority))] += 1
+
+        return {
+            "enabled": self.enabled,
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "queued": queued,
+            "granted": self.granted,
+            "rejected": self.rejected
+        }
+
+
+def queue_timeout(priority: int) -> float:
+    """Max seconds a call of the given priority may wait for a token"""
+    if priority == INTERACTIVE:
+        return settings.UPSTREAM_QUEUE_TIMEOUT_INTERACTIVE
+    if priority == BATCH:
+        return settings.UPSTREAM_QUEUE_TIMEOUT_BATCH
+    return settings.UPSTREAM_QUEUE_TIMEOUT_BACKGROUND
+
+
+# Global limiter shared by every upstream call
+upstream_limiter = TokenBucket(settings.UPSTREAM_RATE_LIMIT, settings.UPSTREAM_BURST)
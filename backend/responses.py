@@ -0,0 +1,41 @@
+"""
+JSON responses for DakDash
+orjson-backed encoding shared by the API and the response cache
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+from events import EventLog
+
+
+def _default(value: Any) -> Any:
+    # Compact internal types are expanded to the public schema here
+    if isinstance(value, EventLog):
+        return value.to_dicts()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as UTF-8 JSON bytes"""
+    return orjson.dumps(content, default=_default)
+
+
+def fragment(encoded: bytes) -> orjson.Fragment:
+    """Wrap already-encoded JSON so it is embedded as-is in a larger document"""
+    return orjson.Fragment(encoded)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson (default response class)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class EncodedJSONResponse(Response):
+    """Response whose content is JSON that has already been encoded to bytes"""
+
+    media_type = "application/json"
@@ -0,0 +1,106 @@
+"""
+Memory per 100k tracking events: pydantic models vs dicts vs EventLog
+Run from the backend directory: python scripts/bench_event_memory.py
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import TrackingEvent  # noqa: E402
+from carriers import CarrierServiceFactory  # noqa: E402
+from timestamps import TimestampParser  # noqa: E402
+
+N_SHIPMENTS = 5000
+EVENTS_PER_SHIPMENT = 20
+N_HUBS = 2000
+DETAILS = ["Item Booked", "Item Bagged", "Item Dispatched", "Item Received", "Out for Delivery",
+           "Item Delivered", "Bag Opened", "Item Onhold", "Addressee Moved", "Item Returned"]
+STATUSES = ["transit", "pickup", "delivered", "exception", "inforeceived"]
+
+
+def raw_payloads() -> list:
+    """Decoded TrackingMore trackinfo lists (fresh string objects, as json.loads gives)"""
+    start = datetime(2026, 1, 1, 8, 0)
+    shipments = []
+    for s in range(N_SHIPMENTS):
+        shipments.append([
+            {
+                "location": f"Hub {(s * 7 + i * 13) % N_HUBS} SO",
+                "tracking_detail": DETAILS[(s + i) % len(DETAILS)],
+                "checkpoint_status": STATUSES[i % len(STATUSES)],
+                "checkpoint_date": (start + timedelta(hours=s + i * 5)).strftime("%d-%m-%Y %H:%M")
+            }
+            for i in range(EVENTS_PER_SHIPMENT)
+        ])
+    return json.loads(json.dumps(shipments))
+
+
+def as_models(trackinfo: list) -> list:
+    """Original representation: one pydantic TrackingEvent per checkpoint"""
+    return [
+        TrackingEvent(
+            location=f"{e['location']} - {e['tracking_detail']}",
+            status=e["checkpoint_status"],
+            timestamp=e["checkpoint_date"]
+        )
+        for e in trackinfo
+    ]
+
+
+_parser = TimestampParser()
+
+
+def as_dicts(trackinfo: list) -> list:
+    """Dict-per-event representation with a parsed epoch"""
+    return [
+        {
+            "location": f"{e['location']} - {e['tracking_detail']}",
+            "status": e["checkpoint_status"],
+            "timestamp": e["checkpoint_date"],
+            "epoch": _parser(e["checkpoint_date"])
+        }
+        for e in trackinfo
+    ]
+
+
+def as_event_log(trackinfo: list):
+    """Compact representation: arrays + pooled location/status strings"""
+    return CarrierServiceFactory.get_normalizer("india-post").normalize_events(trackinfo)
+
+
+def retained_bytes(build) -> int:
+    """Bytes still allocated once the raw payloads are dropped (string pool included)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    payloads = raw_payloads()
+    built = [build(trackinfo) for trackinfo in payloads]
+    del payloads
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return after - before
+
+
+def main() -> None:
+    total = N_SHIPMENTS * EVENTS_PER_SHIPMENT
+    scale = 100_000 / total
+    print(f"{total} events ({N_SHIPMENTS} shipments), reported per 100k events")
+    for name, build in (
+        ("pydantic TrackingEvent models", as_models),
+        ("event dicts with epoch", as_dicts),
+        ("EventLog (arrays + pooled strings)", as_event_log),
+    ):
+        size = retained_bytes(build) * scale
+        print(f"  {name:<34} {size / 2 ** 20:7.1f} MiB  ({size / 100_000:5.0f} B/event)")
+
+
+if __name__ == "__main__":
+    main()
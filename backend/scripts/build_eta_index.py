@@ -0,0 +1,53 @@
+"""
+Build (or incrementally update) the ETA index from delivered shipments in the store
+Only shipments not included in a previous build are read, unless --full is given
+
+Usage (from the backend directory):
+    python scripts/build_eta_index.py [--full] [dakdash.db]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings  # noqa: E402
+from eta import add_history  # noqa: E402
+from store import ShipmentStore  # noqa: E402
+from transit_stats import QuantileSketch  # noqa: E402
+
+
+def main() -> None:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    full = "--full" in sys.argv[1:]
+    store = ShipmentStore(args[0] if args else settings.STORE_PATH)
+    if not store.enabled:
+        raise SystemExit(__doc__)
+    store.open()
+
+    started = time.perf_counter()
+    sketches = {}
+    if not full:
+        for hub_id, region, carrier_code, blob in store.load_eta_sketches():
+            sketches[(hub_id, region, carrier_code)] = QuantileSketch.from_bytes(blob)
+
+    existing = {key: sketch.total for key, sketch in sketches.items()}
+    ingested = []
+    for tracking_number, carrier_code, pincode, history in store.delivered_histories(only_new=not full):
+        add_history(sketches, carrier_code, pincode[:2] if pincode else None, history)
+        ingested.append((tracking_number, carrier_code))
+
+    changed = [
+        (*key, sketch.to_bytes()) for key, sketch in sketches.items()
+        if sketch.total != existing.get(key)
+    ]
+    store.save_eta_build(changed, ingested, replace=full)
+    store.close()
+
+    print(f"{len(ingested)} delivered shipments added, {len(changed)} of {len(sketches)} "
+          f"(hub, region, carrier) entries updated in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Build the offline pincode index used by pincodes.PincodeIndex
+Input: India Post "All India Pincode Directory" CSV (data.gov.in)
+
+Usage (from the backend directory):
+    python scripts/build_pincode_index.py all_india_pincode.csv [data/pincodes.bin]
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pincodes import HEADER, MAGIC, FIRST_PIN, LAST_PIN, normalize_pincode  # noqa: E402
+
+
+def read_directory(csv_path: str) -> dict:
+    """Map each PIN to its (district, state, circle), first office row wins"""
+    pins = {}
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fields = {name.lower().replace(" ", ""): name for name in reader.fieldnames or []}
+        for column in ("pincode", "district", "statename"):
+            if column not in fields:
+                raise SystemExit(f"{csv_path}: missing column '{column}'")
+
+        for row in reader:
+            pincode = normalize_pincode(row[fields["pincode"]])
+            if pincode is None or pincode in pins:
+                continue
+            pins[pincode] = (
+                row[fields["district"]].strip().title(),
+                row[fields["statename"]].strip().title(),
+                row[fields["circlename"]].strip().replace(" Circle", "") if "circlename" in fields else ""
+            )
+    return pins
+
+
+def build(csv_path: str, out_path: str) -> None:
+    pins = read_directory(csv_path)
+    if not pins:
+        raise SystemExit(f"{csv_path}: no pincodes found")
+
+    districts = []
+    district_numbers = {}
+    for district in sorted(set(pins.values())):
+        districts.append({"district": district[0], "state": district[1], "circle": district[2]})
+        district_numbers[district] = len(districts)  # 0 means unknown
+
+    if len(districts) > 0xFFFF:
+        raise SystemExit("Too many districts for a uint16 index")
+
+    count = LAST_PIN - FIRST_PIN + 1
+    slots = array("H", bytes(2 * count))
+    for pincode, district in pins.items():
+        slots[int(pincode) - FIRST_PIN] = district_numbers[district]
+
+    if sys.byteorder != "little":
+        slots.byteswap()
+
+    metadata = json.dumps({"districts": districts}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FIRST_PIN, count, len(metadata)))
+        f.write(metadata)
+        slots.tofile(f)
+    os.replace(tmp_path, out_path)
+
+    print(f"{len(pins)} pincodes, {len(districts)} districts -> {out_path} ({os.path.getsize(out_path)} bytes)")
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        raise SystemExit(__doc__)
+
+    started = time.perf_counter()
+    build(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "data/pincodes.bin")
+    print(f"built in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
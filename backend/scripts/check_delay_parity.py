@@ -0,0 +1,118 @@
+"""
+Parity check: delay_batch.detect_delay_batch vs delay_detection.detect_delay
+Run from the backend directory: python scripts/check_delay_parity.py [shipments]
+(tests/test_delay_batch.py covers the same rules in the test suite; this runs
+far more shipments and reports timings)
+"""
+
+import os
+import random
+import sys
+import time
+from array import array
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from delay_batch import (  # noqa: E402
+    DELAY_STATUSES, SEVERITIES, delivery_status_code, detect_delay_batch, last_two_hubs
+)
+from delay_detection import DELAY_THRESHOLDS, detect_delay  # noqa: E402
+from events import EventLog, NO_EPOCH  # noqa: E402
+from hubs import NO_HUB  # noqa: E402
+from timeline import analyze_timeline  # noqa: E402
+
+DELIVERY_STATUSES = ["pending", "Pending", "transit", "pickup", "delivered", "DELIVERED", "exception",
+                     "alert", "undelivered", "expired", "notfound", ""]
+# Rule thresholds in hours, probed exactly and either side
+EDGES = [0, 12, 20.3, 24, 36, 48, 60, 72, 96]
+
+
+def random_shipments(count: int, now: float, seed: int = 19) -> list:
+    """(delivery_status, EventLog) pairs covering every rule and threshold edge"""
+    rng = random.Random(seed)
+    shipments = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            age = rng.choice(EDGES) * 3600 + rng.choice((-1, 0, 1)) * rng.choice((0.04, 1, 180))
+        else:
+            age = rng.uniform(-2, 200) * 3600
+        n_events = rng.choice((0, 1, 2, 2, 3))
+        epoch = int(now - age)
+        hub = rng.choice((NO_HUB, 1, 2, 3))
+        hubs = [hub, hub if rng.random() < 0.5 else rng.choice((NO_HUB, 1, 2, 3)), 4][:n_events]
+        epochs = [epoch - i * 3600 for i in range(n_events)]
+        if n_events and rng.random() < 0.05:
+            epochs[-1] = NO_EPOCH  # unparsed timestamps sort last
+        shipments.append((
+            rng.choice(DELIVERY_STATUSES),
+            EventLog(array("q", epochs), ("",) * n_events, ("",) * n_events, array("L", hubs), ("",) * n_events)
+        ))
+    return shipments
+
+
+def compare(label: str, shipments: list, timelines: list, now: float, thresholds: list = None) -> int:
+    """Run both paths over the shipments and count rows that differ"""
+    started = time.perf_counter()
+    expected = [
+        detect_delay({"delivery_status": status}, timeline, now=now,
+                     thresholds=thresholds[i] if thresholds else None)
+        for i, ((status, _), timeline) in enumerate(zip(shipments, timelines))
+    ]
+    scalar_seconds = time.perf_counter() - started
+
+    # Columns as a sweep would load them (e.g. from the shipment store)
+    epochs = np.array([
+        events.epoch(0) if len(events) and events.epoch(0) is not None else np.nan
+        for _, events in shipments
+    ])
+    codes = np.array([delivery_status_code(status) for status, _ in shipments], dtype=np.int8)
+    hubs = np.array([last_two_hubs(events) for _, events in shipments], dtype=np.int64).reshape(-1, 2)
+    columns = None
+    if thresholds:
+        columns = {name: np.array([row[name] for row in thresholds]) for name in DELAY_THRESHOLDS}
+
+    started = time.perf_counter()
+    result = detect_delay_batch(epochs, codes, hubs[:, 0], hubs[:, 1], now=now, thresholds=columns)
+    batch_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    for i, info in enumerate(expected):
+        got = (DELAY_STATUSES[result["status"][i]], SEVERITIES[result["severity"][i]],
+               float(result["hours_since_update"][i]))
+        want = (info["status"], info["severity"], float(info["hours_since_update"]))
+        if got != want:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"  mismatch #{i}: scalar {want} batch {got} ({shipments[i][0]!r}, {list(shipments[i][1].hub_ids)})")
+
+    print(f"{label}: {len(shipments)} shipments, scalar {scalar_seconds:.3f}s, batch {batch_seconds:.4f}s "
+          f"({scalar_seconds / batch_seconds:.0f}x), {mismatches} mismatches")
+    return mismatches
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    now = time.time()
+    shipments = random_shipments(count, now)
+    timelines = [analyze_timeline(events) for _, events in shipments]
+
+    # Per-shipment thresholds, as learned from transit statistics
+    rng = random.Random(22)
+    learned = [
+        dict(DELAY_THRESHOLDS, possible_delay=possible, delayed=possible + rng.choice((0, 6.5, 30)),
+             stuck=rng.choice((12, 36, 60)))
+        for possible in (rng.choice((12, 20.3, 48, 96)) for _ in range(count))
+    ]
+
+    mismatches = compare("default thresholds", shipments, timelines, now)
+    mismatches += compare("per-shipment thresholds", shipments, timelines, now, learned)
+    if mismatches:
+        raise SystemExit(f"FAIL: {mismatches} mismatches")
+    print("OK: batch matches scalar for every shipment")
+
+
+if __name__ == "__main__":
+    main()
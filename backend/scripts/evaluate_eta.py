@@ -0,0 +1,80 @@
+"""
+Evaluate ETA predictions on held-out delivered shipments from the store
+Every fifth shipment (by a stable hash of its number) is held out; the rest build
+the index. Each held-out hop is predicted at the moment the parcel reached the hub.
+
+Usage (from the backend directory):
+    python scripts/evaluate_eta.py [dakdash.db]
+"""
+
+import os
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings  # noqa: E402
+from eta import EtaIndex, add_history, hours_to_delivery  # noqa: E402
+from store import ShipmentStore  # noqa: E402
+
+HOLD_OUT_EVERY = 5
+
+
+def main() -> None:
+    store = ShipmentStore(sys.argv[1] if len(sys.argv) > 1 else settings.STORE_PATH)
+    if not store.enabled:
+        raise SystemExit(__doc__)
+    store.open()
+
+    sketches = {}
+    held_out = []
+    for tracking_number, carrier_code, pincode, history in store.delivered_histories(only_new=False):
+        region = pincode[:2] if pincode else None
+        if zlib.crc32(tracking_number.encode()) % HOLD_OUT_EVERY == 0:
+            held_out.append((carrier_code, region, history))
+        else:
+            add_history(sketches, carrier_code, region, history)
+    store.close()
+
+    index = EtaIndex(settings.ETA_MIN_SAMPLES, settings.ETA_LOW_PERCENTILE, settings.ETA_HIGH_PERCENTILE)
+    for key, sketch in sketches.items():
+        index.set_sketch(key, sketch)
+
+    errors = []
+    covered = predicted = hops = 0
+    lookup_seconds = 0.0
+    for carrier_code, region, history in held_out:
+        delivered = history[-1][0]
+        for hub_id, hours in hours_to_delivery(history):
+            hops += 1
+            arrived = delivered - hours * 3600
+            timeline = {"hops": [{"hub_id": hub_id, "arrived_epoch": arrived}]}
+            started = time.perf_counter()
+            eta = index.predict(timeline, carrier_code, region, now=arrived)
+            lookup_seconds += time.perf_counter() - started
+            if eta is None:
+                continue
+            predicted += 1
+            errors.append(abs(eta["expected_epoch"] - delivered) / 3600)
+            if eta["earliest_epoch"] <= delivered <= eta["latest_epoch"]:
+                covered += 1
+
+    print(f"{len(sketches)} index entries ({len(index)} usable), {len(held_out)} held-out shipments, {hops} hops")
+    if not errors:
+        print("No held-out hop could be predicted (not enough history yet)")
+        return
+
+    errors.sort()
+    print(f"  predicted       {predicted}/{hops} hops ({predicted / hops:.0%})")
+    print(f"  mean abs error  {statistics.fmean(errors):.1f} h")
+    print(f"  median error    {errors[len(errors) // 2]:.1f} h")
+    print(f"  p90 error       {errors[int(len(errors) * 0.9)]:.1f} h")
+    print(f"  window coverage {covered / predicted:.0%} "
+          f"(target {settings.ETA_HIGH_PERCENTILE - settings.ETA_LOW_PERCENTILE:.0%})")
+    print(f"  lookup          {lookup_seconds / hops * 1e6:.2f} us/prediction")
+
+
+if __name__ == "__main__":
+    main()
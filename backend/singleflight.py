@@ -0,0 +1,65 @@
+"""
+Single-flight request coalescing for DakDash
+Concurrent callers asking for the same key share one in-flight fetch
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Merge concurrent calls for the same key into one asyncio task
+
+    The shared task is awaited through asyncio.shield(), so a caller
+    that gets cancelled (e.g. client disconnect) only stops waiting;
+    the fetch keeps running for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key, or join the call already in flight
+
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine factory that performs the fetch
+
+        Returns:
+            The shared result (or raises the shared error)
+        """
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # Mark the error as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """In-flight and coalescing counters"""
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
+
+
+# Global coalescer for upstream tracking lookups
+upstream_flights = SingleFlight()
@@ -0,0 +1,505 @@
+"""
+Persistent shipment store for DakDash
+SQLite (WAL mode) snapshots with incrementally merged event history
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from timestamps import parse_timestamp
+from events import EventLog
+from hubs import HubRow
+from transit_stats import QuantileSketch, SketchRow
+from eta import EtaRow, History
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shipments (
+    tracking_number TEXT NOT NULL,
+    carrier_code    TEXT NOT NULL,
+    display_number  TEXT NOT NULL,
+    carrier         TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    origin          TEXT NOT NULL,
+    destination     TEXT NOT NULL,
+    last_updated    TEXT NOT NULL,
+    extra           TEXT NOT NULL,
+    fetched_at      REAL NOT NULL,
+    fresh_until     REAL NOT NULL,
+    PRIMARY KEY (tracking_number, carrier_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS events (
+    id              INTEGER PRIMARY KEY,
+    tracking_number TEXT NOT NULL,
+    carrier_code    TEXT NOT NULL,
+    timestamp       TEXT NOT NULL,
+    location        TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    epoch           REAL,
+    hub_id          INTEGER,
+    UNIQUE (tracking_number, carrier_code, timestamp, location, status)
+);
+
+CREATE TABLE IF NOT EXISTS hubs (
+    id              INTEGER PRIMARY KEY,
+    key             TEXT NOT NULL UNIQUE,
+    name            TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transit_sketches (
+    scope           TEXT NOT NULL,
+    key             TEXT NOT NULL,
+    metric          TEXT NOT NULL,
+    counts          BLOB NOT NULL,
+    PRIMARY KEY (scope, key, metric)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS eta_sketches (
+    hub_id          INTEGER NOT NULL,
+    region          TEXT NOT NULL,
+    carrier_code    TEXT NOT NULL,
+    counts          BLOB NOT NULL,
+    PRIMARY KEY (hub_id, region, carrier_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS watchlist (
+    tracking_number TEXT NOT NULL,
+    carrier_code    TEXT NOT NULL,
+    PRIMARY KEY (tracking_number, carrier_code)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS eta_ingested (
+    tracking_number TEXT NOT NULL,
+    carrier_code    TEXT NOT NULL,
+    PRIMARY KEY (tracking_number, carrier_code)
+) WITHOUT ROWID;
+"""
+
+# Columns stored directly on the shipments row; everything else goes in `extra`
+CORE_FIELDS = ("tracking_number", "carrier", "status", "origin", "destination", "last_updated", "events")
+
+
+class ShipmentStore:
+    """
+    SQLite-backed store of shipment snapshots and their events
+
+    Events are deduplicated on (timestamp, location, status), so saving a
+    snapshot only writes checkpoints that were not seen before and the
+    stored history can outlive the provider's retention. Calls are
+    blocking; run them via asyncio.to_thread from request handlers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def open(self) -> None:
+        """Open the database and create tables (called on startup)"""
+        if not self.enabled or self._conn is not None:
+            return
+
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        self._conn = conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Bring databases created by older versions up to the current schema"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+        if "hub_id" not in columns:
+            # Older events keep an unknown hub
+            conn.execute("ALTER TABLE events ADD COLUMN hub_id INTEGER")
+        if "epoch" not in columns:
+            conn.execute("BEGIN")
+            conn.execute("ALTER TABLE events ADD COLUMN epoch REAL")
+            rows = conn.execute("SELECT id, timestamp FROM events").fetchall()
+            conn.executemany(
+                "UPDATE events SET epoch = ? WHERE id = ?",
+                [(parse_timestamp(timestamp), row_id) for row_id, timestamp in rows]
+            )
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close the database (called on shutdown)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def save_snapshot(
+        self,
+        key: Tuple[str, str],
+        response_dict: dict,
+        fresh_for: float
+    ) -> Optional[float]:
+        """
+        Upsert a shipment snapshot and merge its events
+
+        Args:
+            key: (tracking_number, carrier_code) cache key
+            response_dict: Normalized response (events as an EventLog)
+            fresh_for: Seconds the snapshot may be served without refetching
+
+        Returns:
+            Latest event epoch stored for the shipment before this save
+            (None if it had no dated events), so callers can tell which
+            events are new
+        """
+        if self._conn is None:
+            return None
+
+        tracking_number, carrier_code = key
+        now = time.time()
+        extra = {name: value for name, value in response_dict.items() if name not in CORE_FIELDS}
+        event_rows = [
+            (tracking_number, carrier_code, timestamp, location, status, epoch, hub_id)
+            for timestamp, location, status, epoch, hub_id in response_dict["events"].rows()
+        ]
+
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                previous_epoch = conn.execute(
+                    "SELECT MAX(epoch) FROM events WHERE tracking_number = ? AND carrier_code = ?",
+                    key
+                ).fetchone()[0]
+                conn.execute(
+                    """
+                    INSERT INTO shipments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (tracking_number, carrier_code) DO UPDATE SET
+                        display_number = excluded.display_number,
+                        carrier = excluded.carrier,
+                        status = excluded.status,
+                        origin = excluded.origin,
+                        destination = excluded.destination,
+                        last_updated = excluded.last_updated,
+                        extra = excluded.extra,
+                        fetched_at = excluded.fetched_at,
+                        fresh_until = excluded.fresh_until
+                    """,
+                    (
+                        tracking_number, carrier_code,
+                        response_dict["tracking_number"],
+                        response_dict.get("carrier", ""),
+                        response_dict["status"],
+                        response_dict.get("origin", ""),
+                        response_dict.get("destination", ""),
+                        response_dict.get("last_updated", ""),
+                        json.dumps(extra, ensure_ascii=False),
+                        now,
+                        now + fresh_for
+                    )
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO events "
+                    "(tracking_number, carrier_code, timestamp, location, status, epoch, hub_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    event_rows
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return previous_epoch
+
+    def load_snapshot(self, key: Tuple[str, str], allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Load a stored snapshot with its full merged event history
+
+        Args:
+            key: (tracking_number, carrier_code) cache key
+            allow_stale: Return the snapshot even if it is past fresh_until
+
+        Returns:
+            Dict with the response under "response" plus fetched_at and
+            fresh_until, or None if missing (or stale and not allowed)
+        """
+        return self.load_snapshots([key], allow_stale).get(key)
+
+    def load_snapshots(self, keys: List[Tuple[str, str]], allow_stale: bool = False) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Load several snapshots under one lock acquisition (see load_snapshot)"""
+        if self._conn is None:
+            return {}
+
+        now = time.time()
+        snapshots = {}
+
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT display_number, carrier, status, origin, destination, last_updated, "
+                    "extra, fetched_at, fresh_until FROM shipments "
+                    "WHERE tracking_number = ? AND carrier_code = ?",
+                    key
+                ).fetchone()
+
+                if row is None or (not allow_stale and row[8] <= now):
+                    continue
+
+                events = self._conn.execute(
+                    "SELECT timestamp, location, status, epoch, hub_id FROM events "
+                    "WHERE tracking_number = ? AND carrier_code = ? "
+                    "ORDER BY epoch IS NULL, epoch DESC, id DESC",
+                    key
+                ).fetchall()
+
+                response = {
+                    "tracking_number": row[0],
+                    "carrier": row[1],
+                    "status": row[2],
+                    "origin": row[3],
+                    "destination": row[4],
+                    "last_updated": row[5],
+                    "events": EventLog.from_rows(events, sort=False)
+                }
+                response.update(json.loads(row[6]))
+
+                snapshots[key] = {
+                    "response": response,
+                    "fetched_at": row[7],
+                    "fresh_until": row[8]
+                }
+
+        return snapshots
+
+    def hub_id(self, key: str, name: str) -> Tuple[int, str]:
+        """
+        Id and display name of a hub, adding it if new (the hub index's allocator)
+
+        SQLite assigns the id and the canonical key is unique, so workers
+        sharing the database always agree on a hub's id. Called from the
+        event loop, but only the first time a worker sees a hub.
+
+        Args:
+            key: Canonical office key
+            name: Raw office name, kept as the display name if the hub is new
+
+        Returns:
+            (hub id, display name)
+        """
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO hubs (key, name) VALUES (?, ?)", (key, name))
+            return self._conn.execute("SELECT id, name FROM hubs WHERE key = ?", (key,)).fetchone()
+
+    def save_sketches(self, rows: List[SketchRow]) -> None:
+        """
+        Add new transit samples to the stored sketches
+
+        Rows hold only the samples taken since the last save (see
+        TransitStats.take_unsaved()). They are added to what is stored
+        inside one write transaction, so several workers sharing the
+        database each contribute their samples instead of overwriting.
+        """
+        if self._conn is None or not rows:
+            return
+
+        with self._lock:
+            # IMMEDIATE takes the write lock before reading the current counts
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                merged = []
+                for scope, key, metric, blob in rows:
+                    sketch = QuantileSketch.from_bytes(blob)
+                    stored = self._conn.execute(
+                        "SELECT counts FROM transit_sketches WHERE scope = ? AND key = ? AND metric = ?",
+                        (scope, key, metric)
+                    ).fetchone()
+                    if stored is not None:
+                        try:
+                            sketch.merge(QuantileSketch.from_bytes(stored[0]))
+                        except ValueError:
+                            print(f"Replacing transit sketch {scope}/{key}/{metric}: unrecognised format")
+                    merged.append((scope, key, metric, sketch.to_bytes()))
+
+                self._conn.executemany(
+                    "INSERT INTO transit_sketches (scope, key, metric, counts) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (scope, key, metric) DO UPDATE SET counts = excluded.counts",
+                    merged
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load_sketches(self) -> List[SketchRow]:
+        """All persisted transit sketches as (scope, key, metric, counts) rows"""
+        if self._conn is None:
+            return []
+
+        with self._lock:
+            return self._conn.execute("SELECT scope, key, metric, counts FROM transit_sketches").fetchall()
+
+    def save_watch(self, keys: List[Tuple[str, str]]) -> None:
+        """Add shipments to the persisted watchlist"""
+        if self._conn is None or not keys:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO watchlist (tracking_number, carrier_code) VALUES (?, ?)", keys
+            )
+
+    def delete_watch(self, keys: List[Tuple[str, str]]) -> int:
+        """Remove shipments from the persisted watchlist; returns how many were watched"""
+        if self._conn is None or not keys:
+            return 0
+
+        with self._lock:
+            return self._conn.executemany(
+                "DELETE FROM watchlist WHERE tracking_number = ? AND carrier_code = ?", keys
+            ).rowcount
+
+    def load_watchlist(self) -> List[Tuple[str, str, Optional[float]]]:
+        """Watched shipments with their snapshot's fresh_until (None if never fetched)"""
+        if self._conn is None:
+            return []
+
+        with self._lock:
+            return self._conn.execute(
+                "SELECT w.tracking_number, w.carrier_code, s.fresh_until FROM watchlist w "
+                "LEFT JOIN shipments s "
+                "ON s.tracking_number = w.tracking_number AND s.carrier_code = w.carrier_code"
+            ).fetchall()
+
+    def delivered_histories(self, only_new: bool = True) -> Iterator[Tuple[str, str, Optional[str], History]]:
+        """
+        Dated (epoch, hub id) scans of delivered shipments, for offline ETA builds
+
+        Holds the store lock while iterating; meant for maintenance scripts.
+
+        Args:
+            only_new: Skip shipments already recorded by save_eta_build()
+
+        Yields:
+            (tracking_number, carrier_code, destination pincode, scans oldest first)
+        """
+        if self._conn is None:
+            return
+
+        query = (
+            "SELECT s.tracking_number, s.carrier_code, json_extract(s.extra, '$.destination_place.pincode'), "
+            "e.epoch, e.hub_id FROM shipments s JOIN events e "
+            "ON e.tracking_number = s.tracking_number AND e.carrier_code = s.carrier_code "
+            "WHERE s.status = 'Delivered' AND e.epoch IS NOT NULL"
+        )
+        if only_new:
+            query += (
+                " AND NOT EXISTS (SELECT 1 FROM eta_ingested i "
+                "WHERE i.tracking_number = s.tracking_number AND i.carrier_code = s.carrier_code)"
+            )
+        query += " ORDER BY s.tracking_number, s.carrier_code, e.epoch, e.id"
+
+        with self._lock:
+            current = None
+            history: History = []
+            for tracking_number, carrier_code, pincode, epoch, hub_id in self._conn.execute(query):
+                if current is None or current[:2] != (tracking_number, carrier_code):
+                    if current is not None:
+                        yield (*current, history)
+                    current = (tracking_number, carrier_code, pincode)
+                    history = []
+                history.append((epoch, hub_id))
+            if current is not None:
+                yield (*current, history)
+
+    def save_eta_build(self, rows: List[EtaRow], ingested: List[Tuple[str, str]], replace: bool = False) -> None:
+        """
+        Store rebuilt ETA sketches and the shipments they now include
+
+        Args:
+            rows: (hub id, region, carrier code, counts) sketches to upsert
+            ingested: Shipments added in this build
+            replace: Drop the previous index first (full rebuild)
+        """
+        if self._conn is None:
+            return
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if replace:
+                    self._conn.execute("DELETE FROM eta_sketches")
+                    self._conn.execute("DELETE FROM eta_ingested")
+                self._conn.executemany(
+                    "INSERT INTO eta_sketches (hub_id, region, carrier_code, counts) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (hub_id, region, carrier_code) DO UPDATE SET counts = excluded.counts",
+                    rows
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO eta_ingested (tracking_number, carrier_code) VALUES (?, ?)",
+                    ingested
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load_eta_sketches(self) -> List[EtaRow]:
+        """All ETA sketches as (hub id, region, carrier code, counts) rows"""
+        if self._conn is None:
+            return []
+
+        with self._lock:
+            return self._conn.execute("SELECT hub_id, region, carrier_code, counts FROM eta_sketches").fetchall()
+
+    def load_hubs(self) -> List[HubRow]:
+        """All persisted hubs as (id, key, name) rows"""
+        if self._conn is None:
+            return []
+
+        with self._lock:
+            return self._conn.execute("SELECT id, key, name FROM hubs ORDER BY id").fetchall()
+
+    def load_current_hops(self, since: float) -> List[Tuple[str, str, int, int]]:
+        """
+        Current hub of every undelivered shipment, from its stored timeline
+
+        Args:
+            since: Skip shipments that arrived at their hub before this epoch
+
+        Returns:
+            (tracking_number, carrier_code, hub id, arrived epoch) rows
+        """
+        if self._conn is None:
+            return []
+
+        with self._lock:
+            return self._conn.execute(
+                "SELECT tracking_number, carrier_code, hub_id, arrived FROM ("
+                "  SELECT tracking_number, carrier_code, "
+                "    json_extract(extra, '$.timeline.hops[#-1].hub_id') AS hub_id, "
+                "    json_extract(extra, '$.timeline.hops[#-1].arrived_epoch') AS arrived "
+                "  FROM shipments WHERE status != 'Delivered'"
+                ") WHERE hub_id IS NOT NULL AND arrived >= ?",
+                (since,)
+            ).fetchall()
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts (events are approximated by the highest row id)"""
+        if self._conn is None:
+            return {"enabled": False}
+
+        with self._lock:
+            shipments = self._conn.execute("SELECT COUNT(*) FROM shipments").fetchone()[0]
+            events = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+        return {"enabled": True, "shipments": shipments, "events": events}
+
+
+# Global store instance
+shipment_store = ShipmentStore(settings.STORE_PATH)
@@ -0,0 +1,219 @@
+"""
+Live subscriptions for DakDash
+In-process pub/sub pushing compact shipment deltas to WebSocket and SSE clients
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import settings
+from responses import dumps
+
+
+SubKey = Tuple[str, str]  # cache key: (TRACKING_NUMBER, carrier_code)
+
+
+def snapshot_summary(response_dict: dict) -> Dict[str, Any]:
+    """The fields of a snapshot that subscribers are sent when they change"""
+    events = response_dict["events"]
+    delay_info = response_dict.get("delay_info") or {}
+    eta = response_dict.get("eta")
+    return {
+        "status": response_dict["status"],
+        "delay_status": delay_info.get("status"),
+        "severity": delay_info.get("severity"),
+        "events": len(events),
+        "last_event": {
+            "location": events.location(0),
+            "status": events.status(0),
+            "timestamp": events.timestamps[0]
+        } if len(events) else None,
+        "eta": {
+            "earliest_epoch": eta["earliest_epoch"],
+            "expected_epoch": eta["expected_epoch"],
+            "latest_epoch": eta["latest_epoch"]
+        } if eta else None
+    }
+
+
+def snapshot_delta(previous: Optional[dict], current: dict) -> Dict[str, Any]:
+    """Summary fields that differ between two snapshots (all of them without a previous one)"""
+    summary = snapshot_summary(current)
+    if previous is None:
+        return summary
+    before = snapshot_summary(previous)
+    return {field: value for field, value in summary.items() if before[field] != value}
+
+
+class Subscriber:
+    """
+    One client connection and the messages waiting to be sent to it
+
+    Kept deliberately small, since most connections sit idle: pending
+    updates are coalesced per shipment (a slow client holds at most one
+    per subscribed number) and nothing is allocated until a message
+    arrives. The connection's single sender drains them with wait(),
+    so messages to one client are never written concurrently.
+    """
+
+    __slots__ = ("keys", "pending", "replies", "_waiter")
+
+    def __init__(self):
+        self.keys: Set[SubKey] = set()
+        # key -> (update message, its encoding; None once merged with a later update)
+        self.pending: Optional[Dict[SubKey, Tuple[dict, Optional[bytes]]]] = None
+        # Encoded replies to client commands, sent ahead of pending updates
+        self.replies: Optional[List[bytes]] = None
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def reply(self, message: dict) -> None:
+        """Queue a reply to a client command"""
+        if self.replies is None:
+            self.replies = []
+        self.replies.append(dumps(message))
+        self._wake()
+
+    def push(self, key: SubKey, message: dict, encoded: bytes) -> None:
+        if self.pending is None:
+            self.pending = {}
+
+        queued = self.pending.get(key)
+        if queued is None:
+            self.pending[key] = (message, encoded)
+        else:
+            # Not sent yet: fold this delta into it rather than queueing another
+            merged = dict(queued[0], changes={**queued[0]["changes"], **message["changes"]})
+            self.pending[key] = (merged, None)
+
+        self._wake()
+
+    def take(self) -> List[bytes]:
+        """Encoded replies, then pending updates oldest first; clears them"""
+        replies, self.replies = self.replies or [], None
+        pending, self.pending = self.pending, None
+        if not pending:
+            return replies
+        return replies + [encoded if encoded is not None else dumps(message) for message, encoded in pending.values()]
+
+    async def wait(self, timeout: Optional[float] = None) -> List[bytes]:
+        """Queued messages, waiting up to timeout seconds for one (empty on timeout)"""
+        if not self.pending and not self.replies:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiter = None
+        return self.take()
+
+
+class SubscriptionHub:
+    """
+    Which connections follow which shipments
+
+    publish() is called with every fresh snapshot (lookup, batch,
+    webhook or background refresh). Shipments nobody follows cost one
+    dict lookup; otherwise the delta is computed and encoded once and
+    handed to each subscriber of that shipment only.
+    """
+
+    def __init__(self, max_connections: int, max_numbers: int):
+        self.max_connections = max_connections
+        self.max_numbers = max_numbers
+        self._subscribers: Dict[SubKey, Set[Subscriber]] = {}
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+
+    def full(self) -> bool:
+        return self.connections >= self.max_connections
+
+    def connect(self) -> bool:
+        """Count a new connection; False if the worker is at SUBSCRIBE_MAX_CONNECTIONS"""
+        if self.full():
+            return False
+        self.connections += 1
+        return True
+
+    def disconnect(self, subscriber: Subscriber) -> None:
+        """Drop a closed connection and all its subscriptions"""
+        self.unsubscribe(subscriber, list(subscriber.keys))
+        self.connections -= 1
+
+    def subscribe(self, subscriber: Subscriber, keys: List[SubKey]) -> List[SubKey]:
+        """
+        Follow shipments, up to max_numbers per connection
+
+        Returns:
+            The keys now followed that were not before
+        """
+        added = []
+        for key in keys:
+            if key in subscriber.keys:
+                continue
+            if len(subscriber.keys) >= self.max_numbers:
+                break
+            subscriber.keys.add(key)
+            self._subscribers.setdefault(key, set()).add(subscriber)
+            added.append(key)
+        return added
+
+    def unsubscribe(self, subscriber: Subscriber, keys: List[SubKey]) -> None:
+        for key in keys:
+            subscriber.keys.discard(key)
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def send_current(self, subscriber: Subscriber, key: SubKey, response_dict: dict) -> None:
+        """Queue a shipment's full summary for one subscriber (on subscribe)"""
+        message = {
+            "type": "update",
+            "tracking_number": key[0],
+            "carrier": key[1],
+            "changes": snapshot_summary(response_dict)
+        }
+        subscriber.push(key, message, dumps(message))
+
+    def publish(self, key: SubKey, previous: Optional[dict], current: dict) -> None:
+        """
+        Push what changed in a shipment's snapshot to its subscribers
+
+        Args:
+            key: cache_key() of the shipment
+            previous: Snapshot it replaces, if known
+            current: Fresh snapshot
+        """
+        subscribers = self._subscribers.get(key)
+        if not subscribers:
+            return
+
+        changes = snapshot_delta(previous, current)
+        if not changes:
+            return
+
+        message = {"type": "update", "tracking_number": key[0], "carrier": key[1], "changes": changes}
+        encoded = dumps(message)
+        for subscriber in subscribers:
+            subscriber.push(key, message, encoded)
+        self.published += 1
+        self.delivered += len(subscribers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": self.connections,
+            "shipments": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered
+        }
+
+
+# Global subscription hub
+subscriptions = SubscriptionHub(settings.SUBSCRIBE_MAX_CONNECTIONS, settings.SUBSCRIBE_MAX_NUMBERS)
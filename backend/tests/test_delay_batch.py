@@ -0,0 +1,131 @@
+"""
+Parity tests for batch delay detection
+detect_delay_batch must report exactly what detect_delay reports for every shipment
+"""
+
+import random
+from array import array
+
+import numpy as np
+import pytest
+
+from delay_batch import (
+    DELAY_STATUSES, SEVERITIES, delivery_status_code, detect_delay_batch, last_two_hubs
+)
+from delay_detection import DELAY_THRESHOLDS, detect_delay
+from events import EventLog, NO_EPOCH
+from hubs import NO_HUB
+from timeline import analyze_timeline
+
+
+NOW = 1_790_000_000.0
+SHIPMENTS = 5000
+
+DELIVERY_STATUSES = ["pending", "Pending", "transit", "pickup", "delivered", "DELIVERED", "exception",
+                     "alert", "undelivered", "expired", "notfound", ""]
+# Rule thresholds in hours (defaults and learned values), probed exactly and either side
+EDGES = [0, 12, 20.3, 24, 36, 48, 60, 72, 96]
+
+
+def event_log(epochs: list, hubs: list) -> EventLog:
+    """Log with the given epochs (most recent first) and hub ids"""
+    count = len(epochs)
+    return EventLog(array("q", epochs), ("",) * count, ("",) * count, array("L", hubs), ("",) * count)
+
+
+def random_shipments(count: int, seed: int) -> list:
+    """(delivery_status, EventLog) pairs covering every rule and threshold edge"""
+    rng = random.Random(seed)
+    shipments = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            age = rng.choice(EDGES) * 3600 + rng.choice((-1, 0, 1)) * rng.choice((0.04, 1, 180))
+        else:
+            age = rng.uniform(-2, 200) * 3600
+        n_events = rng.choice((0, 1, 2, 2, 3))
+        epoch = int(NOW - age)
+        hub = rng.choice((NO_HUB, 1, 2, 3))
+        hubs = [hub, hub if rng.random() < 0.5 else rng.choice((NO_HUB, 1, 2, 3)), 4][:n_events]
+        epochs = [epoch - i * 3600 for i in range(n_events)]
+        if n_events and rng.random() < 0.05:
+            epochs[-1] = NO_EPOCH  # unparsed timestamps sort last
+        shipments.append((rng.choice(DELIVERY_STATUSES), event_log(epochs, hubs)))
+    return shipments
+
+
+def learned_thresholds(count: int, seed: int) -> list:
+    """Per-shipment thresholds, as transit_stats.thresholds() would produce"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        possible = rng.choice((12, 20.3, 48, 96))
+        rows.append(dict(
+            DELAY_THRESHOLDS,
+            possible_delay=possible,
+            delayed=possible + rng.choice((0, 6.5, 30)),
+            stuck=rng.choice((12, 36, 60))
+        ))
+    return rows
+
+
+def assert_parity(shipments: list, thresholds: list = None) -> None:
+    """Run both paths and fail listing the first shipments that differ"""
+    expected = [
+        detect_delay({"delivery_status": status}, analyze_timeline(events), now=NOW,
+                     thresholds=thresholds[i] if thresholds else None)
+        for i, (status, events) in enumerate(shipments)
+    ]
+
+    epochs = np.array([
+        events.epoch(0) if len(events) and events.epoch(0) is not None else np.nan
+        for _, events in shipments
+    ])
+    codes = np.array([delivery_status_code(status) for status, _ in shipments], dtype=np.int8)
+    hubs = np.array([last_two_hubs(events) for _, events in shipments], dtype=np.int64).reshape(-1, 2)
+    columns = None
+    if thresholds:
+        columns = {name: np.array([row[name] for row in thresholds]) for name in DELAY_THRESHOLDS}
+
+    result = detect_delay_batch(epochs, codes, hubs[:, 0], hubs[:, 1], now=NOW, thresholds=columns)
+
+    mismatches = []
+    for i, info in enumerate(expected):
+        got = (DELAY_STATUSES[result["status"][i]], SEVERITIES[result["severity"][i]],
+               float(result["hours_since_update"][i]))
+        want = (info["status"], info["severity"], float(info["hours_since_update"]))
+        if got != want:
+            mismatches.append(f"#{i} {shipments[i][0]!r} hubs={list(shipments[i][1].hub_ids)}: scalar {want}, batch {got}")
+
+    assert not mismatches, f"{len(mismatches)} mismatches:\n" + "\n".join(mismatches[:10])
+
+
+@pytest.mark.parametrize("seed", [19, 20])
+def test_random_shipments_default_thresholds(seed):
+    assert_parity(random_shipments(SHIPMENTS, seed))
+
+
+def test_random_shipments_learned_thresholds():
+    assert_parity(random_shipments(SHIPMENTS, 21), learned_thresholds(SHIPMENTS, 22))
+
+
+@pytest.mark.parametrize("status", ["pending", "transit", "exception", "delivered"])
+@pytest.mark.parametrize("rule", ["pending", "possible_delay", "delayed", "stuck"])
+def test_threshold_boundaries(status, rule):
+    # Exactly on a threshold is not over it; a second either side flips the rule
+    edge = DELAY_THRESHOLDS[rule] * 3600
+    shipments = [
+        (status, event_log([int(NOW - edge + offset), int(NOW - edge + offset) - 3600], hubs))
+        for offset in (-1, 0, 1)
+        for hubs in ([1, 1], [1, 2], [NO_HUB, NO_HUB])
+    ]
+    assert_parity(shipments)
+
+
+def test_shipments_without_dated_events():
+    shipments = [
+        ("transit", event_log([], [])),
+        ("pending", event_log([NO_EPOCH], [1])),
+        ("delivered", event_log([], [])),
+        ("exception", event_log([NO_EPOCH, NO_EPOCH], [2, 2])),
+    ]
+    assert_parity(shipments)
@@ -0,0 +1,75 @@
+"""
+Upstream priority tests
+Interactive lookups must get the next rate-limit token ahead of queued batch work
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import main
+import trackingmore
+from bulkhead import Bulkhead
+from carriers import CarrierServiceFactory
+from rate_limit import TokenBucket
+
+
+CARRIER = "india-post"
+INTERACTIVE_NUMBER = "RM900000000IN"
+BATCHES = [[f"RM9{chunk}{i:07d}IN" for i in range(3)] for chunk in range(1, 4)]
+NUMBERS = [INTERACTIVE_NUMBER] + [number for chunk in BATCHES for number in chunk]
+
+
+def tracking_data(number: str) -> dict:
+    return {
+        "tracking_number": number,
+        "courier_code": CARRIER,
+        "delivery_status": "transit",
+        "origin_info": {"trackinfo": [{
+            "location": "Delhi Hub",
+            "tracking_detail": "Item Bagged",
+            "checkpoint_status": "transit",
+            "checkpoint_date": "2026-10-10T10:00:00+05:30"
+        }]}
+    }
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Mock TrackingMore at 20 tokens/s with two bulkhead slots; yields the numbers requested, in order"""
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        numbers = request.url.params["tracking_numbers"].split(",")
+        requested.append(numbers)
+        return httpx.Response(200, json={"meta": {"code": 200}, "data": [tracking_data(n) for n in numbers]})
+
+    monkeypatch.setattr(trackingmore, "upstream_limiter", TokenBucket(20, 1))
+    monkeypatch.setattr(CarrierServiceFactory.get_service(CARRIER), "bulkhead", Bulkhead(CARRIER, 2, 45))
+    monkeypatch.setattr(trackingmore, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    # Already registered, so each lookup is a single get
+    for number in NUMBERS:
+        trackingmore.registrations.add(number, CARRIER)
+    yield requested
+    for number in NUMBERS:
+        trackingmore.registrations.discard(number, CARRIER)
+
+
+def test_interactive_lookup_overtakes_queued_batch_chunks(upstream):
+    async def run():
+        # Empty the bucket, then queue more batch chunks than the carrier has slots
+        await trackingmore.upstream_limiter.acquire()
+        chunks = [asyncio.ensure_future(main.fetch_tracking_chunk(chunk, CARRIER)) for chunk in BATCHES]
+        await asyncio.sleep(0.01)
+
+        response = await main.fetch_tracking(INTERACTIVE_NUMBER, CARRIER)
+        await asyncio.gather(*chunks)
+        await trackingmore.close_client()
+        return response
+
+    response = asyncio.run(run())
+
+    assert response["tracking_number"] == INTERACTIVE_NUMBER
+    assert upstream[0] == [INTERACTIVE_NUMBER]
+    assert sorted(upstream[1:]) == BATCHES
@@ -0,0 +1,95 @@
+"""
+Timeline analysis for DakDash
+Single-pass per-hop dwell and transit times over a shipment's event log
+"""
+
+from typing import Any, Dict, List
+
+from events import EventLog, NO_EPOCH
+from hubs import hub_index, NO_HUB
+
+
+def _hours(seconds: float) -> float:
+    return round(seconds / 3600, 1)
+
+
+def _hop(hub_id: int, scans: int, arrived: int, departed: int, transit_from: int) -> Dict[str, Any]:
+    dated = arrived != NO_EPOCH
+    return {
+        "hub_id": hub_id if hub_id != NO_HUB else None,
+        "hub": hub_index.name(hub_id) or None,
+        "scans": scans,
+        "arrived_epoch": arrived if dated else None,
+        "departed_epoch": departed if dated else None,
+        "dwell_hours": _hours(departed - arrived) if dated else None,
+        "transit_hours": _hours(arrived - transit_from) if dated and transit_from != NO_EPOCH else None
+    }
+
+
+def analyze_timeline(events: EventLog) -> Dict[str, Any]:
+    """
+    Split a shipment's scans into hops and measure them
+
+    A hop is a run of consecutive scans at the same hub (unknown hubs
+    form hops of their own). Walks the log once, oldest scan first,
+    reading the epoch and hub id columns directly; only one dict per hop
+    is allocated. Scans without a parsed timestamp still count towards
+    their hop but contribute no times.
+
+    Args:
+        events: Normalized event log, most recent first
+
+    Returns:
+        Dict with "hops" (oldest first: hub_id, hub, scans, arrived_epoch,
+        departed_epoch, dwell_hours and transit_hours from the previous
+        hop), first/last_scan_epoch, total_hours between them, and the
+        longest gap between two scans with the hub it started at
+    """
+    hops: List[Dict[str, Any]] = []
+
+    hop_hub = NO_HUB
+    hop_scans = 0
+    hop_arrived = hop_departed = NO_EPOCH
+    previous_departed = NO_EPOCH
+
+    first_epoch = last_epoch = NO_EPOCH
+    last_hub = NO_HUB
+    stall = 0
+    stall_hub = NO_HUB
+
+    for epoch, hub_id in zip(reversed(events.epochs), reversed(events.hub_ids)):
+        if hop_scans and hub_id != hop_hub:
+            hops.append(_hop(hop_hub, hop_scans, hop_arrived, hop_departed, previous_departed))
+            if hop_departed != NO_EPOCH:
+                previous_departed = hop_departed
+            hop_scans = 0
+            hop_arrived = hop_departed = NO_EPOCH
+
+        hop_hub = hub_id
+        hop_scans += 1
+
+        if epoch != NO_EPOCH:
+            if hop_arrived == NO_EPOCH:
+                hop_arrived = epoch
+            hop_departed = epoch
+
+            if last_epoch == NO_EPOCH:
+                first_epoch = epoch
+            elif epoch - last_epoch > stall:
+                stall = epoch - last_epoch
+                stall_hub = last_hub
+            last_epoch = epoch
+            last_hub = hub_id
+
+    if hop_scans:
+        hops.append(_hop(hop_hub, hop_scans, hop_arrived, hop_departed, previous_departed))
+
+    dated = last_epoch != NO_EPOCH
+    return {
+        "hops": hops,
+        "first_scan_epoch": first_epoch if dated else None,
+        "last_scan_epoch": last_epoch if dated else None,
+        "total_hours": _hours(last_epoch - first_epoch) if dated else None,
+        "longest_stall_hours": _hours(stall) if stall else None,
+        "longest_stall_hub": (hub_index.name(stall_hub) or None) if stall else None
+    }
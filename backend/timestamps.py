@@ -0,0 +1,149 @@
+"""
+Timestamp parsing for DakDash
+Parses every date format TrackingMore returns for Indian carriers into epoch seconds
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+
+# Indian carriers report local time; naive timestamps are read as IST
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+# DD-MM-YYYY / DD/MM/YYYY / DD.MM.YYYY with optional HH:MM[:SS] [AM|PM]
+_DAY_FIRST = re.compile(
+    r"(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})"
+    r"(?:[ T,]+(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp][Mm])?)?$"
+)
+
+# Textual month formats seen on India Post / Speed Post checkpoints
+_STRPTIME_FORMATS = (
+    "%d %b %Y %H:%M:%S",
+    "%d %b %Y %H:%M",
+    "%d %b %Y",
+    "%d-%b-%Y %H:%M:%S",
+    "%d-%b-%Y %H:%M",
+    "%d-%b-%Y",
+    "%b %d, %Y %I:%M %p",
+    "%b %d, %Y %H:%M",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+)
+
+
+# Seconds east of UTC per fixed-offset tzinfo seen so far (a handful in
+# practice); None is a naive timestamp, read as IST
+_OFFSETS: Dict[Optional[timezone], float] = {None: IST.utcoffset(None).total_seconds()}
+
+# Proleptic ordinal of 1970-01-01
+_EPOCH_ORDINAL = 719163
+
+
+def _epoch(dt: datetime) -> float:
+    """
+    Epoch seconds of a datetime, reading naive ones as IST
+
+    Same result as dt.timestamp() on the aware datetime, which would be
+    the most expensive step of parsing a timestamp; fixed UTC offsets
+    are looked up once and the rest is integer arithmetic.
+    """
+    tz = dt.tzinfo
+    offset = _OFFSETS.get(tz)
+    if offset is None:
+        if not isinstance(tz, timezone):
+            return dt.timestamp()
+        offset = _OFFSETS[tz] = dt.utcoffset().total_seconds()
+    return (
+        (dt.toordinal() - _EPOCH_ORDINAL) * 86400
+        + dt.hour * 3600 + dt.minute * 60 + dt.second
+        + dt.microsecond / 1e6
+        - offset
+    )
+
+
+def _parse_iso(value: str) -> float:
+    # Python 3.11+ reads a trailing "Z" as UTC
+    return _epoch(datetime.fromisoformat(value))
+
+
+def _parse_day_first(value: str) -> float:
+    match = _DAY_FIRST.match(value)
+    if match is None:
+        raise ValueError(value)
+
+    day, month, year, hour, minute, second, meridiem = match.groups()
+    hour = int(hour or 0)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.upper() == "PM" else 0)
+
+    return _epoch(datetime(int(year), int(month), int(day), hour, int(minute or 0), int(second or 0)))
+
+
+def _strptime_parser(fmt: str) -> Callable[[str], float]:
+    return lambda value: _epoch(datetime.strptime(value, fmt))
+
+
+class TimestampParser:
+    """
+    Multi-format timestamp parser that remembers the last format that worked
+
+    A carrier's payloads use one date format almost everywhere, so the
+    format that matched last is tried first and a whole event history
+    normally costs one attempt per event.
+    """
+
+    __slots__ = ("_parsers", "_last")
+
+    def __init__(self):
+        # Each parser returns epoch seconds or raises ValueError
+        self._parsers: List[Callable[[str], float]] = [
+            _parse_iso,
+            _parse_day_first,
+            *(_strptime_parser(fmt) for fmt in _STRPTIME_FORMATS)
+        ]
+        self._last = 0
+
+    def parse(self, value: Optional[str]) -> Optional[float]:
+        """
+        Parse a timestamp string
+
+        Args:
+            value: Timestamp as sent by TrackingMore (any supported format)
+
+        Returns:
+            Unix epoch seconds, or None if empty or unrecognised
+        """
+        if not value:
+            return None
+        value = value.strip()
+
+        parsers = self._parsers
+        last = self._last
+        try:
+            return parsers[last](value)
+        except (ValueError, TypeError, OverflowError):
+            pass
+
+        for index, parser in enumerate(parsers):
+            if index == last:
+                continue
+            try:
+                epoch = parser(value)
+            except (ValueError, TypeError, OverflowError):
+                continue
+            self._last = index
+            return epoch
+
+        return None
+
+    __call__ = parse
+
+
+# Shared parser for timestamps outside a carrier's own normalizer
+default_parser = TimestampParser()
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Parse a timestamp string to epoch seconds (see TimestampParser.parse)"""
+    return default_parser.parse(value)
@@ -0,0 +1,243 @@
+"""
+TrackingMore API client for DakDash
+Application-scoped HTTP connection pool shared by all upstream calls
+"""
+
+import httpx
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple, Union
+
+from bulkhead import Bulkhead
+from config import settings
+from rate_limit import upstream_limiter, queue_timeout, INTERACTIVE
+from circuit_breaker import upstream_breaker
+
+
+TRACKINGMORE_BASE_URL = "https://api.trackingmore.com/v4"
+CREATE_URL = f"{TRACKINGMORE_BASE_URL}/trackings/create"
+GET_URL = f"{TRACKINGMORE_BASE_URL}/trackings/get"
+BATCH_CREATE_URL = f"{TRACKINGMORE_BASE_URL}/trackings/batch"
+
+# Upstream limit on numbers per batch create / multi-number get call
+MAX_BATCH_SIZE = 40
+
+# TrackingMore meta code for "tracking number already exists"
+ALREADY_EXISTS_CODE = 4101
+
+# Shared client, created once in the FastAPI lifespan hook
+_client: Optional[httpx.AsyncClient] = None
+
+# courier code -> that carrier's bulkhead
+BulkheadLookup = Callable[[str], Bulkhead]
+
+# Set by carriers.py, which imports this module
+_bulkheads: Optional[BulkheadLookup] = None
+
+
+class RegistrationCache:
+    """
+    Bounded LRU set of (tracking_number, courier_code) pairs known to be
+    registered with TrackingMore, so lookups can skip /trackings/create
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+
+    @staticmethod
+    def _key(tracking_number: str, courier_code: str) -> Tuple[str, str]:
+        return (tracking_number.strip().upper(), courier_code.lower())
+
+    def __contains__(self, item: Tuple[str, str]) -> bool:
+        key = self._key(*item)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return True
+        return False
+
+    def add(self, tracking_number: str, courier_code: str) -> None:
+        key = self._key(tracking_number, courier_code)
+        self._entries[key] = None
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, tracking_number: str, courier_code: str) -> None:
+        self._entries.pop(self._key(tracking_number, courier_code), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Numbers already registered upstream (create + wait can be skipped)
+registrations = RegistrationCache(settings.REGISTRATION_CACHE_SIZE)
+
+
+def build_client() -> httpx.AsyncClient:
+    """
+    Build the pooled upstream HTTP client from settings
+
+    Returns:
+        httpx.AsyncClient with keep-alive pool limits applied
+    """
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=limits,
+        http2=settings.HTTP2_ENABLED,
+        headers={
+            "Tracking-Api-Key": settings.TRACKINGMORE_API_KEY,
+            "Content-Type": "application/json"
+        }
+    )
+
+
+async def start_client() -> httpx.AsyncClient:
+    """Open the shared client (called on application startup)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and release pooled connections (called on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared upstream client
+
+    Falls back to building one lazily so scripts that never run the
+    lifespan hook still reuse a single pool.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+def attach_bulkheads(lookup: BulkheadLookup) -> None:
+    """Run each upstream request inside its carrier's bulkhead"""
+    global _bulkheads
+    _bulkheads = lookup
+
+
+async def acquire_quota(priority: int) -> None:
+    """Wait for an upstream rate-limit token (raises RateLimitExceeded on timeout)"""
+    await upstream_limiter.acquire(priority, queue_timeout(priority))
+
+
+async def send(
+    method: str,
+    url: str,
+    courier_code: str,
+    priority: int = INTERACTIVE,
+    **kwargs
+) -> httpx.Response:
+    """
+    Send one upstream request through the circuit breaker, rate limiter and bulkhead
+
+    Only the HTTP request itself holds a slot in the carrier's bulkhead;
+    waiting for a rate-limit token does not, so queued batch and
+    background work cannot keep interactive lookups from the token queue.
+
+    Raises:
+        CircuitOpenError: If the circuit is open (no token is spent)
+        RateLimitExceeded: If no rate-limit token became available in time
+        BulkheadTimeout: If the carrier's slot wait plus the request ran over its budget
+    """
+    probe = upstream_breaker.before_call()
+    admitted = time.monotonic()
+
+    try:
+        await acquire_quota(priority)
+    except BaseException:
+        if probe:
+            upstream_breaker.release()
+        raise
+
+    started = time.monotonic()
+    try:
+        if _bulkheads is None:
+            response = await get_client().request(method, url, **kwargs)
+        else:
+            response = await _bulkheads(courier_code).call(get_client().request, method, url, **kwargs)
+        if response.status_code >= 500 or response.status_code == 429:
+            upstream_breaker.record_failure(admitted)
+        else:
+            upstream_breaker.record_success(time.monotonic() - started, admitted)
+    except Exception:
+        # Transport errors, but also bad encodings, redirect loops or a
+        # client closed during shutdown
+        upstream_breaker.record_failure(admitted)
+        raise
+    finally:
+        # Never keep the half-open probe slot, even when cancelled
+        if probe:
+            upstream_breaker.release()
+    return response
+
+
+async def create_tracking(tracking_number: str, courier_code: str, priority: int = INTERACTIVE) -> httpx.Response:
+    """Register a tracking number with TrackingMore"""
+    payload = {
+        "tracking_number": tracking_number,
+        "courier_code": courier_code
+    }
+    return await send("POST", CREATE_URL, courier_code, priority, json=payload)
+
+
+async def register_tracking(tracking_number: str, courier_code: str, priority: int = INTERACTIVE) -> bool:
+    """
+    Create the tracking upstream and remember the registration
+
+    Returns:
+        True if TrackingMore already had this number (no wait needed)
+    """
+    response = await create_tracking(tracking_number, courier_code, priority)
+
+    try:
+        code = response.json().get("meta", {}).get("code")
+    except ValueError:
+        code = None
+
+    if code in (200, ALREADY_EXISTS_CODE):
+        registrations.add(tracking_number, courier_code)
+    return code == ALREADY_EXISTS_CODE
+
+
+async def get_trackings(
+    tracking_numbers: Union[str, List[str]],
+    courier_code: str,
+    priority: int = INTERACTIVE
+) -> httpx.Response:
+    """Fetch tracking data for one or more (comma-separated) tracking numbers"""
+    if not isinstance(tracking_numbers, str):
+        tracking_numbers = ",".join(tracking_numbers)
+
+    params = {
+        "tracking_numbers": tracking_numbers,
+        "courier_code": courier_code
+    }
+    return await send("GET", GET_URL, courier_code, priority, params=params)
+
+
+async def batch_create(tracking_numbers: List[str], courier_code: str, priority: int = INTERACTIVE) -> httpx.Response:
+    """Register up to MAX_BATCH_SIZE tracking numbers in one call"""
+    payload = [
+        {"tracking_number": number, "courier_code": courier_code}
+        for number in tracking_numbers
+    ]
+    return await send("POST", BATCH_CREATE_URL, courier_code, priority, json=payload)
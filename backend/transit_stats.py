@@ -0,0 +1,265 @@
+"""
+Transit statistics for DakDash
+Bounded-memory streaming quantiles of dwell and transit times per hub, lane and carrier
+"""
+
+import math
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+
+
+# Log-spaced buckets: bucket 0 holds durations under MIN_HOURS, bucket b >= 1
+# holds [MIN_HOURS * GAMMA**(b-1), MIN_HOURS * GAMMA**b), so any quantile is
+# reported within about 6% of the true value (the top bucket is open-ended,
+# ~8 months and up)
+MIN_HOURS = 0.05
+GAMMA = 1.125
+BUCKETS = 100
+_LOG_GAMMA = math.log(GAMMA)
+
+# Metrics kept per scope
+DWELL = "dwell"  # first to last scan at a hub
+TRANSIT = "transit"  # last scan at a hub to the first scan at the next one
+
+# (scope, key, metric), e.g. ("hub", "42", "dwell"), ("lane", "11-56", "transit"), ("carrier", "india-post", "dwell")
+SketchKey = Tuple[str, str, str]
+SketchRow = Tuple[str, str, str, bytes]
+
+
+class QuantileSketch:
+    """
+    Fixed-size log-bucketed histogram of durations in hours
+
+    Constant memory (BUCKETS counters) no matter how many samples are
+    added, and serializable to a small blob for the shipment store.
+    """
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, counts: Optional[array] = None):
+        self.counts = counts if counts is not None else array("I", bytes(4 * BUCKETS))
+        self.total = sum(self.counts)
+
+    def add(self, hours: float) -> None:
+        if hours < MIN_HOURS:
+            bucket = 0
+        else:
+            bucket = min(BUCKETS - 1, 1 + int(math.log(hours / MIN_HOURS) / _LOG_GAMMA))
+        self.counts[bucket] += 1
+        self.total += 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add another sketch's samples to this one"""
+        for bucket, count in enumerate(other.counts):
+            if count:
+                self.counts[bucket] += count
+        self.total += other.total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile in hours (geometric bucket midpoint), None if empty"""
+        if not self.total:
+            return None
+
+        rank = q * (self.total - 1)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen > rank:
+                return 0.0 if bucket == 0 else MIN_HOURS * GAMMA ** (bucket - 0.5)
+        return MIN_HOURS * GAMMA ** (BUCKETS - 1.5)
+
+    def to_bytes(self) -> bytes:
+        return self.counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "QuantileSketch":
+        counts = array("I")
+        counts.frombytes(blob)
+        if len(counts) != BUCKETS:
+            raise ValueError("sketch size mismatch")
+        return cls(counts)
+
+
+def lane_key(origin_place: Optional[dict], destination_place: Optional[dict]) -> Optional[str]:
+    """Lane from the first two digits of the origin and destination PINs"""
+    if not origin_place or not destination_place:
+        return None
+    return f"{origin_place['pincode'][:2]}-{destination_place['pincode'][:2]}"
+
+
+class TransitStats:
+    """
+    Dwell and transit quantile sketches per hub, per lane and per carrier
+
+    ingest() takes each fresh timeline and adds only the hops completed
+    since the previous snapshot, so refreshing a shipment never counts a
+    hop twice. Memory is bounded by max_sketches, independent of how many
+    shipments flow through. Samples added since the last save are also
+    kept apart and handed to the shipment store via take_unsaved(), which
+    adds them to the stored sketches, so workers sharing the store never
+    overwrite each other's samples. load() restores the totals on startup.
+    """
+
+    def __init__(self, max_sketches: int, min_samples: int):
+        self.max_sketches = max_sketches
+        self.min_samples = min_samples
+        self._sketches: Dict[SketchKey, QuantileSketch] = {}
+        self._unsaved: Dict[SketchKey, QuantileSketch] = {}  # samples not yet in the store
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+
+    def _add(self, key: SketchKey, hours: float) -> None:
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            if len(self._sketches) >= self.max_sketches:
+                return
+            sketch = self._sketches[key] = QuantileSketch()
+        sketch.add(hours)
+
+        unsaved = self._unsaved.get(key)
+        if unsaved is None:
+            unsaved = self._unsaved[key] = QuantileSketch()
+        unsaved.add(hours)
+
+    def ingest(self, timeline: dict, carrier_code: str, lane: Optional[str], since: Optional[float] = None) -> int:
+        """
+        Add the hops a shipment completed after `since`
+
+        A hop is complete once the next hop has been scanned; its dwell
+        and the transit to the next hop are then final.
+
+        Args:
+            timeline: analyze_timeline() result
+            carrier_code: Normalized carrier code
+            lane: lane_key() for the shipment, if both PINs are known
+            since: Latest scan epoch already ingested for this shipment
+
+        Returns:
+            Number of hops added
+        """
+        hops = timeline["hops"]
+        added = 0
+        with self._lock:
+            for hop, next_hop in zip(hops, hops[1:]):
+                arrived = next_hop["arrived_epoch"]
+                if arrived is None or (since is not None and arrived <= since):
+                    continue
+
+                scopes = [("carrier", carrier_code)]
+                if lane:
+                    scopes.append(("lane", lane))
+                if hop["hub_id"] is not None:
+                    scopes.append(("hub", str(hop["hub_id"])))
+
+                for scope, key in scopes:
+                    if hop["dwell_hours"] is not None:
+                        self._add((scope, key, DWELL), hop["dwell_hours"])
+                    if next_hop["transit_hours"] is not None:
+                        self._add((scope, key, TRANSIT), next_hop["transit_hours"])
+                added += 1
+        return added
+
+    def _pick(self, candidates: List[Tuple[str, str]], metric: str) -> Tuple[Optional[QuantileSketch], str]:
+        """Most specific sketch with at least min_samples"""
+        for scope, key in candidates:
+            sketch = self._sketches.get((scope, key, metric))
+            if sketch is not None and sketch.total >= self.min_samples:
+                return sketch, scope
+        return None, "default"
+
+    @staticmethod
+    def _candidates(timeline: dict, carrier_code: str, lane: Optional[str]) -> List[Tuple[str, str]]:
+        """Scopes for a shipment, most specific first: current hub, lane, carrier"""
+        candidates = []
+        hops = timeline["hops"]
+        if hops and hops[-1]["hub_id"] is not None:
+            candidates.append(("hub", str(hops[-1]["hub_id"])))
+        if lane:
+            candidates.append(("lane", lane))
+        candidates.append(("carrier", carrier_code))
+        return candidates
+
+    def typical_transit(self, timeline: dict, carrier_code: str, lane: Optional[str]) -> Optional[float]:
+        """Median hours until the next scan elsewhere, for a shipment at its current hub (None if unknown)"""
+        sketch, _ = self._pick(self._candidates(timeline, carrier_code, lane), TRANSIT)
+        return sketch.quantile(0.5) if sketch is not None else None
+
+    def thresholds(self, timeline: dict, carrier_code: str, lane: Optional[str], defaults: Dict[str, float]) -> Dict[str, object]:
+        """
+        Delay thresholds for a shipment at its current hub
+
+        Possible delay and delayed come from the configured percentiles of
+        transit times out of the current hub (else its lane, else its
+        carrier); stuck comes from dwell times the same way. Anything
+        without enough samples keeps its default.
+
+        Args:
+            timeline: analyze_timeline() result
+            carrier_code: Normalized carrier code
+            lane: lane_key() for the shipment
+            defaults: Fallback thresholds in hours (pending, possible_delay, delayed, stuck)
+
+        Returns:
+            Threshold hours keyed like defaults, plus the scope each came from
+        """
+        candidates = self._candidates(timeline, carrier_code, lane)
+        floor = settings.DELAY_MIN_THRESHOLD_HOURS
+        thresholds = dict(defaults)
+
+        transit, transit_basis = self._pick(candidates, TRANSIT)
+        if transit is not None:
+            thresholds["possible_delay"] = max(floor, round(transit.quantile(settings.DELAY_POSSIBLE_PERCENTILE), 1))
+            thresholds["delayed"] = max(thresholds["possible_delay"], round(transit.quantile(settings.DELAY_DELAYED_PERCENTILE), 1))
+
+        dwell, dwell_basis = self._pick(candidates, DWELL)
+        if dwell is not None:
+            thresholds["stuck"] = max(floor, round(dwell.quantile(settings.DELAY_STUCK_PERCENTILE), 1))
+
+        thresholds["basis"] = transit_basis
+        thresholds["stuck_basis"] = dwell_basis
+        return thresholds
+
+    def load(self, rows: List[SketchRow]) -> None:
+        """Restore persisted sketches (called on startup)"""
+        with self._lock:
+            for scope, key, metric, blob in rows:
+                try:
+                    self._sketches[(scope, key, metric)] = QuantileSketch.from_bytes(blob)
+                except ValueError:
+                    print(f"Ignoring transit sketch {scope}/{key}/{metric}: unrecognised format")
+
+    def save_due(self) -> bool:
+        """True once per save interval, for periodic persistence"""
+        now = time.monotonic()
+        if now - self._last_save < settings.TRANSIT_STATS_SAVE_INTERVAL:
+            return False
+        self._last_save = now
+        return True
+
+    def take_unsaved(self) -> List[SketchRow]:
+        """Samples added since the last call, serialized per sketch for ShipmentStore.save_sketches()"""
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+            return [(*key, sketch.to_bytes()) for key, sketch in unsaved.items()]
+
+    def requeue(self, rows: List[SketchRow]) -> None:
+        """Keep samples whose save failed for the next one"""
+        with self._lock:
+            for scope, key, metric, blob in rows:
+                sketch = QuantileSketch.from_bytes(blob)
+                unsaved = self._unsaved.get((scope, key, metric))
+                if unsaved is None:
+                    self._unsaved[(scope, key, metric)] = sketch
+                else:
+                    unsaved.merge(sketch)
+
+    def stats(self) -> Dict[str, int]:
+        return {"sketches": len(self._sketches), "unsaved": len(self._unsaved)}
+
+
+# Global transit statistics
+transit_stats = TransitStats(settings.TRANSIT_STATS_MAX_SKETCHES, settings.TRANSIT_STATS_MIN_SAMPLES)
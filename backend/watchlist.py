@@ -0,0 +1,272 @@
+"""
+Shipment watchlist for DakDash
+Refreshes watched shipments in the background on an adaptive per-shipment schedule
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from config import settings
+from transit_stats import transit_stats, lane_key
+import trackingmore
+
+
+WatchKey = Tuple[str, str]  # cache key: (TRACKING_NUMBER, carrier_code)
+WatchRow = Tuple[str, str, Optional[float]]  # (tracking_number, carrier_code, fresh_until)
+
+# Statuses that will not change again
+FINAL_STATUSES = {"Delivered", "Expired"}
+
+# Not moving yet: nothing to see until the carrier scans the parcel
+WAITING_STATUSES = {"Pending", "Info Received", "Not Found"}
+
+
+def refresh_interval(response_dict: dict, carrier_code: str, now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds until a watched shipment is worth refreshing again
+
+    - delivered/expired: never (None)
+    - pending: WATCH_INTERVAL_PENDING
+    - out for delivery, ready for pickup or an ETA within
+      WATCH_NEAR_DELIVERY_HOURS: WATCH_INTERVAL_NEAR_DELIVERY
+    - in transit: when the next scan is typically due, from the learned
+      transit time out of its current hub, kept between the near-delivery
+      interval and WATCH_INTERVAL_TRANSIT_MAX
+    """
+    now = time.time() if now is None else now
+    status = response_dict["status"]
+
+    if status in FINAL_STATUSES:
+        return None
+    if status in WAITING_STATUSES:
+        return settings.WATCH_INTERVAL_PENDING
+
+    events = response_dict["events"]
+    latest = f"{events.location(0)} {events.status(0)}".lower() if len(events) else ""
+    eta = response_dict.get("eta")
+    if (
+        status == "Ready for Pickup"
+        or "out for delivery" in latest
+        or (eta and eta["expected_epoch"] - now < settings.WATCH_NEAR_DELIVERY_HOURS * 3600)
+    ):
+        return settings.WATCH_INTERVAL_NEAR_DELIVERY
+
+    timeline = response_dict.get("timeline")
+    next_scan = None
+    if timeline and timeline["last_scan_epoch"] is not None:
+        lane = lane_key(response_dict.get("origin_place"), response_dict.get("destination_place"))
+        typical = transit_stats.typical_transit(timeline, carrier_code, lane)
+        if typical is not None:
+            next_scan = timeline["last_scan_epoch"] + typical * 3600
+
+    if next_scan is None:
+        return settings.WATCH_INTERVAL_TRANSIT_MAX
+    return min(max(next_scan - now, settings.WATCH_INTERVAL_NEAR_DELIVERY), settings.WATCH_INTERVAL_TRANSIT_MAX)
+
+
+class Watchlist:
+    """
+    Watched shipments and the background task that refreshes them
+
+    Each shipment has a next-refresh time in a heap. The scheduler sleeps
+    until the earliest one is due, takes up to WATCH_MAX_PER_CYCLE due
+    shipments, groups them by carrier into TrackingMore multi-number
+    chunks and hands each chunk to the refresh callback, which fetches at
+    BACKGROUND priority so user lookups keep first claim on the quota.
+    Every fresh snapshot (refresh, user lookup or webhook) reschedules
+    its shipment via reschedule(). With the shipment store, each pass
+    first re-reads the persisted watchlist, so watches added or removed
+    through other workers reach the one worker running the scheduler.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._due: Dict[WatchKey, float] = {}
+        self._heap: List[Tuple[float, WatchKey]] = []  # may hold outdated entries
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshed = 0
+        self.failed = 0
+
+    def __contains__(self, key: WatchKey) -> bool:
+        return key in self._due
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def _schedule(self, key: WatchKey, due: float) -> None:
+        earliest = self._heap[0][0] if self._heap else None
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, key))
+        if len(self._heap) > 4 * len(self._due) + 64:
+            # Drop entries outdated by reschedules
+            self._heap = [(when, watched) for watched, when in self._due.items()]
+            heapq.heapify(self._heap)
+        if self._wakeup is not None and (earliest is None or due < earliest):
+            self._wakeup.set()
+
+    def add(self, key: WatchKey, due: Optional[float] = None) -> bool:
+        """
+        Watch a shipment (no-op if already watched)
+
+        Args:
+            key: cache_key() of the shipment
+            due: First refresh (defaults to now)
+
+        Returns:
+            False if the watchlist is full
+        """
+        if key in self._due:
+            return True
+        if len(self._due) >= self.max_entries:
+            return False
+        self._schedule(key, time.time() if due is None else due)
+        return True
+
+    def remove(self, key: WatchKey) -> bool:
+        """Stop watching; its heap entry is skipped when it comes up"""
+        return self._due.pop(key, None) is not None
+
+    def reschedule(self, key: WatchKey, response_dict: dict) -> float:
+        """
+        Plan the next refresh after a fresh snapshot of the shipment
+
+        Returns:
+            Seconds until that refresh (0 if not watched, or no longer
+            watched because the shipment reached a final status)
+        """
+        if key not in self._due:
+            return 0
+        interval = refresh_interval(response_dict, key[1])
+        if interval is None:
+            self.remove(key)
+            return 0
+        self._schedule(key, time.time() + interval)
+        return interval
+
+    def defer(self, key: WatchKey, delay: float) -> None:
+        """Push a watched shipment's next refresh delay seconds out"""
+        if key in self._due:
+            self._schedule(key, time.time() + delay)
+
+    def next_due(self, key: WatchKey) -> Optional[float]:
+        return self._due.get(key)
+
+    def sync(self, rows: List[WatchRow], known: Set[WatchKey]) -> None:
+        """
+        Match the watched set to the persisted watchlist
+
+        Args:
+            rows: Persisted rows; shipments new here are due at fresh_until
+            known: Shipments watched before the rows were read; only these
+                   are dropped when missing, so ones added meanwhile stay
+        """
+        persisted = set()
+        for tracking_number, carrier_code, fresh_until in rows:
+            key = (tracking_number, carrier_code)
+            persisted.add(key)
+            if key not in self._due:
+                self.add(key, due=fresh_until)
+        for key in known - persisted:
+            self.remove(key)
+
+    def take_due(self, now: float, limit: int) -> List[WatchKey]:
+        """
+        Pop up to limit shipments due by now
+
+        Taken shipments are provisionally rescheduled WATCH_RETRY_INTERVAL
+        ahead, so a refresh that fails is retried later rather than lost.
+        """
+        taken = []
+        while self._heap and len(taken) < limit and self._heap[0][0] <= now:
+            due, key = heapq.heappop(self._heap)
+            if self._due.get(key) != due:
+                continue  # removed or rescheduled since
+            taken.append(key)
+        for key in taken:
+            self._schedule(key, now + settings.WATCH_RETRY_INTERVAL)
+        return taken
+
+    def _next_wait(self, now: float) -> float:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return settings.WATCH_IDLE_SLEEP
+        return min(max(self._heap[0][0] - now, 0), settings.WATCH_IDLE_SLEEP)
+
+    async def _run(
+        self,
+        refresh: Callable[[str, List[str]], Awaitable[None]],
+        load: Optional[Callable[[], Awaitable[List[WatchRow]]]]
+    ) -> None:
+        chunk_size = max(1, min(settings.BATCH_CHUNK_SIZE, trackingmore.MAX_BATCH_SIZE))
+        while True:
+            if load is not None:
+                known = set(self._due)
+                try:
+                    self.sync(await load(), known)
+                except Exception as e:
+                    print(f"Error reading persisted watchlist: {str(e)}")
+
+            keys = self.take_due(time.time(), settings.WATCH_MAX_PER_CYCLE)
+
+            if not keys:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._next_wait(time.time()))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            by_carrier: Dict[str, List[str]] = {}
+            for tracking_number, carrier_code in keys:
+                by_carrier.setdefault(carrier_code, []).append(tracking_number)
+
+            for carrier_code, numbers in by_carrier.items():
+                for start in range(0, len(numbers), chunk_size):
+                    chunk = numbers[start:start + chunk_size]
+                    try:
+                        await refresh(carrier_code, chunk)
+                        self.refreshed += len(chunk)
+                    except Exception as e:
+                        self.failed += len(chunk)
+                        print(f"Error refreshing watched shipments: {str(e)}")
+
+    def start(
+        self,
+        refresh: Callable[[str, List[str]], Awaitable[None]],
+        load: Optional[Callable[[], Awaitable[List[WatchRow]]]] = None
+    ) -> None:
+        """
+        Start the scheduler (called on startup)
+
+        Args:
+            refresh: Coroutine function taking (carrier_code, tracking numbers)
+                     that fetches and records fresh snapshots for one chunk
+            load: Coroutine function returning the persisted watchlist rows,
+                  re-read before every pass (None without a store)
+        """
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run(refresh, load))
+
+    async def shutdown(self) -> None:
+        """Stop the scheduler (called on shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "watched": len(self._due),
+            "running": self._task is not None,
+            "refreshed": self.refreshed,
+            "failed": self.failed
+        }
+
+
+# Global watchlist
+watchlist = Watchlist(settings.WATCH_MAX_ENTRIES)
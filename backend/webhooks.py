@@ -0,0 +1,77 @@
+"""
+TrackingMore webhook helpers for DakDash
+Signature verification and duplicate-event suppression
+"""
+
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import settings
+
+
+def verify_signature(timestamp: Optional[str], signature: Optional[str]) -> bool:
+    """
+    Verify a TrackingMore webhook signature
+
+    TrackingMore signs the `timestamp` header with HMAC-SHA256 using the
+    account's webhook secret and sends the hex digest as `signature`.
+    Stale timestamps are rejected to limit replays.
+    """
+    secret = settings.TRACKINGMORE_WEBHOOK_SECRET
+    if not secret or not timestamp or not signature:
+        return False
+
+    try:
+        sent_at = float(timestamp)
+    except ValueError:
+        return False
+
+    if abs(time.time() - sent_at) > settings.WEBHOOK_MAX_SKEW:
+        return False
+
+    expected = hmac.new(secret.encode(), timestamp.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def event_fingerprint(tracking_data: dict) -> Tuple:
+    """Cheap identity of a pushed snapshot, computed before normalization"""
+    origin_info = tracking_data.get("origin_info") or {}
+    trackinfo = origin_info.get("trackinfo") or []
+    return (
+        tracking_data.get("update_at") or tracking_data.get("updated_at") or "",
+        tracking_data.get("delivery_status") or "",
+        tracking_data.get("latest_checkpoint_time") or "",
+        len(trackinfo)
+    )
+
+
+class WebhookDeduper:
+    """Bounded LRU of the last fingerprint seen per (number, carrier)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[Tuple[str, str], Tuple]" = OrderedDict()
+        self.duplicates = 0
+
+    def is_duplicate(self, key: Tuple[str, str], fingerprint: Tuple) -> bool:
+        """True if this exact snapshot was already applied; records it otherwise"""
+        if self._seen.get(key) == fingerprint:
+            self._seen.move_to_end(key)
+            self.duplicates += 1
+            return True
+
+        self._seen[key] = fingerprint
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    def forget(self, key: Tuple[str, str]) -> None:
+        self._seen.pop(key, None)
+
+
+# Global deduper for incoming webhook events
+webhook_deduper = WebhookDeduper(settings.WEBHOOK_DEDUP_ENTRIES)
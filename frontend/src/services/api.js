@@ -74,6 +74,56 @@ export const trackConsignment = async (trackingNumber, carrier = 'india-post') =
   }
 }
 
+/**
+ * Receive live updates for tracking numbers
+ * Uses the /api/subscribe WebSocket, falling back to Server-Sent Events
+ *
+ * @param {string[]} trackingNumbers - Tracking numbers to follow
+ * @param {string} carrier - Carrier code
+ * @param {Function} onUpdate - Called with {tracking_number, carrier, changes} for each update
+ * @returns {Function} Call to stop receiving updates
+ */
+export const subscribeToUpdates = (trackingNumbers, carrier = 'india-post', onUpdate) => {
+  let closed = false
+  let eventSource = null
+
+  const useEventSource = () => {
+    if (closed || eventSource) return
+    const params = new URLSearchParams({ tracking_numbers: trackingNumbers.join(','), carrier })
+    eventSource = new EventSource(`${API_BASE_URL}/api/subscribe?${params}`)
+    eventSource.addEventListener('update', (event) => onUpdate(JSON.parse(event.data)))
+  }
+
+  if (typeof WebSocket === 'undefined') {
+    useEventSource()
+    return () => {
+      closed = true
+      eventSource?.close()
+    }
+  }
+
+  const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/api/subscribe`)
+  let opened = false
+  socket.onopen = () => {
+    opened = true
+    socket.send(JSON.stringify({ action: 'subscribe', tracking_numbers: trackingNumbers, carrier }))
+  }
+  socket.onmessage = (event) => {
+    const message = JSON.parse(event.data)
+    if (message.type === 'update') onUpdate(message)
+  }
+  // WebSocket blocked (e.g. by a proxy): fall back to SSE
+  socket.onclose = () => {
+    if (!opened) useEventSource()
+  }
+
+  return () => {
+    closed = true
+    socket.close()
+    eventSource?.close()
+  }
+}
+
 /**
  * Health check endpoint
  * 